@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de TrustPilotAnalyzer.actualizar_dataframe
+Compara la actualización celda a celda original con la asignación vectorizada
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trustpilot_analysis import CAMPOS_ANALISIS, TrustPilotAnalyzer
+
+
+def actualizar_dataframe_celda_a_celda(df: pd.DataFrame, resultados):
+    """Implementación original: un df.loc por resultado y campo"""
+    for campo in CAMPOS_ANALISIS:
+        if campo not in df.columns:
+            df[campo] = None
+
+    if 'analyzed' not in df.columns:
+        df['analyzed'] = False
+
+    for resultado in resultados:
+        idx = resultado['index']
+        for campo in CAMPOS_ANALISIS:
+            if campo in resultado:
+                df.loc[idx, campo] = resultado[campo]
+        df.loc[idx, 'analyzed'] = True
+
+    return df
+
+
+def generar_datos(n_filas: int, seed: int = 42):
+    """Generar un DataFrame de reseñas y los resultados del LLM como strings"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'review_id': [f"{i:012x}" for i in range(n_filas)],
+        'customer_name': rng.choice(['Ana', 'Luis', 'Marta', 'John'], n_filas),
+        'review_text': ['Texto de prueba'] * n_filas,
+        'customer_score': rng.integers(1, 6, n_filas),
+        'analyzed': False
+    })
+
+    resultados = []
+    for idx in range(n_filas):
+        resultados.append({
+            'language': 'es',
+            'sentiment': 'Positivo',
+            'sentiment_score': f"{rng.uniform(-1, 1):.2f}",
+            'emotion': 'joy',
+            'emotion_intensity': str(rng.integers(1, 6)),
+            'customer_gender': 'femenino',
+            'main_topic': 'Limpieza',
+            'keywords': 'limpio,amable,centro',
+            'customer_type': 'Promotor',
+            'tourist_type': 'Turista de ocio',
+            'group_type': 'pareja',
+            'index': idx
+        })
+    return df, resultados
+
+
+def medir(funcion, df, resultados) -> float:
+    inicio = time.perf_counter()
+    funcion(df.copy(), [dict(r) for r in resultados])
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de actualizar_dataframe')
+    parser.add_argument('--rows', type=int, default=100000, help='Filas sintéticas (default: 100000)')
+    parser.add_argument('--legacy-rows', type=int, help='Filas para la versión celda a celda (default: igual a --rows)')
+    args = parser.parse_args()
+
+    analyzer = TrustPilotAnalyzer(api_key='benchmark')
+    df, resultados = generar_datos(args.rows)
+
+    print(f"📊 Filas sintéticas: {args.rows:,}")
+
+    t_vectorizado = medir(analyzer.actualizar_dataframe, df, resultados)
+    print(f"⚡ Vectorizado: {t_vectorizado:.3f}s")
+
+    legacy_rows = args.legacy_rows or args.rows
+    t_legacy = medir(actualizar_dataframe_celda_a_celda, df.head(legacy_rows), resultados[:legacy_rows])
+    t_legacy_escalado = t_legacy * args.rows / legacy_rows
+    nota = "" if legacy_rows == args.rows else f" (medido sobre {legacy_rows:,} filas y extrapolado)"
+    print(f"🐢 Celda a celda: {t_legacy_escalado:.3f}s{nota}")
+    print(f"🚀 Aceleración: {t_legacy_escalado / t_vectorizado:.0f}x")
+
+    df_final = analyzer.actualizar_dataframe(df.copy(), [dict(r) for r in resultados])
+    print(f"🔎 Tipos: sentiment_score={df_final['sentiment_score'].dtype}, emotion_intensity={df_final['emotion_intensity'].dtype}")
+
+
+if __name__ == "__main__":
+    main()
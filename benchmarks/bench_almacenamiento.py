@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark de almacenamiento: CSV UTF-8-SIG vs dataset Parquet particionado
+Mide tiempo de escritura, tiempo de lectura (completa y con proyección) y tamaño en disco
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trustpilot_storage import cargar_parquet, guardar_parquet
+
+COLUMNAS_PROYECCION = ['review_id', 'customer_name', 'review_text', 'analyzed']
+
+
+def generar_reseñas(n_filas: int, n_empresas: int = 100, seed: int = 42) -> pd.DataFrame:
+    """Generar reseñas sintéticas con las columnas del scraper y del análisis"""
+    rng = np.random.default_rng(seed)
+    dominios = [f"empresa{i}.com" for i in range(n_empresas)]
+    palabras = np.array("hotel limpio personal amable habitación desayuno playa ruido precio excelente".split())
+
+    textos = [" ".join(rng.choice(palabras, rng.integers(10, 60))) for _ in range(n_filas)]
+    dominio = rng.choice(dominios, n_filas)
+
+    return pd.DataFrame({
+        'review_id': [f"{i:012x}" for i in range(n_filas)],
+        'domain': dominio,
+        'company_name': [d.split('.')[0].title() for d in dominio],
+        'categories': 'travel_vacation',
+        'subcategories': 'Viajes > Hoteles',
+        'company_rating': 'N/A',
+        'review_date': '2024-05-01T10:00:00.000Z',
+        'customer_name': rng.choice(['Ana', 'Luis', 'Marta', 'John'], n_filas),
+        'customer_score': rng.integers(1, 6, n_filas),
+        'review_text': textos,
+        'language': 'es',
+        'sentiment': rng.choice(['Positivo', 'Negativo', 'Neutro'], n_filas),
+        'sentiment_score': rng.uniform(-1, 1, n_filas).round(2),
+        'emotion': rng.choice(['joy', 'anger', 'sadness', 'neutral'], n_filas),
+        'emotion_intensity': rng.integers(1, 6, n_filas),
+        'main_topic': rng.choice(['Limpieza', 'Ubicación', 'Servicios', 'Atención al cliente'], n_filas),
+        'analyzed': True
+    })
+
+
+def tamaño_en_disco(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(raiz, nombre))
+        for raiz, _, nombres in os.walk(path)
+        for nombre in nombres
+    )
+
+
+def cronometrar(funcion):
+    inicio = time.perf_counter()
+    funcion()
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CSV vs Parquet')
+    parser.add_argument('--rows', type=int, default=200000, help='Reseñas sintéticas (default: 200000)')
+    parser.add_argument('--companies', type=int, default=100, help='Empresas distintas (default: 100)')
+    args = parser.parse_args()
+
+    df = generar_reseñas(args.rows, args.companies)
+    directorio = tempfile.mkdtemp(prefix="bench_almacenamiento_")
+    csv_path = os.path.join(directorio, "trustpilot_analyzed.csv")
+    latest_path = os.path.join(directorio, "trustpilot_analyzed_latest.csv")
+    parquet_path = os.path.join(directorio, "trustpilot_analyzed.parquet")
+
+    try:
+        print(f"📊 Reseñas sintéticas: {args.rows:,} ({args.companies} empresas)")
+
+        # CSV: el flujo actual escribe el archivo con timestamp y el _latest
+        t_csv_escritura = cronometrar(lambda: (
+            df.to_csv(csv_path, index=False, encoding='utf-8-sig'),
+            df.to_csv(latest_path, index=False, encoding='utf-8-sig')
+        ))
+        t_csv_lectura = cronometrar(lambda: pd.read_csv(csv_path, encoding='utf-8-sig'))
+        t_csv_proyeccion = cronometrar(lambda: pd.read_csv(csv_path, encoding='utf-8-sig', usecols=COLUMNAS_PROYECCION))
+        tamaño_csv = tamaño_en_disco(csv_path) + tamaño_en_disco(latest_path)
+
+        t_pq_escritura = cronometrar(lambda: guardar_parquet(df, parquet_path, fecha="2024-05-01"))
+        t_pq_lectura = cronometrar(lambda: cargar_parquet(parquet_path))
+        t_pq_proyeccion = cronometrar(lambda: cargar_parquet(parquet_path, COLUMNAS_PROYECCION))
+        tamaño_parquet = tamaño_en_disco(parquet_path)
+
+        print(f"\n{'':22}{'CSV (x2)':>12}{'Parquet':>12}")
+        print(f"{'Escritura (s)':22}{t_csv_escritura:>12.2f}{t_pq_escritura:>12.2f}")
+        print(f"{'Lectura completa (s)':22}{t_csv_lectura:>12.2f}{t_pq_lectura:>12.2f}")
+        print(f"{'Lectura proyectada (s)':22}{t_csv_proyeccion:>12.2f}{t_pq_proyeccion:>12.2f}")
+        print(f"{'Tamaño (MB)':22}{tamaño_csv / 1e6:>12.1f}{tamaño_parquet / 1e6:>12.1f}")
+
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
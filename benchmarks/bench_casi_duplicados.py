@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark de detección de casi duplicados (MinHash/LSH)
+Mide la fracción de llamadas al LLM evitadas, los agrupamientos erróneos y el
+rendimiento del índice sobre un dataset sintético o un CSV de reseñas
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trustpilot_similarity import DEFAULT_SIMILARITY_THRESHOLD, NearDuplicateIndex
+
+VOCABULARIO = (
+    "hotel habitación personal limpieza desayuno piscina ubicación playa recepción cama ruido precio "
+    "servicio reserva check-in comida cena amable sucio excelente terrible volveremos nunca familia "
+    "niños pareja vistas aparcamiento wifi ducha toallas spa bar animación tranquilo caro barato"
+).split()
+PLANTILLAS = [
+    "Todo perfecto, muy recomendable.",
+    "Great service, thank you!",
+    "Excelente atención del personal, volveremos seguro.",
+    "No respondieron a mi reclamación, muy decepcionado.",
+    "Buena relación calidad-precio.",
+]
+
+
+def perturbar(texto, rng):
+    """Variante copiada y pegada: mayúsculas, puntuación, emoji o una palabra añadida"""
+    cambio = rng.randrange(4)
+    if cambio == 0:
+        return texto.upper()
+    if cambio == 1:
+        return texto.rstrip('.!') + rng.choice(['!!!', '...', ' :)'])
+    if cambio == 2:
+        return texto + rng.choice([' 👍', ' ⭐⭐⭐⭐⭐', ' 😡'])
+    return texto + ' ' + rng.choice(VOCABULARIO)
+
+
+def generar_dataset(reseñas, fraccion_duplicados, seed=7):
+    """Devolver (textos, origen) con un porcentaje de plantillas y copias perturbadas"""
+    rng = random.Random(seed)
+    textos, origen = [], []
+    originales = []
+    for i in range(reseñas):
+        if originales and rng.random() < fraccion_duplicados:
+            # 70% copias perturbadas de una reseña anterior, 30% plantillas
+            if rng.random() < 0.7:
+                base, clave = rng.choice(originales)
+            else:
+                j = rng.randrange(len(PLANTILLAS))
+                base, clave = PLANTILLAS[j], f"plantilla{j}"
+            textos.append(perturbar(base, rng))
+            origen.append(clave)
+        else:
+            texto = ' '.join(rng.choice(VOCABULARIO) for _ in range(rng.randint(8, 40))).capitalize() + '.'
+            originales.append((texto, f"original{i}"))
+            textos.append(texto)
+            origen.append(f"original{i}")
+    return textos, origen
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de detección de reseñas casi duplicadas')
+    parser.add_argument('--csv', help='CSV de reseñas real (columna review_text); por defecto dataset sintético')
+    parser.add_argument('--reviews', type=int, default=20000, help='Reseñas del dataset sintético (default: 20000)')
+    parser.add_argument('--duplicates', type=float, default=0.3, help='Fracción de copias en el dataset sintético (default: 0.3)')
+    parser.add_argument('--thresholds', default=f'0.6,0.7,{DEFAULT_SIMILARITY_THRESHOLD},0.9', help='Umbrales a comparar, separados por comas')
+    args = parser.parse_args()
+
+    if args.csv:
+        textos = pd.read_csv(args.csv, usecols=['review_text'], encoding='utf-8-sig')['review_text'].dropna().astype(str).tolist()
+        origen = None
+        print(f"📄 {args.csv}: {len(textos)} reseñas")
+    else:
+        textos, origen = generar_dataset(args.reviews, args.duplicates)
+        print(f"🧪 Dataset sintético: {len(textos)} reseñas, {args.duplicates:.0%} copias perturbadas o plantillas")
+
+    exactos = len(textos) - len(set(textos))
+    print(f"   - Duplicados exactos: {exactos} ({exactos / len(textos) * 100:.1f}%)")
+
+    print(f"\n{'umbral':>8}{'bandas×filas':>14}{'evitadas':>11}{'erróneas':>11}{'reseñas/s':>12}")
+    for threshold in (float(t) for t in args.thresholds.split(',')):
+        indice = NearDuplicateIndex(threshold)
+        erroneas = 0
+        inicio = time.perf_counter()
+        for i, texto in enumerate(textos):
+            representante = indice.asignar(i, texto)
+            if representante is not None and origen is not None and origen[representante] != origen[i]:
+                erroneas += 1
+        duracion = time.perf_counter() - inicio
+        print(f"{threshold:>8.2f}{f'{indice.bandas}×{indice.filas}':>14}{indice.tasa_agrupados * 100:>10.1f}%"
+              f"{erroneas if origen is not None else '-':>11}{len(textos) / duracion:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
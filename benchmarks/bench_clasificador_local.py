@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark del clasificador local (idioma por n-gramas + sentimiento por léxico)
+Mide reseñas/s del nivel local, la tasa de escalado al LLM y las escaladas con idioma
+local, y la tasa de errores en reseñas reservadas (ajenas al corpus de CORPUS_IDIOMAS),
+incluidas reseñas en idiomas no soportados que nunca deberían resolverse en local
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trustpilot_local import DEFAULT_MAX_WORDS, LocalClassifier
+
+# (idioma, puntuación, texto)
+CORTAS = [
+    ("es", 5, "Todo perfecto, muy recomendable."),
+    ("es", 5, "Excelente servicio, gracias por todo"),
+    ("es", 1, "Una estafa, nunca me devolvieron el dinero"),
+    ("en", 5, "Great service, thank you so much!"),
+    ("en", 5, "Easy booking and very helpful staff"),
+    ("en", 1, "Terrible company, never again. Avoid!"),
+    ("fr", 5, "Très bon séjour, je recommande vivement"),
+    ("fr", 1, "Arnaque totale, jamais remboursé"),
+    ("de", 5, "Sehr gut, alles super und schnell"),
+    ("de", 1, "Schlechter Service, nie wieder"),
+    ("it", 5, "Ottimo servizio, consigliato a tutti"),
+    ("pt", 5, "Tudo perfeito, recomendo muito"),
+    ("nl", 5, "Het was perfect, een aanrader"),
+]
+LARGAS = [
+    "El hotel estaba bien pero la habitación era ruidosa y el desayuno escaso. El personal fue amable "
+    "aunque tardaron mucho en el check-in y la piscina estaba cerrada durante toda la semana.",
+    "We booked a family holiday through them. The flights were fine but the transfer never showed up "
+    "and we had to pay for a taxi; customer service eventually refunded part of it after three weeks.",
+    "Séjour correct dans l'ensemble, la chambre était propre mais le petit déjeuner décevant et le "
+    "personnel peu disponible en soirée. Rapport qualité-prix moyen.",
+]
+
+# Reseñas reservadas (idioma, puntuación, texto): vocabulario distinto del corpus semilla
+RESERVADAS_SOPORTADAS = [
+    ("es", 5, "Reservé un apartamento en Sevilla y todo salió genial"),
+    ("es", 5, "Muy contentos con el viaje a Canarias, repetiremos seguro"),
+    ("es", 1, "Me cobraron dos veces y nadie contesta los correos"),
+    ("es", 1, "Vuelo cancelado sin aviso, una vergüenza de compañía"),
+    ("es", 5, "La guía del tour fue encantadora y muy puntual"),
+    ("es", 3, "Correcto, aunque el traslado llegó con retraso"),
+    ("en", 5, "Lovely apartment in Lisbon, the host gave us great tips"),
+    ("en", 5, "Booked last minute and everything went smoothly, cheers"),
+    ("en", 1, "They charged my card twice and ignored every email"),
+    ("en", 1, "Flight cancelled without notice, shocking company"),
+    ("en", 5, "Our tour guide was brilliant and always on time"),
+    ("en", 3, "Okay overall, although the shuttle was late"),
+    ("fr", 5, "Appartement charmant à Lyon, l'hôte nous a donné de bons conseils"),
+    ("fr", 5, "Réservation de dernière minute et tout s'est bien passé"),
+    ("fr", 1, "Ils ont débité ma carte deux fois et ignorent mes mails"),
+    ("fr", 1, "Vol annulé sans prévenir, compagnie lamentable"),
+    ("fr", 5, "Notre guide était géniale et toujours à l'heure"),
+    ("de", 5, "Schöne Wohnung in Wien, der Gastgeber gab uns tolle Tipps"),
+    ("de", 5, "Kurzfristig gebucht und alles lief reibungslos"),
+    ("de", 1, "Meine Karte wurde doppelt belastet und niemand antwortet"),
+    ("de", 1, "Flug ohne Vorwarnung gestrichen, unmögliche Firma"),
+    ("de", 5, "Unsere Reiseleiterin war großartig und immer pünktlich"),
+    ("it", 5, "Appartamento delizioso a Firenze, l'host ci ha dato ottimi consigli"),
+    ("it", 5, "Prenotato all'ultimo momento ed è andato tutto liscio"),
+    ("it", 1, "Mi hanno addebitato due volte e nessuno risponde alle email"),
+    ("it", 1, "Volo cancellato senza preavviso, compagnia vergognosa"),
+    ("it", 5, "La nostra guida era bravissima e sempre puntuale"),
+    ("pt", 5, "Apartamento lindo em Porto, o anfitrião deu ótimas dicas"),
+    ("pt", 5, "Reservei em cima da hora e correu tudo lindamente"),
+    ("pt", 1, "Cobraram o meu cartão duas vezes e ninguém responde aos emails"),
+    ("pt", 1, "Voo cancelado sem aviso, companhia vergonhosa"),
+    ("pt", 5, "A nossa guia foi espetacular e sempre pontual"),
+    ("nl", 5, "Prachtig appartement in Utrecht, de gastheer gaf goede tips"),
+    ("nl", 5, "Last minute geboekt en alles verliep vlekkeloos"),
+    ("nl", 1, "Mijn kaart is twee keer belast en niemand reageert op mails"),
+    ("nl", 1, "Vlucht zonder waarschuwing geannuleerd, waardeloos bedrijf"),
+    ("nl", 5, "Onze gids was geweldig en altijd op tijd"),
+]
+# Idiomas que el clasificador no conoce: cualquier idioma asignado es un error
+RESERVADAS_NO_SOPORTADAS = [
+    ("tr", 5, "Çok iyi hizmet, teşekkürler herkese"),
+    ("tr", 1, "Uçuş iptal edildi ve param iade edilmedi"),
+    ("ca", 5, "Molt bon servei, tot perfecte i ràpid, ho recomano"),
+    ("ca", 1, "El vol es va cancel·lar i ningú ens va avisar"),
+    ("pl", 5, "Świetna obsługa, wszystko szybko i sprawnie, polecam"),
+    ("pl", 1, "Lot odwołany, pieniądze nie zostały zwrócone"),
+    ("sv", 5, "Jättebra service, allt gick smidigt, tack så mycket"),
+    ("sv", 1, "Flyget ställdes in och vi fick inga pengar tillbaka"),
+    ("ro", 5, "Servicii excelente, totul a fost perfect, recomand"),
+    ("ro", 1, "Zborul a fost anulat și nu am primit banii înapoi"),
+    ("id", 5, "Pelayanan sangat bagus, semuanya lancar, terima kasih"),
+    ("ru", 5, "Отличный сервис, всё прошло быстро, спасибо"),
+    ("gl", 5, "Moi bo servizo, todo perfecto, recomendo a axencia"),
+    ("da", 1, "Flyet blev aflyst og vi fik aldrig pengene tilbage"),
+]
+
+
+def generar_dataset(reseñas, fraccion_cortas, seed=7):
+    """Devolver un DataFrame con review_text y customer_score para medir el rendimiento"""
+    rng = random.Random(seed)
+    filas = []
+    for _ in range(reseñas):
+        if rng.random() < fraccion_cortas:
+            _, score, texto = rng.choice(CORTAS)
+        else:
+            score, texto = rng.randint(1, 5), rng.choice(LARGAS)
+        filas.append({'review_text': texto, 'customer_score': score})
+    return pd.DataFrame(filas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del clasificador local de reseñas')
+    parser.add_argument('--csv', help='CSV de reseñas real (columnas review_text y customer_score); por defecto dataset sintético')
+    parser.add_argument('--reviews', type=int, default=50000, help='Reseñas del dataset sintético (default: 50000)')
+    parser.add_argument('--short', type=float, default=0.4, help='Fracción de reseñas cortas de 1/5 estrellas en el dataset sintético (default: 0.4)')
+    parser.add_argument('--max-words', type=int, default=DEFAULT_MAX_WORDS, help=f'Máximo de palabras resueltas en local (default: {DEFAULT_MAX_WORDS})')
+    args = parser.parse_args()
+
+    if args.csv:
+        df = pd.read_csv(args.csv, usecols=['review_text', 'customer_score'], encoding='utf-8-sig').dropna(subset=['review_text'])
+        print(f"📄 {args.csv}: {len(df)} reseñas")
+    else:
+        df = generar_dataset(args.reviews, args.short)
+        print(f"🧪 Dataset sintético: {len(df)} reseñas, {args.short:.0%} cortas de 1/5 estrellas")
+
+    clasificador = LocalClassifier(args.max_words)
+    inicio = time.perf_counter()
+    clasificados = [clasificador.clasificar_campos(texto, score) for texto, score in zip(df['review_text'], df['customer_score'])]
+    duracion = time.perf_counter() - inicio
+    con_idioma = sum('language' in campos for _, campos in clasificados)
+
+    print(f"   - Nivel local: {len(df) / duracion:.0f} reseñas/s ({duracion:.2f}s)")
+    print(f"   - Resueltas en local: {clasificador.resueltas} ({(1 - clasificador.tasa_escalado) * 100:.1f}%)")
+    print(f"   - Escaladas al LLM: {clasificador.textos - clasificador.resueltas} ({clasificador.tasa_escalado * 100:.1f}%)")
+    escaladas = clasificador.textos - clasificador.resueltas
+    print(f"   - Escaladas con idioma local: {con_idioma} ({con_idioma / escaladas * 100 if escaladas else 0:.1f}%)")
+
+    evaluar_reservadas(LocalClassifier(args.max_words))
+
+
+def evaluar_reservadas(clasificador):
+    """Errores de idioma y de las reseñas resueltas en local sobre las reseñas reservadas"""
+    print(f"\n🔍 Reseñas reservadas: {len(RESERVADAS_SOPORTADAS)} en idiomas soportados, "
+          f"{len(RESERVADAS_NO_SOPORTADAS)} en idiomas no soportados")
+    for etiqueta, reseñas, soportado in (('Soportados', RESERVADAS_SOPORTADAS, True),
+                                         ('No soportados', RESERVADAS_NO_SOPORTADAS, False)):
+        aciertos = errores = resueltas = resueltas_mal = 0
+        for idioma, score, texto in reseñas:
+            detectado, _ = clasificador.detectar_idioma(texto)
+            if detectado is not None:
+                if soportado and detectado == idioma:
+                    aciertos += 1
+                else:
+                    errores += 1
+            resultado = clasificador.clasificar(texto, score)
+            if resultado is not None:
+                resueltas += 1
+                esperado = {5: 'Positivo', 1: 'Negativo'}.get(score)
+                if not soportado or resultado['language'] != idioma or resultado['sentiment'] != esperado:
+                    resueltas_mal += 1
+        print(f"   - {etiqueta}: idioma correcto {aciertos}, erróneo {errores} ({errores / len(reseñas) * 100:.1f}%), "
+              f"sin confianza {len(reseñas) - aciertos - errores}; resueltas en local {resueltas}, "
+              f"mal clasificadas {resueltas_mal}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Benchmark de extremo a extremo sin red
+Levanta el servidor de fixtures (páginas generadas o grabadas + stub del LLM), ejecuta
+run_scraper_github_actions y TrustPilotAnalyzer.analizar cada uno en su propio proceso
+y emite un JSON con páginas/s, reseñas/s, latencias p50/p95/p99 y RSS máximo por etapa
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import contextlib
+import multiprocessing
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixture_server import LLM_PATH, start_fixture_server
+
+# Métricas comparadas con --baseline: (etapa, métrica, True si más alto es mejor)
+METRICAS_COMPARADAS = [
+    ('scraper', 'paginas_por_s', True),
+    ('scraper', 'reseñas_por_s', True),
+    ('scraper', 'rss_max_mb', False),
+    ('analizador', 'reseñas_por_s', True),
+    ('analizador', 'rss_max_mb', False),
+]
+
+
+def percentiles(muestras):
+    """p50/p95/p99 en milisegundos"""
+    if not muestras:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    p50, p95, p99 = np.percentile(np.asarray(muestras) * 1000, [50, 95, 99])
+    return {'p50_ms': round(float(p50), 2), 'p95_ms': round(float(p95), 2), 'p99_ms': round(float(p99), 2)}
+
+
+def rss_max_mb():
+    """RSS máximo del proceso actual (ru_maxrss va en KB en Linux y en bytes en macOS)"""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _ejecutar_etapa(funcion, args, cola, silencioso):
+    """Cuerpo del proceso hijo: ejecutar la etapa y devolver sus métricas con el RSS máximo"""
+    with open(os.devnull, 'w') as nulo, \
+            contextlib.redirect_stdout(nulo if silencioso else sys.stdout), \
+            contextlib.redirect_stderr(nulo if silencioso else sys.stderr):
+        metricas = funcion(*args)
+    metricas['rss_max_mb'] = rss_max_mb()
+    cola.put(metricas)
+
+
+def en_proceso(funcion, *args, silencioso=True):
+    """Ejecutar una etapa en un proceso nuevo para medir su RSS máximo por separado"""
+    contexto = multiprocessing.get_context('spawn')
+    cola = contexto.Queue()
+    proceso = contexto.Process(target=_ejecutar_etapa, args=(funcion, args, cola, silencioso))
+    proceso.start()
+    metricas = cola.get()
+    proceso.join()
+    return metricas
+
+
+def etapa_scraper(base_url, max_companies, max_review_pages, workers):
+    from scraper_github_actions import run_scraper_github_actions
+
+    inicio = time.perf_counter()
+    df = run_scraper_github_actions(
+        max_companies=max_companies,
+        max_review_pages=max_review_pages,
+        max_company_pages=1,
+        workers=workers,
+        base_url=base_url,
+        min_delay=0,
+        max_delay=0
+    )
+    return {
+        'duracion_s': round(time.perf_counter() - inicio, 3),
+        'reseñas': 0 if df is None else len(df),
+        'archivo': next((f for f in sorted(os.listdir('.')) if f.startswith('trustpilot_consolidated_')), None),
+    }
+
+
+def etapa_analizador(api_url, csv_path, concurrency, pack_size, max_retries):
+    from trustpilot_analysis import TrustPilotAnalyzer
+    from trustpilot_llm_client import CircuitBreaker, RetryPolicy
+
+    analyzer = TrustPilotAnalyzer(
+        'bench', concurrency=concurrency, rps=0, api_url=api_url, pack_size=pack_size,
+        retry_policy=RetryPolicy(max_retries, base=0.05, max_backoff=1),
+        circuit_breaker=CircuitBreaker(threshold=concurrency * 4, cooldown=1)
+    )
+    inicio = time.perf_counter()
+    df, errores = analyzer.analizar(csv_path)
+    duracion = time.perf_counter() - inicio
+    total = analyzer.client.latencias['total']
+    return {
+        'duracion_s': round(duracion, 3),
+        'reseñas': int(df['analyzed'].sum()),
+        'errores': len(errores),
+        'peticiones_llm': analyzer.client.peticiones,
+        'conexiones_nuevas': analyzer.client.conexiones_nuevas,
+        'latencia_cliente_ms': {'media': round(total.total / total.n * 1000, 2) if total.n else None,
+                                'p95_bucket': round(total.percentil(95) * 1000, 2)},
+    }
+
+
+def comparar(resultado, baseline_path):
+    """Mostrar la variación de las métricas principales respecto a un JSON anterior"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    print(f"\n📊 Comparación con {baseline_path}:")
+    regresiones = 0
+    for etapa, metrica, mas_es_mejor in METRICAS_COMPARADAS:
+        antes = baseline.get(etapa, {}).get(metrica)
+        ahora = resultado.get(etapa, {}).get(metrica)
+        if not antes or ahora is None:
+            continue
+        cambio = (ahora - antes) / antes * 100
+        peor = cambio < 0 if mas_es_mejor else cambio > 0
+        regresiones += peor and abs(cambio) >= 10
+        marca = '⚠️' if peor and abs(cambio) >= 10 else '  '
+        print(f"   {marca} {etapa}.{metrica}: {antes} → {ahora} ({cambio:+.1f}%)")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de extremo a extremo: scraper + analizador contra servidores locales')
+    parser.add_argument('--companies', type=int, default=20, help='Empresas a extraer (default: 20)')
+    parser.add_argument('--review-pages', type=int, default=3, help='Páginas de reseñas por empresa (default: 3)')
+    parser.add_argument('--reviews-per-page', type=int, default=20, help='Reseñas por página (default: 20)')
+    parser.add_argument('--replay', metavar='DIR', help='Servir las páginas grabadas en DIR (p. ej. benchmarks/fixtures) en lugar de generarlas')
+    parser.add_argument('--workers', type=int, default=4, help='Workers del scraper (default: 4)')
+    parser.add_argument('--page-latency', type=float, default=0.0, help='Latencia por página en segundos (default: 0)')
+    parser.add_argument('--llm-latency', type=float, default=0.05, help='Latencia del stub del LLM en segundos (default: 0.05)')
+    parser.add_argument('--llm-error-rate', type=float, default=0.0, help='Fracción de respuestas 500 del LLM (default: 0)')
+    parser.add_argument('--llm-throttle-every', type=int, default=0, help='Responder 429 cada N peticiones al LLM (default: 0 = nunca)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Peticiones simultáneas al LLM (default: 8)')
+    parser.add_argument('--pack-size', type=int, default=1, help='Reseñas por petición al LLM (default: 1)')
+    parser.add_argument('--max-retries', type=int, default=5, help='Reintentos por petición al LLM (default: 5)')
+    parser.add_argument('--output', help='Guardar el resultado JSON en este archivo (por defecto solo se imprime)')
+    parser.add_argument('--baseline', help='JSON de una ejecución anterior con el que comparar')
+    parser.add_argument('--verbose', action='store_true', help='Mostrar la salida del scraper y del analizador')
+    args = parser.parse_args()
+
+    servidor, base_url = start_fixture_server(
+        companies=args.companies,
+        reviews_per_page=args.reviews_per_page,
+        review_pages=args.review_pages,
+        latency=args.page_latency,
+        replay_dir=args.replay,
+        llm_latency=args.llm_latency,
+        llm_error_rate=args.llm_error_rate,
+        llm_throttle_every=args.llm_throttle_every
+    )
+    print(f"🧪 Servidor de fixtures{' (páginas grabadas)' if args.replay else ''} y stub del LLM en {base_url}")
+
+    directorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as directorio:
+        os.chdir(directorio)
+        try:
+            print("🕷️ Scraper...")
+            scraper = en_proceso(etapa_scraper, base_url, args.companies, args.review_pages, args.workers,
+                                 silencioso=not args.verbose)
+            paginas = len(servidor.latencias['pagina'])
+            scraper.update({
+                'paginas': paginas,
+                'paginas_por_s': round(paginas / scraper['duracion_s'], 2),
+                'reseñas_por_s': round(scraper['reseñas'] / scraper['duracion_s'], 2),
+                'latencia_pagina_servidor': percentiles(servidor.latencias['pagina']),
+            })
+            archivo = scraper.pop('archivo')
+            if archivo is None:
+                print("❌ El scraper no generó ningún consolidado")
+                sys.exit(1)
+
+            print("🤖 Analizador...")
+            analizador = en_proceso(etapa_analizador, base_url + LLM_PATH, archivo, args.concurrency,
+                                    args.pack_size, args.max_retries, silencioso=not args.verbose)
+            analizador.update({
+                'reseñas_por_s': round(analizador['reseñas'] / analizador['duracion_s'], 2),
+                'latencia_llm_servidor': percentiles(servidor.latencias['llm']),
+            })
+        finally:
+            os.chdir(directorio_original)
+            servidor.shutdown()
+
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'parametros': vars(args),
+        'scraper': scraper,
+        'analizador': analizador,
+    }
+    print(json.dumps(resultado, ensure_ascii=False, indent=2, default=str))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2, default=str)
+        print(f"💾 Resultado guardado en {args.output}")
+
+    if args.baseline and comparar(resultado, args.baseline):
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
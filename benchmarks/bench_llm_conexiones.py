@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark de reutilización de conexiones con el LLM
+Levanta un stub TLS local de /api/v1/chat/completions y compara requests.post por
+petición (una conexión TCP+TLS cada vez) con la sesión en pool del analizador,
+contando las conexiones que acepta el servidor
+"""
+
+import os
+import sys
+import ssl
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trustpilot_analysis import EJEMPLO_RESPUESTA, TrustPilotAnalyzer
+
+RUTA_API = "/api/v1/chat/completions"
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """Responde a cada completion con una línea de análisis fija, manteniendo la conexión abierta"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # Una instancia del handler por conexión aceptada
+        with self.server.lock:
+            self.server.conexiones += 1
+        super().setup()
+
+    def do_POST(self):
+        longitud = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(longitud)
+        with self.server.lock:
+            self.server.peticiones += 1
+        if self.server.latencia:
+            time.sleep(self.server.latencia)
+
+        cuerpo = json.dumps({"choices": [{"message": {"content": EJEMPLO_RESPUESTA}}]}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def crear_certificado(directorio):
+    """Certificado autofirmado para 127.0.0.1 (requiere el binario openssl)"""
+    cert, key = os.path.join(directorio, 'cert.pem'), os.path.join(directorio, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=127.0.0.1',
+         '-addext', 'subjectAltName=IP:127.0.0.1', '-keyout', key, '-out', cert],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+def iniciar_stub(cert, key, latencia):
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), StubLLMHandler)
+    servidor.daemon_threads = True
+    servidor.lock = threading.Lock()
+    servidor.conexiones = 0
+    servidor.peticiones = 0
+    servidor.latencia = latencia
+    contexto = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    contexto.load_cert_chain(cert, key)
+    servidor.socket = contexto.wrap_socket(servidor.socket, server_side=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def medir(servidor, nombre, enviar, peticiones, concurrencia):
+    servidor.conexiones = servidor.peticiones = 0
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+        list(executor.map(lambda _: enviar(), range(peticiones)))
+    duracion = time.perf_counter() - inicio
+    print(f"{nombre:>22}{servidor.peticiones:>11}{servidor.conexiones:>13}{peticiones / duracion:>13.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de reutilización de conexiones HTTPS con el LLM')
+    parser.add_argument('--requests', type=int, default=500, help='Peticiones por modo (default: 500)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Peticiones simultáneas (default: 8)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latencia simulada del stub en segundos (default: 0)')
+    parser.add_argument('--http2', action='store_true', help='Probar también el cliente HTTP/2 (requiere httpx[http2]; el stub solo habla HTTP/1.1)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        cert, key = crear_certificado(directorio)
+        servidor = iniciar_stub(cert, key, args.latency)
+        url = f"https://127.0.0.1:{servidor.server_address[1]}{RUTA_API}"
+        payload = {"model": "stub", "messages": [{"role": "user", "content": "hola"}]}
+
+        print(f"🔒 Stub TLS en {url}: {args.requests} peticiones, {args.concurrency} simultáneas")
+        print(f"\n{'modo':>22}{'peticiones':>11}{'conexiones':>13}{'peticiones/s':>13}")
+
+        medir(servidor, 'requests.post', lambda: requests.post(url, json=payload, verify=cert, timeout=30),
+              args.requests, args.concurrency)
+
+        modos = [('sesión en pool', False)] + ([('HTTP/2 (httpx)', True)] if args.http2 else [])
+        for nombre, http2 in modos:
+            analyzer = TrustPilotAnalyzer('stub', concurrency=args.concurrency, rps=0, api_url=url,
+                                          http2=http2, verify=cert)
+            medir(servidor, nombre, lambda: analyzer._solicitar_completion("hola"), args.requests, args.concurrency)
+            print(f"\n📊 Cliente ({nombre}):")
+            analyzer.client.report()
+            analyzer.client.close()
+
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark del modo ligero de Chrome frente al navegador completo
+Carga páginas de reseñas con recursos pesados del servidor de fixtures y mide
+bytes transferidos y latencia de carga por página (requiere Chrome y chromedriver)
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import statistics
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixture_server import THIRD_PARTY_HOST, company_domain, start_fixture_server
+from scraper_github_actions import (
+    READY_TIMEOUT, REVIEWS_READY_SELECTOR, page_load_metrics, quit_driver, setup_driver_github_actions,
+    wait_for_selector
+)
+
+
+def medir_modo(base_url, server, paginas, lean, profile_dir=None):
+    """Cargar las páginas con un navegador y devolver métricas por página"""
+    # El host de terceros de las fixtures se resuelve al servidor local
+    driver = setup_driver_github_actions(
+        headless=True,
+        lean=lean,
+        profile_dir=profile_dir,
+        extra_args=[f'--host-resolver-rules=MAP {THIRD_PARTY_HOST} 127.0.0.1']
+    )
+    metricas = []
+    try:
+        for i in range(paginas):
+            url = f"{base_url}/review/{company_domain(i)}"
+            with server.lock:
+                bytes_antes = server.bytes_served
+            inicio = time.perf_counter()
+            driver.get(url)
+            wait_for_selector(driver, REVIEWS_READY_SELECTOR, READY_TIMEOUT)
+            latencia = time.perf_counter() - inicio
+            # Dejar que terminen las descargas en curso para contar todos los bytes del modo
+            time.sleep(0.5)
+            with server.lock:
+                bytes_servidos = server.bytes_served - bytes_antes
+            datos = page_load_metrics(driver)
+            metricas.append({
+                'latencia': latencia,
+                'bytes_servidos': bytes_servidos,
+                'bytes_navegador': datos['bytes'],
+                'peticiones': datos['requests'],
+                'dcl_ms': datos['dom_content_loaded_ms'],
+            })
+    finally:
+        quit_driver(driver)
+    return metricas
+
+
+def resumir(nombre, metricas):
+    latencias = [m['latencia'] * 1e3 for m in metricas]
+    print(f"{nombre:10}"
+          f"{statistics.mean(m['bytes_servidos'] for m in metricas) / 1e3:>14.0f}"
+          f"{statistics.mean(m['bytes_navegador'] for m in metricas) / 1e3:>14.0f}"
+          f"{statistics.mean(m['peticiones'] for m in metricas):>11.1f}"
+          f"{statistics.median(latencias):>11.0f}"
+          f"{max(latencias):>11.0f}"
+          f"{statistics.mean(m['dcl_ms'] for m in metricas):>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de Chrome completo frente a modo ligero')
+    parser.add_argument('--pages', type=int, default=20, help='Páginas de reseñas por modo (default: 20)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latencia añadida por respuesta del servidor')
+    args = parser.parse_args()
+
+    server, base_url = start_fixture_server(companies=args.pages, latency=args.latency, heavy_assets=True)
+    profile_dir = tempfile.mkdtemp(prefix="bench_navegador_profile_")
+
+    try:
+        print(f"🧪 Servidor de fixtures con recursos pesados en {base_url}, {args.pages} páginas por modo")
+        completo = medir_modo(base_url, server, args.pages, lean=False)
+        ligero = medir_modo(base_url, server, args.pages, lean=True, profile_dir=profile_dir)
+
+        print(f"\n{'':10}{'KB servidos':>14}{'KB navegador':>14}{'peticiones':>11}{'p50 ms':>11}{'máx ms':>11}{'DCL ms':>9}")
+        resumir("Completo", completo)
+        resumir("Ligero", ligero)
+
+        bytes_completo = sum(m['bytes_servidos'] for m in completo)
+        bytes_ligero = sum(m['bytes_servidos'] for m in ligero)
+        print(f"\n📉 Bytes servidos: -{(1 - bytes_ligero / bytes_completo) * 100:.0f}%")
+        print(f"⚡ Latencia p50: {statistics.median(m['latencia'] for m in completo) / statistics.median(m['latencia'] for m in ligero):.1f}x")
+    finally:
+        server.shutdown()
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
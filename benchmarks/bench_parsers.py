@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark de parseo sobre páginas fixture guardadas (páginas/s)
+Compara el parseo original (html.parser, dos pasadas) con lxml + SoupStrainer
+y con el extractor JSON (__NEXT_DATA__)
+"""
+
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper_github_actions import (
+    BREADCRUMB_STRAINER, COMPANY_LINKS_STRAINER, REVIEW_PAGE_STRAINER,
+    extract_reviews_from_cards, extract_reviews_from_next_data, extract_subcategories, parse_html
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def reseñas_original(html):
+    """Flujo original: un parseo completo para el breadcrumb y otro para las tarjetas"""
+    extract_subcategories(BeautifulSoup(html, 'html.parser'))
+    return extract_reviews_from_cards(BeautifulSoup(html, 'html.parser'))
+
+
+def reseñas_lxml(html):
+    """Un único parseo con lxml restringido a article/nav"""
+    soup = parse_html(html, REVIEW_PAGE_STRAINER)
+    extract_subcategories(soup)
+    return extract_reviews_from_cards(soup)
+
+
+def reseñas_json(html):
+    """JSON incrustado más el breadcrumb con un parseo restringido a nav"""
+    extract_subcategories(parse_html(html, BREADCRUMB_STRAINER))
+    return extract_reviews_from_next_data(html)
+
+
+def empresas_original(html):
+    return BeautifulSoup(html, 'html.parser').find_all('a', href=re.compile('/review/[^/?]+$'))
+
+
+def empresas_lxml(html):
+    return parse_html(html, COMPANY_LINKS_STRAINER).find_all('a')
+
+
+def medir(funcion, paginas, repeticiones):
+    """Devolver (páginas/s, elementos extraídos en una pasada)"""
+    elementos = sum(len(funcion(html)) for html in paginas)
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for html in paginas:
+            funcion(html)
+    return len(paginas) * repeticiones / (time.perf_counter() - inicio), elementos
+
+
+def leer(rutas):
+    paginas = []
+    for ruta in rutas:
+        with open(ruta, encoding='utf-8') as f:
+            paginas.append(f.read())
+    return paginas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de parseo de páginas')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='Directorio con páginas category_*.html y review_*.html')
+    parser.add_argument('--repeat', type=int, default=20, help='Pasadas sobre el corpus (default: 20)')
+    args = parser.parse_args()
+
+    reseñas = leer(sorted(glob.glob(os.path.join(args.fixtures, "review_*.html"))))
+    categorias = leer(sorted(glob.glob(os.path.join(args.fixtures, "category_*.html"))))
+    if not reseñas or not categorias:
+        print(f"❌ No hay páginas en {args.fixtures} (genera el corpus con fixture_server.py --save)")
+        sys.exit(1)
+
+    print(f"📄 Corpus: {len(reseñas)} páginas de reseñas y {len(categorias)} de categoría, {args.repeat} pasadas")
+
+    casos = [
+        ("Reseñas", "html.parser x2", reseñas_original, reseñas),
+        ("Reseñas", "lxml + strainer", reseñas_lxml, reseñas),
+        ("Reseñas", "JSON __NEXT_DATA__", reseñas_json, reseñas),
+        ("Categoría", "html.parser", empresas_original, categorias),
+        ("Categoría", "lxml + strainer", empresas_lxml, categorias),
+    ]
+
+    print(f"\n{'':11}{'':20}{'págs/s':>10}{'elementos':>11}")
+    resultados = {}
+    for tipo, nombre, funcion, paginas in casos:
+        velocidad, elementos = medir(funcion, paginas, args.repeat)
+        resultados[(tipo, nombre)] = (velocidad, elementos)
+        print(f"{tipo:11}{nombre:20}{velocidad:>10.0f}{elementos:>11}")
+
+    base = resultados[("Reseñas", "html.parser x2")][0]
+    print(f"\n🚀 Reseñas: lxml {resultados[('Reseñas', 'lxml + strainer')][0] / base:.1f}x, "
+          f"JSON {resultados[('Reseñas', 'JSON __NEXT_DATA__')][0] / base:.1f}x frente a html.parser x2")
+    print(f"🚀 Categoría: lxml {resultados[('Categoría', 'lxml + strainer')][0] / resultados[('Categoría', 'html.parser')][0]:.1f}x")
+
+    for tipo in ("Reseñas", "Categoría"):
+        conteos = {elementos for (t, _), (_, elementos) in resultados.items() if t == tipo}
+        if len(conteos) > 1:
+            print(f"⚠️ Los parsers no coinciden en las páginas de {tipo.lower()}: {sorted(conteos)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memoria de las reseñas extraídas: dicts por reseña vs registros compactos
+Simula una ejecución del scraper con N reseñas sintéticas (empresas que terminan en
+desorden, como con el pool) y mide, cada modo en su propio proceso, el RSS máximo,
+el tiempo y la memoria del DataFrame consolidado
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import hashlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_end_to_end import en_proceso
+
+PALABRAS = "hotel limpio personal amable habitación desayuno playa ruido precio excelente piscina cama".split()
+
+
+def empresas_sinteticas(n_reseñas, n_empresas, seed=42):
+    """(índice, company_info, subcategorías, reseñas) por empresa en orden de llegada aleatorio"""
+    rng = random.Random(seed)
+    por_empresa = n_reseñas // n_empresas
+    orden = list(range(n_empresas))
+    rng.shuffle(orden)
+    for index in orden:
+        company_info = {
+            'domain': f"empresa{index}.com",
+            'company_name': f"Empresa {index}",
+            'categories': 'travel_vacation',
+            'rating': f"{rng.uniform(1, 5):.1f}",
+        }
+        subcategories = "Hoteles > Hoteles de playa"
+        datos = []
+        for i in range(por_empresa + (1 if index < n_reseñas % n_empresas else 0)):
+            texto = " ".join(rng.choices(PALABRAS, k=rng.randint(10, 60)))
+            nombre = f"Cliente {rng.randint(1, 10 ** 6)}"
+            fecha = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:00:00.000Z"
+            review_id = hashlib.md5(f"{index}{i}{nombre}{texto[:50]}".encode()).hexdigest()[:12]
+            datos.append((review_id, fecha, nombre, rng.randint(1, 5), texto))
+        yield index, company_info, subcategories, datos
+
+
+def modo_dicts(n_reseñas, n_empresas):
+    """Flujo anterior: un dict por reseña con los placeholders de análisis"""
+    import pandas as pd
+
+    inicio = time.perf_counter()
+    reviews_by_company = {}
+    for index, company_info, subcategories, datos in empresas_sinteticas(n_reseñas, n_empresas):
+        reviews_by_company[index] = [{
+            'review_id': review_id,
+            'domain': company_info['domain'],
+            'company_name': company_info['company_name'],
+            'categories': company_info['categories'],
+            'subcategories': subcategories,
+            'company_rating': company_info['rating'],
+            'review_date': fecha,
+            'customer_name': nombre,
+            'customer_score': score,
+            'review_text': texto,
+            'language': '', 'sentiment': '', 'emotion': '', 'customer_gender': '', 'main_topic': '',
+            'keywords': '', 'customer_type': '', 'tourist_type': '', 'group_type': '',
+            'analyzed': False
+        } for review_id, fecha, nombre, score, texto in datos]
+    all_reviews = [review for index in sorted(reviews_by_company) for review in reviews_by_company[index]]
+    df = pd.DataFrame(all_reviews)
+    return {
+        'segundos': round(time.perf_counter() - inicio, 1),
+        'reseñas': len(df),
+        'dataframe_mb': round(df.memory_usage(deep=True).sum() / 2 ** 20, 1),
+    }
+
+
+def modo_compacto(n_reseñas, n_empresas):
+    """Flujo actual: ReviewRecord con los campos de empresa compartidos y ReviewBuffer"""
+    from trustpilot_records import CompanyFields, ReviewBuffer, ReviewRecord
+
+    inicio = time.perf_counter()
+    all_reviews = ReviewBuffer()
+    for index, company_info, subcategories, datos in empresas_sinteticas(n_reseñas, n_empresas):
+        company = CompanyFields(company_info, subcategories)
+        all_reviews.extend(
+            [ReviewRecord(company, *registro) for registro in datos],
+            orden=index
+        )
+    df = all_reviews.to_dataframe()
+    return {
+        'segundos': round(time.perf_counter() - inicio, 1),
+        'reseñas': len(df),
+        'dataframe_mb': round(df.memory_usage(deep=True).sum() / 2 ** 20, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de memoria de las reseñas extraídas')
+    parser.add_argument('--rows', type=int, default=1000000, help='Reseñas sintéticas (default: 1000000)')
+    parser.add_argument('--companies', type=int, default=200, help='Empresas distintas (default: 200)')
+    args = parser.parse_args()
+
+    print(f"📊 Reseñas sintéticas: {args.rows:,} ({args.companies} empresas)")
+    resultados = {
+        'Dicts': en_proceso(modo_dicts, args.rows, args.companies),
+        'Compacto': en_proceso(modo_compacto, args.rows, args.companies),
+    }
+
+    print(f"\n{'':22}{'Dicts':>12}{'Compacto':>12}")
+    for clave, etiqueta in (('rss_max_mb', 'RSS máximo (MB)'), ('dataframe_mb', 'DataFrame (MB)'),
+                            ('segundos', 'Tiempo (s)')):
+        print(f"{etiqueta:22}{resultados['Dicts'][clave]:>12}{resultados['Compacto'][clave]:>12}")
+    reduccion = 1 - resultados['Compacto']['rss_max_mb'] / resultados['Dicts']['rss_max_mb']
+    print(f"\n💾 Reducción del RSS máximo: {reduccion:.0%}")
+
+
+if __name__ == "__main__":
+    main()
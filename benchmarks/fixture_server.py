@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Servidor local de páginas fixture con el marcado de Trustpilot
+Sirve páginas de categoría y de reseñas deterministas (o grabadas) para probar el scraper
+sin red, y un stub de /api/v1/chat/completions para probar el analizador sin OpenRouter
+"""
+
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from html import escape
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Recursos pesados (ruta -> (tipo MIME, tamaño en bytes)) que acompañan a las páginas con heavy_assets
+ASSETS = {
+    **{f"/assets/foto{i}.jpg": ("image/jpeg", 150_000) for i in range(12)},
+    "/assets/inter.woff2": ("font/woff2", 80_000),
+    "/assets/inter-bold.woff2": ("font/woff2", 80_000),
+    "/assets/promo.mp4": ("video/mp4", 1_000_000),
+    "/assets/app.js": ("application/javascript", 20_000),
+    "/gtm.js": ("application/javascript", 300_000),
+}
+THIRD_PARTY_HOST = "www.googletagmanager.com"
+
+# Stub del LLM: misma ruta que OpenRouter y una línea de análisis fija por reseña
+LLM_PATH = "/api/v1/chat/completions"
+LLM_RESPUESTA = "es|Positivo|0.8|joy|4|femenino|Atención al cliente|excelente,servicio,amable|Promotor|Turista de ocio|pareja"
+LLM_PACK_ID_RE = re.compile(r'^\[(R\d+)\]$', re.M)
+LLM_LINEA_INCOMPLETA = "unknown|unknown"
+
+NOMBRES = ["Ana", "Luis", "Marta", "John", "Claire", "Giulia", "Pedro", "Sofía"]
+FRASES = [
+    "El hotel estaba muy limpio y el personal fue muy amable.",
+    "La reserva fue sencilla pero el check-in tardó demasiado.",
+    "Excelente relación calidad-precio, volveremos en familia.",
+    "La habitación era ruidosa y el desayuno bastante pobre.",
+    "Great location, friendly staff and a lovely pool.",
+    "Nos cancelaron el vuelo sin avisar y nadie nos atendió.",
+]
+
+
+def _rng(*partes) -> random.Random:
+    """Generador aleatorio determinista a partir de la URL"""
+    semilla = hashlib.md5("|".join(map(str, partes)).encode()).hexdigest()
+    return random.Random(int(semilla[:8], 16))
+
+
+def company_domain(i: int) -> str:
+    return f"empresa{i:03d}.com"
+
+
+def render_boilerplate() -> str:
+    """Cabecera, pie y estilos para que el tamaño de página se parezca al real"""
+    enlaces = "".join(
+        f'<li class="styles_footerLink__{i}"><a href="/categories/cat{i}">Categoría {i}</a></li>'
+        for i in range(250)
+    )
+    estilos = "".join(f".styles_block__{i}{{margin:{i % 16}px;padding:{i % 8}px}}" for i in range(800))
+    return f"<style>{estilos}</style><footer><ul>{enlaces}</ul></footer>"
+
+
+def render_heavy_assets(port: int) -> str:
+    """Imágenes, fuentes, vídeo, un script propio y uno de terceros, como en una página real"""
+    fotos = "".join(f'<img src="/assets/foto{i}.jpg" width="320" height="200">' for i in range(12))
+    return f"""<style>
+@font-face {{ font-family: Inter; src: url(/assets/inter.woff2) format("woff2"); }}
+@font-face {{ font-family: Inter; font-weight: 700; src: url(/assets/inter-bold.woff2) format("woff2"); }}
+body {{ font-family: Inter, sans-serif; }} h1 {{ font-weight: 700; }}
+</style>
+<h1>Opiniones</h1>
+<div class="styles_gallery">{fotos}</div>
+<video src="/assets/promo.mp4" autoplay muted preload="auto"></video>
+<script src="/assets/app.js"></script>
+<script async src="http://{THIRD_PARTY_HOST}:{port}/gtm.js"></script>"""
+
+
+def render_next_data(domain: str, reseñas: list) -> str:
+    """Blob JSON de Next.js con los datos de las reseñas, como en Trustpilot"""
+    datos = {
+        "props": {
+            "pageProps": {
+                "businessUnit": {"identifyingName": domain, "displayName": domain},
+                "reviews": [
+                    {
+                        "id": reseña['id'],
+                        "text": reseña['text'],
+                        "rating": reseña['rating'],
+                        "language": "es",
+                        "dates": {"publishedDate": reseña['date'], "experiencedDate": reseña['date']},
+                        "consumer": {"displayName": reseña['consumer'], "numberOfReviews": 1},
+                        "likes": 0,
+                    }
+                    for reseña in reseñas
+                ],
+            }
+        },
+        "page": "/review/[businessUnit]",
+    }
+    contenido = json.dumps(datos, ensure_ascii=False).replace('</', '<\\/')
+    return f'<script id="__NEXT_DATA__" type="application/json">{contenido}</script>'
+
+
+def render_category_page(page: int, companies_per_page: int, total_companies: int) -> str:
+    """Página de categoría con enlaces /review/<dominio>"""
+    inicio = (page - 1) * companies_per_page
+    enlaces = "\n".join(
+        f'<div class="styles_card"><a href="/review/{company_domain(i)}">Empresa {i:03d}</a></div>'
+        for i in range(inicio, min(inicio + companies_per_page, total_companies))
+    )
+    return f"""<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>Viajes y vacaciones</title></head>
+<body>
+<nav aria-label="Breadcrumb"><a href="/">Inicio</a><a href="/categories">Categorías</a></nav>
+<main>
+{enlaces}
+</main>
+{render_boilerplate()}
+</body></html>"""
+
+
+def build_reviews(domain: str, page: int, reviews_per_page: int):
+    """Datos de las reseñas de una página (los mismos que se renderizan en HTML)"""
+    rng = _rng(domain, page)
+    reseñas = []
+    for i in range(reviews_per_page):
+        dia = 28 - (page * reviews_per_page + i) % 28
+        reseñas.append({
+            'id': hashlib.md5(f"{domain}{page}{i}".encode()).hexdigest()[:24],
+            'consumer': rng.choice(NOMBRES),
+            'date': f"2024-05-{dia:02d}T10:{i % 60:02d}:00.000Z",
+            'rating': rng.randint(1, 5),
+            'text': " ".join(rng.sample(FRASES, rng.randint(1, 3))),
+        })
+    return reseñas
+
+
+def render_review_card(reseña: dict) -> str:
+    return f"""<article class="paper_paper__1PY90 paper_outline__lwsUX styles_reviewCard__hcAvl" data-service-review-card-paper="true">
+  <aside><span data-consumer-name-typography="true">{escape(reseña['consumer'])}</span></aside>
+  <section>
+    <div data-service-review-rating="{reseña['rating']}"><img alt="Valorada con {reseña['rating']} de 5 estrellas"></div>
+    <time datetime="{reseña['date']}">{reseña['date'][:10]}</time>
+    <p data-service-review-text-typography="true">{escape(reseña['text'])}</p>
+  </section>
+</article>"""
+
+
+def render_company_page(domain: str, page: int, reviews_per_page: int, review_pages: int,
+                        client_rendered: bool = False, next_data: bool = True, new_reviews: int = 0,
+                        heavy_assets_port: int = 0) -> str:
+    """Página de reseñas de una empresa; sin tarjetas si page > review_pages
+
+    Con client_rendered=True las tarjetas se insertan con JavaScript, de modo que
+    solo aparecen en el DOM de un navegador y no en el HTML servido (tampoco el
+    blob __NEXT_DATA__). new_reviews añade reseñas recientes al principio de la
+    página 1, simulando las publicadas desde la última ejecución. Con
+    heavy_assets_port la página enlaza recursos pesados servidos en ese puerto.
+    """
+    reseñas = build_reviews(domain, page, reviews_per_page) if page <= review_pages else []
+    if page == 1 and new_reviews:
+        reseñas = build_reviews(domain, 0, new_reviews) + reseñas
+    tarjetas = "\n".join(render_review_card(reseña) for reseña in reseñas)
+    blob = render_next_data(domain, reseñas) if next_data else ""
+    if client_rendered and tarjetas:
+        contenido = json.dumps(tarjetas).replace('</', '<\\/')
+        tarjetas = f"<script>document.currentScript.insertAdjacentHTML('afterend', {contenido});</script>"
+        blob = ""
+    recursos = render_heavy_assets(heavy_assets_port) if heavy_assets_port else ""
+    return f"""<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>{escape(domain)} | Opiniones</title></head>
+<body>
+<nav aria-label="Breadcrumb"><a href="/">Inicio</a><a href="/categories/travel_vacation">Viajes y vacaciones</a><a href="/categories/hotel">Hotel</a></nav>
+{recursos}
+<main>
+{tarjetas}
+</main>
+{render_boilerplate()}
+{blob}
+</body></html>"""
+
+
+def render_llm_response(prompt: str, marcador: str = None) -> bytes:
+    """Respuesta de chat completion: una línea por reseña si el prompt trae varias [R<n>]
+
+    Las reseñas cuyo texto contiene marcador reciben una línea con campos de menos.
+    """
+    def linea(texto: str) -> str:
+        return LLM_LINEA_INCOMPLETA if marcador and marcador in texto else LLM_RESPUESTA
+
+    partes = LLM_PACK_ID_RE.split(prompt)
+    if len(partes) > 1:
+        contenido = "\n".join(f"{review_id}|{linea(texto)}" for review_id, texto in zip(partes[1::2], partes[2::2]))
+    else:
+        contenido = linea(prompt)
+    cuerpo = {
+        "choices": [{"message": {"role": "assistant", "content": contenido}}],
+        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(contenido) // 4,
+                  "total_tokens": (len(prompt) + len(contenido)) // 4},
+    }
+    return json.dumps(cuerpo, ensure_ascii=False).encode('utf-8')
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Responde a /categories/<categoria>, /review/<dominio> y al stub del LLM"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _registrar_latencia(self, tipo: str):
+        with self.server.lock:
+            self.server.latencias[tipo].append(time.perf_counter() - self._inicio)
+
+    def _send(self, status: int, cuerpo: bytes, tipo: str, cache: bool = False):
+        self.send_response(status)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        if cache:
+            self.send_header('Cache-Control', 'public, max-age=3600')
+        self.end_headers()
+        self.wfile.write(cuerpo)
+        with self.server.lock:
+            self.server.bytes_served += len(cuerpo)
+
+    def _send_throttled(self, retry_after: float):
+        self.send_response(429)
+        self.send_header('Retry-After', str(retry_after))
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        self._inicio = time.perf_counter()
+        config = self.server.config
+        cuerpo = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urlparse(self.path).path != LLM_PATH:
+            self.send_error(404)
+            return
+
+        if config['llm_latency']:
+            time.sleep(config['llm_latency'])
+
+        with self.server.lock:
+            self.server.llm_requests += 1
+            limitada = config['llm_throttle_every'] > 0 and self.server.llm_requests % config['llm_throttle_every'] == 0
+            fallida = not limitada and self.server.rng.random() < config['llm_error_rate']
+        if limitada:
+            self._send_throttled(config['retry_after'])
+            return
+        if fallida:
+            self._send(500, b'{"error": "stub"}', 'application/json')
+            return
+
+        try:
+            prompt = json.loads(cuerpo)['messages'][-1]['content']
+        except (ValueError, KeyError, IndexError, TypeError):
+            self._send(400, b'{"error": "bad request"}', 'application/json')
+            return
+        self._send(200, render_llm_response(prompt, config['llm_malformed_marker']), 'application/json')
+        self._registrar_latencia('llm')
+
+    def do_GET(self):
+        self._inicio = time.perf_counter()
+        config = self.server.config
+        url = urlparse(self.path)
+        page = int(parse_qs(url.query).get('page', ['1'])[0])
+
+        if config['latency']:
+            time.sleep(config['latency'])
+
+        # Limitación de tasa simulada: cada N peticiones se responde 429 con Retry-After
+        with self.server.lock:
+            self.server.requests_served += 1
+            limitada = config['throttle_every'] > 0 and self.server.requests_served % config['throttle_every'] == 0
+        if limitada:
+            self._send_throttled(config['retry_after'])
+            return
+
+        if url.path in ASSETS:
+            tipo, tamaño = ASSETS[url.path]
+            self._send(200, b"\0" * tamaño, tipo, cache=True)
+            return
+
+        if config['replay_dir']:
+            html = self._replay(url.path, page)
+            if html is None:
+                self.send_error(404)
+                return
+        elif url.path.startswith('/categories/'):
+            html = render_category_page(page, config['companies_per_page'], config['companies'])
+        elif url.path.startswith('/review/'):
+            domain = url.path.rsplit('/', 1)[-1]
+            # Las empresas múltiplo de client_rendered_every se renderizan con JavaScript
+            numero = int(''.join(filter(str.isdigit, domain)) or 0)
+            client_rendered = (
+                config['client_rendered_every'] > 0
+                and numero % config['client_rendered_every'] == 0
+            )
+            html = render_company_page(
+                domain, page, config['reviews_per_page'], config['review_pages'],
+                client_rendered, config['next_data'], config['new_reviews'],
+                self.server.server_address[1] if config['heavy_assets'] else 0
+            )
+        else:
+            self.send_error(404)
+            return
+
+        self._send(200, html.encode('utf-8'), 'text/html; charset=utf-8')
+        self._registrar_latencia('pagina')
+
+    def _replay(self, path: str, page: int):
+        """Página grabada con save_fixture_pages; las páginas siguientes a la 1 van vacías"""
+        if path.startswith('/categories/'):
+            nombre = f"category_{path.rsplit('/', 1)[-1]}.html"
+            if page > 1:
+                return render_category_page(page, 0, 0)
+        elif path.startswith('/review/'):
+            domain = path.rsplit('/', 1)[-1]
+            nombre = f"review_{domain}.html"
+            if page > 1:
+                return render_company_page(domain, page, 0, 0)
+        else:
+            return None
+
+        ruta = os.path.join(self.server.config['replay_dir'], nombre)
+        if not os.path.exists(ruta):
+            return None
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return f.read()
+
+
+def start_fixture_server(port: int = 0, companies: int = 20, companies_per_page: int = 20,
+                         reviews_per_page: int = 20, review_pages: int = 3, latency: float = 0.0,
+                         client_rendered_every: int = 0, next_data: bool = True, new_reviews: int = 0,
+                         throttle_every: int = 0, retry_after: float = 1, heavy_assets: bool = False,
+                         replay_dir: str = None, llm_latency: float = 0.0, llm_error_rate: float = 0.0,
+                         llm_throttle_every: int = 0, llm_malformed_marker: str = None, seed: int = 7):
+    """Arrancar el servidor en un hilo y devolver (servidor, base_url)
+
+    Con replay_dir se sirven las páginas grabadas en ese directorio en lugar de
+    generarlas. El stub del LLM responde en base_url + LLM_PATH; las reseñas que contienen
+    llm_malformed_marker reciben una línea incompleta.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), FixtureHandler)
+    server.daemon_threads = True
+    server.config = {
+        'companies': companies,
+        'companies_per_page': companies_per_page,
+        'reviews_per_page': reviews_per_page,
+        'review_pages': review_pages,
+        'latency': latency,
+        'client_rendered_every': client_rendered_every,
+        'next_data': next_data,
+        'new_reviews': new_reviews,
+        'throttle_every': throttle_every,
+        'retry_after': retry_after,
+        'heavy_assets': heavy_assets,
+        'replay_dir': replay_dir,
+        'llm_latency': llm_latency,
+        'llm_error_rate': llm_error_rate,
+        'llm_throttle_every': llm_throttle_every,
+        'llm_malformed_marker': llm_malformed_marker,
+    }
+    server.lock = threading.Lock()
+    server.rng = random.Random(seed)
+    server.requests_served = 0
+    server.llm_requests = 0
+    server.bytes_served = 0
+    server.latencias = {'pagina': [], 'llm': []}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def save_fixture_pages(directorio: str, companies: int = 5, reviews_per_page: int = 20) -> list:
+    """Guardar un corpus de páginas fixture (categoría + empresas) en disco"""
+    os.makedirs(directorio, exist_ok=True)
+    paginas = {"category_travel_vacation.html": render_category_page(1, 20, 20)}
+    for i in range(companies):
+        domain = company_domain(i)
+        paginas[f"review_{domain}.html"] = render_company_page(domain, 1, reviews_per_page, 1)
+
+    rutas = []
+    for nombre, html in paginas.items():
+        ruta = os.path.join(directorio, nombre)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(html)
+        rutas.append(ruta)
+    return rutas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local de páginas fixture de Trustpilot')
+    parser.add_argument('--port', type=int, default=8800, help='Puerto (default: 8800)')
+    parser.add_argument('--companies', type=int, default=20, help='Empresas en la categoría (default: 20)')
+    parser.add_argument('--companies_per_page', type=int, default=20, help='Empresas por página de categoría (default: 20)')
+    parser.add_argument('--reviews_per_page', type=int, default=20, help='Reseñas por página (default: 20)')
+    parser.add_argument('--review_pages', type=int, default=3, help='Páginas de reseñas por empresa (default: 3)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latencia añadida por respuesta en segundos')
+    parser.add_argument('--client_rendered_every', type=int, default=0, help='Cada N empresas, insertar las tarjetas con JavaScript (0 = nunca)')
+    parser.add_argument('--no_next_data', action='store_true', help='No incluir el blob JSON __NEXT_DATA__ en las páginas de reseñas')
+    parser.add_argument('--new_reviews', type=int, default=0, help='Reseñas nuevas al principio de la página 1 de cada empresa')
+    parser.add_argument('--throttle_every', type=int, default=0, help='Responder 429 cada N peticiones (0 = nunca)')
+    parser.add_argument('--retry_after', type=float, default=1, help='Valor de Retry-After en las respuestas 429 (default: 1)')
+    parser.add_argument('--heavy_assets', action='store_true', help='Añadir imágenes, fuentes, vídeo y un script de terceros a las páginas de reseñas')
+    parser.add_argument('--replay', metavar='DIR', help='Servir las páginas grabadas en DIR (p. ej. benchmarks/fixtures) en lugar de generarlas')
+    parser.add_argument('--llm_latency', type=float, default=0.0, help='Latencia del stub del LLM en segundos')
+    parser.add_argument('--llm_error_rate', type=float, default=0.0, help='Fracción de peticiones al LLM que responden 500')
+    parser.add_argument('--llm_throttle_every', type=int, default=0, help='Responder 429 cada N peticiones al LLM (0 = nunca)')
+    parser.add_argument('--llm_malformed_marker', help='Responder con campos de menos a las reseñas que contienen este texto')
+    parser.add_argument('--save', metavar='DIR', help='Guardar un corpus de páginas fixture en DIR y salir')
+    args = parser.parse_args()
+
+    if args.save:
+        rutas = save_fixture_pages(args.save, reviews_per_page=args.reviews_per_page)
+        print(f"💾 {len(rutas)} páginas guardadas en {args.save}")
+        return
+
+    server, base_url = start_fixture_server(
+        port=args.port,
+        companies=args.companies,
+        companies_per_page=args.companies_per_page,
+        reviews_per_page=args.reviews_per_page,
+        review_pages=args.review_pages,
+        latency=args.latency,
+        client_rendered_every=args.client_rendered_every,
+        next_data=not args.no_next_data,
+        new_reviews=args.new_reviews,
+        throttle_every=args.throttle_every,
+        retry_after=args.retry_after,
+        heavy_assets=args.heavy_assets,
+        replay_dir=args.replay,
+        llm_latency=args.llm_latency,
+        llm_error_rate=args.llm_error_rate,
+        llm_throttle_every=args.llm_throttle_every,
+        llm_malformed_marker=args.llm_malformed_marker
+    )
+    print(f"🧪 Servidor de fixtures en {base_url}")
+    print(f"   Categoría: {base_url}/categories/travel_vacation")
+    print(f"   Stub del LLM: {base_url}{LLM_PATH}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,15 @@ import os
 import sys
 import argparse
 import traceback
+import queue
+import shutil
+import sqlite3
+import tempfile
+import itertools
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from urllib.parse import urljoin
 
 # Configurar variables de entorno para modo headless
 os.environ["DISPLAY"] = ":99"
@@ -22,8 +30,11 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+import requests
+from requests.adapters import HTTPAdapter
 import time
 import re
 from tqdm import tqdm
@@ -32,8 +43,68 @@ import hashlib
 import random
 import glob
 
-def setup_driver_github_actions(headless=True):
-    """Configuración optimizada del driver para GitHub Actions"""
+from trustpilot_llm_client import parse_retry_after
+from trustpilot_metrics import METRICS
+from trustpilot_records import CompanyFields, ReviewBuffer, ReviewRecord, reviews_to_dataframe
+from trustpilot_storage import FORMATOS_SALIDA, es_parquet, guardar_parquet
+
+BASE_URL = os.getenv("TRUSTPILOT_BASE_URL", "https://es.trustpilot.com")
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
+FETCH_MODES = ['http', 'selenium']
+DEFAULT_SEEN_INDEX_PATH = "trustpilot_seen_reviews.sqlite"
+DEFAULT_MERGE_INPUTS = ["trustpilot_consolidated_*.csv", "results/*.csv"]
+DEFAULT_MERGE_CHUNKSIZE = 50000
+
+# Esperas por eventos: se devuelve la página en cuanto aparece el selector (con timeout)
+REVIEWS_READY_SELECTOR = "article[class*='paper_paper__'], script#__NEXT_DATA__"
+COMPANIES_READY_SELECTOR = "a[href*='/review/']"
+READY_TIMEOUT = 10
+NEXT_PAGE_READY_TIMEOUT = 4
+SCROLL_TIMEOUT = 1.5
+
+# Modo ligero de Chrome: recursos que no hacen falta para extraer reseñas
+LEAN_BLOCKED_URL_PATTERNS = [
+    # Imágenes, fuentes y multimedia
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3', '*.ogg', '*.m3u8',
+    # Analítica, publicidad y otros scripts de terceros
+    '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*facebook.net*', '*connect.facebook.com*', '*hotjar.com*', '*optimizely.com*', '*segment.io*',
+    '*segment.com*', '*cookielaw.org*', '*onetrust.com*', '*newrelic.com*', '*nr-data.net*',
+    '*sentry.io*', '*bing.com*', '*clarity.ms*', '*tiktok.com*', '*amplitude.com*',
+]
+LEAN_CHROME_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.managed_default_content_settings.media_stream': 2,
+    'profile.default_content_setting_values.notifications': 2,
+}
+DEFAULT_PROFILE_ROOT = os.path.join(tempfile.gettempdir(), "trustpilot_chrome_profiles")
+
+# Pausa de cortesía adaptativa (segundos)
+DEFAULT_MIN_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+MAX_429_RETRIES = 2
+
+# Marcadores para decidir si el HTML servido ya contiene los datos
+REVIEW_CARD_MARKER = re.compile(r'<article\s[^>]*class="[^"]*paper_paper__')
+COMPANY_LINK_MARKER = re.compile(r'href="[^"]*/review/[^/?"]+"')
+# Blob JSON que Next.js incrusta en cada página con los datos ya renderizados en el servidor
+NEXT_DATA_RE = re.compile(r'<script[^>]*\bid="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+NEXT_DATA_REVIEWS_MARKER = re.compile(r'"reviews"\s*:\s*\[\s*\{')
+
+# Parseo con lxml: cada página se parsea una sola vez y solo con los nodos necesarios
+HTML_PARSER = 'lxml'
+REVIEW_CARD_CLASS_RE = re.compile('paper_paper__')
+COMPANY_HREF_RE = re.compile('/review/[^/?]+$')
+BREADCRUMB_LABEL_RE = re.compile('breadcrumb', re.I)
+SUBCATEGORY_EXCLUDED = {'home', 'inicio', 'trustpilot'}
+COMPANY_LINKS_STRAINER = SoupStrainer('a', href=COMPANY_HREF_RE)
+BREADCRUMB_STRAINER = SoupStrainer('nav', attrs={'aria-label': BREADCRUMB_LABEL_RE})
+REVIEW_PAGE_STRAINER = SoupStrainer(['article', 'nav'])
+
+def build_chrome_options(headless=True, lean=False, profile_dir=None, extra_args=None):
+    """Opciones de Chrome; en modo ligero sin imágenes, carga 'eager' y perfil persistente"""
     chrome_options = Options()
     
     # Configuración para GitHub Actions
@@ -50,7 +121,7 @@ def setup_driver_github_actions(headless=True):
     chrome_options.add_argument('--window-size=1920,1080')
     
     # User agent realista
-    chrome_options.add_argument('user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36')
+    chrome_options.add_argument(f'user-agent={USER_AGENT}')
     
     # Otras opciones de rendimiento
     chrome_options.add_argument('--disable-extensions')
@@ -59,6 +130,50 @@ def setup_driver_github_actions(headless=True):
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option('useAutomationExtension', False)
     
+    if lean:
+        # Devolver el control en DOMContentLoaded, sin esperar a imágenes ni subrecursos
+        chrome_options.page_load_strategy = 'eager'
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_argument('--mute-audio')
+        chrome_options.add_argument('--autoplay-policy=user-gesture-required')
+        chrome_options.add_experimental_option('prefs', LEAN_CHROME_PREFS)
+    
+    # Perfil (y caché de disco) reutilizado entre páginas y reinicios del navegador
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        chrome_options.add_argument(f'--user-data-dir={profile_dir}')
+    
+    for argument in extra_args or []:
+        chrome_options.add_argument(argument)
+    
+    return chrome_options
+
+def enable_lean_network(driver):
+    """Bloquear imágenes, fuentes, multimedia y hosts de terceros vía CDP"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URL_PATTERNS})
+        driver.execute_cdp_cmd('Network.setCacheDisabled', {'cacheDisabled': False})
+    except Exception as e:
+        print(f"⚠️ No se pudo activar el bloqueo de recursos por CDP: {e}")
+
+def page_load_metrics(driver):
+    """Bytes transferidos, peticiones y latencias de la última navegación (Performance API)"""
+    return driver.execute_script("""
+        const nav = performance.getEntriesByType('navigation')[0] || {};
+        const resources = performance.getEntriesByType('resource');
+        return {
+            bytes: (nav.transferSize || 0) + resources.reduce((total, r) => total + (r.transferSize || 0), 0),
+            requests: 1 + resources.length,
+            dom_content_loaded_ms: nav.domContentLoadedEventEnd || 0,
+            load_ms: nav.loadEventEnd || 0
+        };
+    """)
+
+def setup_driver_github_actions(headless=True, lean=False, profile_dir=None, extra_args=None):
+    """Configuración optimizada del driver para GitHub Actions"""
+    chrome_options = build_chrome_options(headless, lean, profile_dir, extra_args)
+    
     try:
         # Usar Chrome del sistema en GitHub Actions
         chrome_options.binary_location = "/usr/bin/google-chrome"
@@ -66,7 +181,8 @@ def setup_driver_github_actions(headless=True):
         
         driver = webdriver.Chrome(service=service, options=chrome_options)
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        driver.implicitly_wait(10)
+        if lean:
+            enable_lean_network(driver)
         
         print("✅ Driver Chrome iniciado correctamente para GitHub Actions")
         return driver
@@ -77,16 +193,336 @@ def setup_driver_github_actions(headless=True):
         try:
             service = Service(ChromeDriverManager().install())
             driver = webdriver.Chrome(service=service, options=chrome_options)
+            if lean:
+                enable_lean_network(driver)
             print("✅ Driver Chrome iniciado con webdriver-manager")
             return driver
         except Exception as e2:
             print(f"❌ Error con fallback: {e2}")
             raise e
 
-def random_delay(min_seconds=1, max_seconds=3):
-    """Pausa aleatoria para parecer más humano"""
-    delay = random.uniform(min_seconds, max_seconds)
-    time.sleep(delay)
+def is_driver_alive(driver):
+    """Comprueba si la sesión de Chrome sigue respondiendo"""
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+def quit_driver(driver):
+    """Cierra el navegador ignorando errores (p. ej. si ya se cayó)"""
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+def wait_for_selector(driver, selector, timeout):
+    """Espera a que exista un elemento con el selector CSS; False si vence el timeout"""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+        )
+        return True
+    except TimeoutException:
+        return False
+
+class RunTimings:
+    """Tiempo acumulado por categoría (esperando, descargando, parseando) entre todos los workers"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}
+    
+    def reset(self):
+        with self.lock:
+            self.totals = {}
+    
+    def add(self, category, seconds):
+        with self.lock:
+            self.totals[category] = self.totals.get(category, 0.0) + seconds
+    
+    @contextmanager
+    def measure(self, category):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(category, time.perf_counter() - start)
+    
+    def report(self):
+        with self.lock:
+            totals = dict(self.totals)
+        total = sum(totals.values()) or 1.0
+        print("⏱️ Tiempo por categoría (suma de todos los workers):")
+        for category in ('esperando', 'descargando', 'parseando'):
+            seconds = totals.get(category, 0.0)
+            print(f"   • {category.capitalize()}: {seconds:.1f}s ({seconds / total * 100:.0f}%)")
+
+RUN_TIMINGS = RunTimings()
+
+class PolitenessDelay:
+    """Pausa de cortesía entre peticiones que se adapta a la latencia observada y a los 429
+    
+    Al estilo de AutoThrottle: la pausa tiende a latencia / target_concurrency, no baja
+    tras una respuesta de error y se duplica (o respeta Retry-After) con cada 429.
+    Sin start_delay empieza en min_delay.
+    """
+    
+    def __init__(self, min_delay=DEFAULT_MIN_DELAY, max_delay=DEFAULT_MAX_DELAY, target_concurrency=1.0,
+                 start_delay=None):
+        self.min_delay = min_delay
+        self.max_delay = max(max_delay, min_delay)
+        self.target_concurrency = max(target_concurrency, 1.0)
+        self.delay = start_delay if start_delay is not None else min_delay
+        self.throttled = 0
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        """Dormir la pausa actual con un ±25% de jitter"""
+        with self.lock:
+            delay = self.delay
+        delay *= random.uniform(0.75, 1.25)
+        if delay > 0:
+            with RUN_TIMINGS.measure('esperando'):
+                time.sleep(delay)
+        return delay
+    
+    def record(self, latency, status=200, retry_after=None):
+        """Ajustar la pausa con la latencia y el código de estado de una respuesta"""
+        with self.lock:
+            if status == 429:
+                self.throttled += 1
+                new_delay = max(self.delay * 2, retry_after or 0.0, 1.0)
+            else:
+                new_delay = (self.delay + latency / self.target_concurrency) / 2
+                if status >= 400:
+                    new_delay = max(new_delay, self.delay)
+            self.delay = min(self.max_delay, max(self.min_delay, new_delay))
+            return self.delay
+
+def has_review_cards(html):
+    return bool(REVIEW_CARD_MARKER.search(html))
+
+def has_review_data(html):
+    """Hay reseñas en el HTML servido: tarjetas o un blob __NEXT_DATA__ con reseñas"""
+    if has_review_cards(html):
+        return True
+    match = NEXT_DATA_RE.search(html)
+    return bool(match and NEXT_DATA_REVIEWS_MARKER.search(match.group(1)))
+
+def has_company_links(html):
+    return bool(COMPANY_LINK_MARKER.search(html))
+
+class HttpFetcher:
+    """Descarga páginas con una sesión HTTP compartida (keep-alive, gzip, pool de conexiones)"""
+    
+    def __init__(self, pool_size=10, timeout=20, politeness=None):
+        self.timeout = timeout
+        self.politeness = politeness
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
+        })
+        self.last_backend = 'http'
+    
+    def fetch(self, url, expect=None, ready=None, wait_timeout=0, scroll=False, browser=False):
+        for attempt in range(MAX_429_RETRIES + 1):
+            if self.politeness is not None:
+                self.politeness.wait()
+            start = time.perf_counter()
+            with RUN_TIMINGS.measure('descargando'), METRICS.span('scraper_fetch', backend='http', url=url):
+                response = self.session.get(url, timeout=self.timeout)
+                text = response.text
+            METRICS.incr('scraper_pages', backend='http', status=response.status_code)
+            if self.politeness is not None:
+                delay = self.politeness.record(
+                    time.perf_counter() - start,
+                    response.status_code,
+                    parse_retry_after(response.headers.get('Retry-After'))
+                )
+                if response.status_code == 429 and attempt < MAX_429_RETRIES:
+                    METRICS.incr('scraper_retries', reason='429')
+                    print(f"   🐢 429 en {url}, pausa de cortesía ahora {delay:.1f}s")
+                    continue
+            break
+        response.raise_for_status()
+        return text
+    
+    def healthy(self):
+        return True
+    
+    def restart(self):
+        pass
+    
+    def close(self):
+        self.session.close()
+
+class SeleniumFetcher:
+    """Descarga páginas renderizadas con Chrome; el navegador se crea al primer uso"""
+    
+    def __init__(self, driver=None, headless=True, politeness=None, lean=False, profile_dir=None):
+        self._driver = driver
+        self.headless = headless
+        self.politeness = politeness
+        self.lean = lean
+        self.profile_dir = profile_dir
+        self.last_backend = 'selenium'
+    
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._driver = setup_driver_github_actions(
+                headless=self.headless, lean=self.lean, profile_dir=self.profile_dir
+            )
+        return self._driver
+    
+    def fetch(self, url, expect=None, ready=None, wait_timeout=0, scroll=False, browser=True):
+        driver = self.driver
+        if self.politeness is not None:
+            self.politeness.wait()
+        start = time.perf_counter()
+        with RUN_TIMINGS.measure('descargando'), METRICS.span('scraper_fetch', backend='selenium', url=url):
+            driver.get(url)
+        METRICS.incr('scraper_pages', backend='selenium')
+        if self.politeness is not None:
+            self.politeness.record(time.perf_counter() - start)
+        with RUN_TIMINGS.measure('esperando'):
+            if ready and wait_timeout:
+                wait_for_selector(driver, ready, wait_timeout)
+            if scroll:
+                scroll_to_load_reviews(driver, max_scrolls=2)
+        return driver.page_source
+    
+    def healthy(self):
+        return self._driver is None or is_driver_alive(self._driver)
+    
+    def restart(self):
+        self.close()
+    
+    def close(self):
+        if self._driver is not None:
+            quit_driver(self._driver)
+            self._driver = None
+
+class FallbackFetcher:
+    """HTTP por defecto; usa Chrome solo si el HTML no contiene los elementos esperados"""
+    
+    def __init__(self, http_fetcher, selenium_fetcher):
+        self.http = http_fetcher
+        self.selenium = selenium_fetcher
+        self.last_backend = 'http'
+    
+    def fetch(self, url, expect=None, ready=None, wait_timeout=0, scroll=False, browser=False):
+        if not browser:
+            try:
+                html = self.http.fetch(url)
+                if expect is None or expect(html):
+                    self.last_backend = 'http'
+                    return html
+                print(f"   ↪️ Página sin datos vía HTTP, usando Chrome: {url}")
+            except requests.RequestException as e:
+                print(f"   ↪️ Error HTTP ({e}), usando Chrome: {url}")
+        
+        self.last_backend = 'selenium'
+        return self.selenium.fetch(url, ready=ready, wait_timeout=wait_timeout, scroll=scroll)
+    
+    def healthy(self):
+        return self.selenium.healthy()
+    
+    def restart(self):
+        self.selenium.restart()
+    
+    def close(self):
+        # La sesión HTTP es compartida entre workers y la cierra quien la creó
+        self.selenium.close()
+
+def as_fetcher(driver_or_fetcher):
+    """Acepta un fetcher o un driver de Selenium (firma anterior de las funciones)"""
+    if hasattr(driver_or_fetcher, 'fetch'):
+        return driver_or_fetcher
+    return SeleniumFetcher(driver=driver_or_fetcher)
+
+class SeenReviewIndex:
+    """Índice persistente (SQLite) de review_id ya extraídos en ejecuciones anteriores"""
+    
+    def __init__(self, path=DEFAULT_SEEN_INDEX_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            "review_id TEXT PRIMARY KEY, domain TEXT, first_seen TEXT NOT NULL)"
+        )
+        self.conn.commit()
+    
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+    
+    def known(self, review_ids):
+        """Subconjunto de review_ids que ya están en el índice"""
+        review_ids = list(review_ids)
+        found = set()
+        with self.lock:
+            # Consultas por bloques para no superar el límite de parámetros de SQLite
+            for start in range(0, len(review_ids), 500):
+                chunk = review_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(
+                    row[0] for row in self.conn.execute(
+                        f"SELECT review_id FROM seen WHERE review_id IN ({placeholders})", chunk
+                    )
+                )
+        return found
+    
+    def add(self, reviews):
+        """Registrar reseñas (dicts con review_id y domain) como vistas"""
+        now = datetime.now().isoformat()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen (review_id, domain, first_seen) VALUES (?, ?, ?)",
+                ((str(review['review_id']), review.get('domain', ''), now) for review in reviews)
+            )
+            self.conn.commit()
+    
+    def add_new(self, review_ids):
+        """Registrar review_ids y devolver el subconjunto que no estaba ya en el índice"""
+        review_ids = list(dict.fromkeys(review_ids))
+        new_ids = set(review_ids) - self.known(review_ids)
+        now = datetime.now().isoformat()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen (review_id, first_seen) VALUES (?, ?)",
+                ((review_id, now) for review_id in new_ids)
+            )
+            self.conn.commit()
+        return new_ids
+    
+    def import_csv(self, paths, chunksize=50000):
+        """Poblar el índice con los review_id de CSV consolidados de ejecuciones previas"""
+        total = 0
+        for path in paths:
+            try:
+                for chunk in pd.read_csv(path, usecols=['review_id', 'domain'], dtype=str,
+                                         encoding='utf-8-sig', chunksize=chunksize):
+                    chunk = chunk.dropna(subset=['review_id']).fillna('')
+                    self.add(chunk.to_dict('records'))
+                    total += len(chunk)
+            except (ValueError, OSError, pd.errors.ParserError) as e:
+                print(f"⚠️ No se pudo importar {path} al índice de vistas: {e}")
+        return total
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
 
 def generate_review_id(company_name, review_date, customer_name, review_text):
     """Genera un ID único para cada reseña"""
@@ -115,22 +551,116 @@ def parse_date(date_str):
 
 def scroll_to_load_reviews(driver, max_scrolls=5):
     """Hace scroll para cargar más reseñas (reducido para GitHub Actions)"""
+    with METRICS.span('scraper_scroll'):
+        _scroll_to_load_reviews(driver, max_scrolls)
+
+def _scroll_to_load_reviews(driver, max_scrolls):
     last_height = driver.execute_script("return document.body.scrollHeight")
     scrolls = 0
     
     while scrolls < max_scrolls:
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(1)  # Reducido para GitHub Actions
         
-        new_height = driver.execute_script("return document.body.scrollHeight")
-        if new_height == last_height:
+        # Seguir en cuanto crece la página; si no crece antes del timeout, no hay más que cargar
+        try:
+            WebDriverWait(driver, SCROLL_TIMEOUT, poll_frequency=0.1).until(
+                lambda d: d.execute_script("return document.body.scrollHeight") != last_height
+            )
+        except TimeoutException:
             break
             
-        last_height = new_height
+        last_height = driver.execute_script("return document.body.scrollHeight")
         scrolls += 1
 
-def get_companies_from_category(driver, category_url, max_pages=5):
+def parse_html(html, strainer=None):
+    """Parsea el HTML con lxml conservando solo los nodos que acepta el strainer"""
+    return BeautifulSoup(html, HTML_PARSER, parse_only=strainer)
+
+def extract_subcategories(soup):
+    """Subcategorías a partir del breadcrumb (sin Inicio/Trustpilot)"""
+    breadcrumb_elem = soup.find('nav', attrs={'aria-label': BREADCRUMB_LABEL_RE})
+    if not breadcrumb_elem:
+        return ""
+    
+    subcategory_list = []
+    for link in breadcrumb_elem.find_all('a'):
+        text = link.text.strip()
+        if text and text.lower() not in SUBCATEGORY_EXCLUDED:
+            subcategory_list.append(text)
+    return " > ".join(subcategory_list)
+
+def extract_reviews_from_next_data(html):
+    """Extrae las reseñas del blob JSON __NEXT_DATA__ (una sola pasada por página)
+
+    Devuelve una lista de dicts con customer_name, review_date, customer_score y
+    review_text, o None si la página no trae el blob o no tiene el formato esperado.
+    """
+    match = NEXT_DATA_RE.search(html)
+    if not match:
+        return None
+    
+    try:
+        data = json.loads(match.group(1))
+        raw_reviews = data['props']['pageProps']['reviews']
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not isinstance(raw_reviews, list):
+        return None
+    
+    extracted = []
+    for raw in raw_reviews:
+        try:
+            consumer = raw.get('consumer') or {}
+            dates = raw.get('dates') or {}
+            extracted.append({
+                'customer_name': (consumer.get('displayName') or "Anónimo").strip(),
+                'review_date': dates.get('publishedDate') or "",
+                'customer_score': int(raw.get('rating') or 0),
+                'review_text': (raw.get('text') or "").strip()
+            })
+        except (AttributeError, TypeError, ValueError) as e:
+            print(f"   ❌ Error procesando reseña: {e}")
+            continue
+    return extracted
+
+def extract_reviews_from_cards(soup):
+    """Extrae las reseñas recorriendo las tarjetas del DOM (fallback sin __NEXT_DATA__)"""
+    extracted = []
+    for card in soup.find_all('article', class_=REVIEW_CARD_CLASS_RE):
+        try:
+            # Nombre del cliente
+            customer_elem = card.find('span', attrs={'data-consumer-name-typography': 'true'})
+            customer_name = customer_elem.text.strip() if customer_elem else "Anónimo"
+            
+            # Fecha de la reseña
+            date_elem = card.find('time')
+            review_date = date_elem.get('datetime', '') if date_elem else ""
+            
+            # Puntuación
+            rating_elem = card.find('div', attrs={'data-service-review-rating': True})
+            if rating_elem:
+                customer_score = int(rating_elem.get('data-service-review-rating', '0'))
+            else:
+                customer_score = 0
+            
+            # Texto de la reseña
+            review_elem = card.find('p', attrs={'data-service-review-text-typography': 'true'})
+            review_text = review_elem.text.strip() if review_elem else ""
+            
+            extracted.append({
+                'customer_name': customer_name,
+                'review_date': review_date,
+                'customer_score': customer_score,
+                'review_text': review_text
+            })
+        except Exception as e:
+            print(f"   ❌ Error procesando reseña: {e}")
+            continue
+    return extracted
+
+def get_companies_from_category(fetcher, category_url, max_pages=5):
     """Extrae información de empresas de una categoría (optimizado para CI/CD)"""
+    fetcher = as_fetcher(fetcher)
     companies = []
     
     for page in range(1, max_pages + 1):
@@ -138,13 +668,14 @@ def get_companies_from_category(driver, category_url, max_pages=5):
         print(f"🔍 Página {page}: {url}")
         
         try:
-            driver.get(url)
-            time.sleep(3)  # Reducido para GitHub Actions
+            html = fetcher.fetch(
+                url, expect=has_company_links, ready=COMPANIES_READY_SELECTOR, wait_timeout=READY_TIMEOUT
+            )
             
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            
-            # Buscar enlaces de empresas
-            company_links = soup.find_all('a', href=re.compile('/review/[^/?]+$'))
+            # Solo se construyen los enlaces de empresas
+            with RUN_TIMINGS.measure('parseando'), METRICS.span('scraper_parse', page_type='category'):
+                soup = parse_html(html, COMPANY_LINKS_STRAINER)
+                company_links = soup.find_all('a')
             
             if not company_links:
                 print(f"⚠️ No se encontraron empresas en la página {page}")
@@ -156,7 +687,7 @@ def get_companies_from_category(driver, category_url, max_pages=5):
                 try:
                     company_url = link.get('href', '')
                     if not company_url.startswith('http'):
-                        company_url = f"https://es.trustpilot.com{company_url}"
+                        company_url = urljoin(category_url, company_url)
                     
                     domain = company_url.split('/')[-1].split('?')[0]
                     company_name = link.get_text(strip=True) or domain
@@ -189,163 +720,406 @@ def get_companies_from_category(driver, category_url, max_pages=5):
     print(f"✅ Total empresas únicas: {len(unique_companies)}")
     return unique_companies
 
-def get_reviews_from_company(driver, company_info, max_review_pages=3):
-    """Extrae reseñas de una empresa (optimizado para GitHub Actions)"""
+def get_reviews_from_company(fetcher, company_info, max_review_pages=3, seen_index=None):
+    """Extrae reseñas de una empresa (optimizado para GitHub Actions)
+    
+    Con seen_index (modo "desde la última ejecución") se ordena por más recientes,
+    solo se devuelven reseñas nuevas y se deja de paginar en cuanto una página
+    está formada íntegramente por reseñas ya vistas.
+    """
+    with METRICS.span('scraper_company', domain=company_info['domain']):
+        reviews = _get_reviews_from_company(fetcher, company_info, max_review_pages, seen_index)
+    METRICS.incr('scraper_companies')
+    METRICS.incr('scraper_reviews', len(reviews))
+    return reviews
+
+def _get_reviews_from_company(fetcher, company_info, max_review_pages, seen_index):
+    fetcher = as_fetcher(fetcher)
     reviews = []
     subcategories = ""
+    # Campos de empresa compartidos por todas sus reseñas (las subcategorías llegan en la página 1)
+    company = CompanyFields(company_info, subcategories)
+    use_browser = False
     
     for page in range(1, max_review_pages + 1):
-        if page == 1:
-            review_url = company_info['company_url']
-        else:
-            review_url = f"{company_info['company_url']}?page={page}"
+        params = []
+        if page > 1:
+            params.append(f"page={page}")
+        if seen_index is not None:
+            params.append("sort=recency")
+        review_url = company_info['company_url']
+        if params:
+            review_url = f"{review_url}?{'&'.join(params)}"
         
         print(f"   📄 Página {page}: {review_url}")
         
         try:
-            driver.get(review_url)
-            time.sleep(2)  # Reducido para GitHub Actions
-            
-            # Extraer subcategorías solo en la primera página
+            # Solo la primera página decide si hace falta Chrome: en las siguientes
+            # una página sin tarjetas significa que no hay más reseñas
+            html = fetcher.fetch(
+                review_url,
+                expect=has_review_data if page == 1 else None,
+                ready=REVIEWS_READY_SELECTOR,
+                wait_timeout=READY_TIMEOUT if page == 1 else NEXT_PAGE_READY_TIMEOUT,
+                scroll=True,
+                browser=use_browser
+            )
             if page == 1:
-                try:
-                    soup_page = BeautifulSoup(driver.page_source, 'html.parser')
-                    breadcrumb_elem = soup_page.find('nav', attrs={'aria-label': re.compile('breadcrumb', re.I)})
-                    
-                    if breadcrumb_elem:
-                        breadcrumb_links = breadcrumb_elem.find_all('a')
-                        subcategory_list = []
-                        
-                        for link in breadcrumb_links:
-                            text = link.text.strip()
-                            if text and text.lower() not in ['home', 'inicio', 'trustpilot']:
-                                subcategory_list.append(text)
-                        
-                        subcategories = " > ".join(subcategory_list)
-                        print(f"   📁 Subcategorías: {subcategories}")
-                except Exception as e:
-                    print(f"   ⚠️ Error extrayendo subcategorías: {e}")
+                use_browser = fetcher.last_backend == 'selenium'
             
-            # Scroll limitado para GitHub Actions
-            scroll_to_load_reviews(driver, max_scrolls=2)
+            # Primero el JSON incrustado; el HTML se parsea como mucho una vez, solo
+            # para el breadcrumb (página 1) y las tarjetas (si no hay JSON)
+            with RUN_TIMINGS.measure('parseando'), METRICS.span('scraper_parse', page_type='reviews'):
+                page_data = extract_reviews_from_next_data(html)
+                soup = None
+                if page_data is None:
+                    soup = parse_html(html, REVIEW_PAGE_STRAINER)
+                    page_data = extract_reviews_from_cards(soup)
             
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            review_cards = soup.find_all('article', class_=re.compile('paper_paper__'))
-            
-            if not review_cards:
+                # Extraer subcategorías solo en la primera página
+                if page == 1:
+                    try:
+                        subcategories = extract_subcategories(soup or parse_html(html, BREADCRUMB_STRAINER))
+                        company = CompanyFields(company_info, subcategories)
+                        if subcategories:
+                            print(f"   📁 Subcategorías: {subcategories}")
+                    except Exception as e:
+                        print(f"   ⚠️ Error extrayendo subcategorías: {e}")
+                
+            if not page_data:
                 print(f"   ⚠️ No se encontraron reseñas en página {page}")
+                METRICS.incr('scraper_empty_pages')
                 break
             
+            page_ids = [
+                generate_review_id(
+                    company_info['company_name'], 
+                    str(data['review_date']), 
+                    data['customer_name'], 
+                    data['review_text']
+                )
+                for data in page_data
+            ]
+            known_ids = seen_index.known(page_ids) if seen_index is not None else set()
+            
             page_reviews = 0
-            for card in review_cards:
-                try:
-                    # Nombre del cliente
-                    customer_elem = card.find('span', attrs={'data-consumer-name-typography': 'true'})
-                    customer_name = customer_elem.text.strip() if customer_elem else "Anónimo"
-                    
-                    # Fecha de la reseña
-                    date_elem = card.find('time')
-                    review_date = date_elem.get('datetime', '') if date_elem else ""
-                    
-                    # Puntuación
-                    rating_elem = card.find('div', attrs={'data-service-review-rating': True})
-                    if rating_elem:
-                        customer_score = int(rating_elem.get('data-service-review-rating', '0'))
-                    else:
-                        customer_score = 0
-                    
-                    # Texto de la reseña
-                    review_elem = card.find('p', attrs={'data-service-review-text-typography': 'true'})
-                    review_text = review_elem.text.strip() if review_elem else ""
-                    
-                    if review_text:  # Solo guardar si hay texto
-                        review_id = generate_review_id(
-                            company_info['company_name'], 
-                            str(review_date), 
-                            customer_name, 
-                            review_text
-                        )
-                        
-                        reviews.append({
-                            'review_id': review_id,
-                            'domain': company_info['domain'],
-                            'company_name': company_info['company_name'],
-                            'categories': company_info['categories'],
-                            'subcategories': subcategories,
-                            'company_rating': company_info['rating'],
-                            'review_date': review_date,
-                            'customer_name': customer_name,
-                            'customer_score': customer_score,
-                            'review_text': review_text,
-                            'language': '',
-                            'sentiment': '',
-                            'emotion': '',
-                            'customer_gender': '',
-                            'main_topic': '',
-                            'keywords': '',
-                            'customer_type': '',
-                            'tourist_type': '',
-                            'group_type': '',
-                            'analyzed': False
-                        })
-                        page_reviews += 1
-                    
-                except Exception as e:
-                    print(f"   ❌ Error procesando reseña: {e}")
+            for data, review_id in zip(page_data, page_ids):
+                if not data['review_text']:  # Solo guardar si hay texto
+                    continue
+                if review_id in known_ids:
                     continue
+                
+                reviews.append(ReviewRecord(
+                    company,
+                    review_id,
+                    data['review_date'],
+                    data['customer_name'],
+                    data['customer_score'],
+                    data['review_text']
+                ))
+                page_reviews += 1
             
             print(f"   ✅ Página {page}: {page_reviews} reseñas extraídas")
             
+            if known_ids and len(known_ids) == len(set(page_ids)):
+                print(f"   ⏹️ Página {page}: todas las reseñas ya se habían extraído, fin de la paginación")
+                break
+            
             if page_reviews == 0:
                 break
                 
         except Exception as e:
             print(f"   ❌ Error en página {page}: {e}")
+            METRICS.incr('scraper_errors', stage='company_page')
             break
     
     print(f"📊 Total: {len(reviews)} reseñas de {company_info['company_name']}")
     return reviews
 
-def run_scraper_github_actions(max_companies=100, max_review_pages=10, max_company_pages=10):
+def _pool_worker(worker_id, jobs, results, max_review_pages, fetcher, seen_index=None, stop=None):
+    """Worker del pool: toma empresas de la cola con su propio fetcher y reinicia Chrome si se cae
+    
+    Con stop activado no empieza más empresas y descarta el resultado en curso si la
+    cola de resultados sigue llena; siempre cierra su fetcher y publica None al salir.
+    """
+    stop = stop or threading.Event()
+    try:
+        while not stop.is_set():
+            try:
+                index, company = jobs.get_nowait()
+            except queue.Empty:
+                break
+            
+            reviews, error = [], None
+            
+            # Un intento más si el navegador se cae durante la empresa
+            for intento in range(2):
+                try:
+                    reviews = get_reviews_from_company(
+                        fetcher, company, max_review_pages=max_review_pages, seen_index=seen_index
+                    )
+                    error = None
+                except Exception as e:
+                    reviews, error = [], str(e)
+                
+                if fetcher.healthy():
+                    break
+                
+                print(f"   ♻️ [worker {worker_id}] Chrome caído en {company['company_name']}, reiniciando navegador...")
+                fetcher.restart()
+                error = error or "Chrome se cayó durante la extracción"
+            
+            # La pausa entre peticiones la aplica el fetcher (PolitenessDelay)
+            while not stop.is_set():
+                try:
+                    results.put((index, company, reviews, error), timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+    finally:
+        fetcher.close()
+        results.put(None)
+
+def scrape_companies_with_pool(companies, max_review_pages=10, workers=1, fetcher_factory=None, fetcher=None,
+                               seen_index=None, max_pending=0):
+    """Extrae reseñas de varias empresas con un pool de N workers, cada uno con su fetcher
+    
+    Genera (índice, empresa, reseñas, error) a medida que terminan las empresas.
+    El primer worker reutiliza `fetcher` si se proporciona. Con max_pending > 0 los
+    workers se bloquean cuando hay ese número de empresas sin consumir (backpressure).
+    Si el consumidor deja de iterar (close() o un error), los workers se detienen tras
+    su empresa en curso y el generador espera a que todos cierren su fetcher.
+    """
+    fetcher_factory = fetcher_factory or SeleniumFetcher
+    
+    jobs = queue.Queue()
+    for index, company in enumerate(companies):
+        jobs.put((index, company))
+    
+    results = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    workers = max(1, min(workers, len(companies)))
+    threads = []
+    for worker_id in range(workers):
+        worker_fetcher = fetcher if worker_id == 0 and fetcher is not None else fetcher_factory()
+        thread = threading.Thread(
+            target=_pool_worker,
+            args=(worker_id, jobs, results, max_review_pages, worker_fetcher, seen_index, stop),
+            daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+    
+    finished = 0
+    try:
+        while finished < workers:
+            item = results.get()
+            if item is None:
+                finished += 1
+                continue
+            yield item
+    finally:
+        # Detener el pool y vaciar la cola hasta el None de cada worker (ya cerró su fetcher)
+        stop.set()
+        while finished < workers:
+            if results.get() is None:
+                finished += 1
+
+def open_seen_index(path=DEFAULT_SEEN_INDEX_PATH):
+    """Abrir el índice de reseñas vistas, poblándolo con los consolidados previos la primera vez"""
+    seen_index = SeenReviewIndex(path)
+    if len(seen_index) == 0:
+        previous = sorted(glob.glob("trustpilot_consolidated_*.csv"))
+        if previous:
+            imported = seen_index.import_csv(previous)
+            print(f"🗂️ Índice de reseñas vistas creado con {imported:,} reseñas de {len(previous)} consolidados previos")
+    print(f"🗂️ Índice de reseñas vistas: {len(seen_index):,} reseñas en {path}")
+    return seen_index
+
+def dedup_reviews(reviews, seen_in_run, seen_index=None):
+    """Descarta reseñas repetidas en esta ejecución o guardadas en ejecuciones anteriores
+    
+    Se consulta al insertar cada empresa; seen_in_run se actualiza con las que pasan.
+    """
+    known = seen_index.known(review['review_id'] for review in reviews) if seen_index is not None else set()
+    unique = []
+    for review in reviews:
+        review_id = review['review_id']
+        if review_id in known or review_id in seen_in_run:
+            continue
+        seen_in_run.add(review_id)
+        unique.append(review)
+    return unique
+
+def expand_input_paths(patterns):
+    """Expandir patrones glob conservando el orden indicado y sin repetir archivos"""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(path for path in matches if path not in paths)
+    return paths
+
+def merge_review_files(patterns=None, output=None, chunksize=DEFAULT_MERGE_CHUNKSIZE):
+    """Fusiona CSV de reseñas en un único dataset sin duplicados en una sola pasada por bloques
+    
+    Gana la primera aparición de cada review_id (en el orden de los archivos). Los
+    review_id vistos se guardan en un índice SQLite temporal, así que la memoria no
+    depende del número de reseñas. Con salida .parquet se escribe un dataset particionado.
+    """
+    paths = expand_input_paths(patterns or DEFAULT_MERGE_INPUTS)
+    if output is None:
+        output = f"trustpilot_merged_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    paths = [path for path in paths if os.path.abspath(path) != os.path.abspath(output)]
+    if not paths:
+        print("⚠️ No hay archivos que fusionar")
+        return None
+    
+    # Unión de columnas leyendo solo las cabeceras
+    columns = []
+    for path in paths:
+        for column in pd.read_csv(path, nrows=0, encoding='utf-8-sig').columns:
+            if column not in columns:
+                columns.append(column)
+    if 'review_id' not in columns:
+        raise ValueError("Los archivos no tienen columna review_id")
+    
+    write_parquet = es_parquet(output)
+    index_dir = tempfile.mkdtemp(prefix="trustpilot_merge_")
+    seen_index = SeenReviewIndex(os.path.join(index_dir, "seen.sqlite"))
+    rows_read = rows_written = 0
+    written = False
+    
+    print(f"🔀 Fusionando {len(paths)} archivos en {output}")
+    try:
+        for path in paths:
+            for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8-sig',
+                                     chunksize=chunksize):
+                rows_read += len(chunk)
+                chunk = chunk[chunk['review_id'] != ''].drop_duplicates('review_id')
+                new_ids = seen_index.add_new(chunk['review_id'])
+                chunk = chunk[chunk['review_id'].isin(new_ids)].reindex(columns=columns, fill_value='')
+                if chunk.empty:
+                    continue
+                
+                if write_parquet:
+                    guardar_parquet(chunk, output, basename=f"merge-{rows_written:012d}", sobrescribir=False)
+                else:
+                    chunk.to_csv(
+                        output,
+                        mode='a' if written else 'w',
+                        header=not written,
+                        index=False,
+                        encoding='utf-8' if written else 'utf-8-sig'
+                    )
+                written = True
+                rows_written += len(chunk)
+    finally:
+        seen_index.close()
+        shutil.rmtree(index_dir, ignore_errors=True)
+    
+    print(f"✅ Fusión completada: {rows_read:,} filas leídas, {rows_written:,} reseñas únicas, "
+          f"{rows_read - rows_written:,} duplicadas o sin review_id descartadas")
+    return output if written else None
+
+def create_fetcher_factory(workers=1, fetch_mode='http', min_delay=DEFAULT_MIN_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                           lean_browser=False, profile_root=DEFAULT_PROFILE_ROOT):
+    """Fetchers del pool: HTTP compartido y un Chrome por worker solo si hace falta
+    
+    Devuelve (make_fetcher, http_fetcher, politeness); todos comparten la misma
+    pausa de cortesía adaptativa. http_fetcher lo cierra quien lo crea.
+    """
+    politeness = PolitenessDelay(min_delay=min_delay, max_delay=max_delay)
+    http_fetcher = HttpFetcher(pool_size=max(workers, 1) * 2, politeness=politeness) if fetch_mode == 'http' else None
+    
+    # En modo ligero cada worker reutiliza su propio perfil (Chrome bloquea un perfil por proceso)
+    worker_numbers = itertools.count()
+    
+    def make_fetcher():
+        profile_dir = os.path.join(profile_root, f"worker-{next(worker_numbers)}") if lean_browser else None
+        selenium_fetcher = SeleniumFetcher(
+            headless=True, politeness=politeness, lean=lean_browser, profile_dir=profile_dir
+        )
+        if http_fetcher is None:
+            return selenium_fetcher
+        return FallbackFetcher(http_fetcher, selenium_fetcher)
+    
+    return make_fetcher, http_fetcher, politeness
+
+def run_scraper_github_actions(max_companies=100, max_review_pages=10, max_company_pages=10, output_format='csv',
+                               workers=1, base_url=BASE_URL, fetch_mode='http', since_last_run=False,
+                               seen_index_path=DEFAULT_SEEN_INDEX_PATH, min_delay=DEFAULT_MIN_DELAY,
+                               max_delay=DEFAULT_MAX_DELAY, lean_browser=False, profile_root=DEFAULT_PROFILE_ROOT,
+                               dedup=False, metrics_file=None, trace_file=None):
     """Función principal optimizada para GitHub Actions"""
     
     print("🤖 Iniciando TrustPilot Scraper para GitHub Actions")
-    print(f"📊 Parámetros: {max_companies} empresas, {max_review_pages} páginas/empresa, {max_company_pages} páginas categoría")
+    print(f"📊 Parámetros: {max_companies} empresas, {max_review_pages} páginas/empresa, {max_company_pages} páginas categoría, {workers} navegadores")
+    
+    # Modo incremental: índice de reseñas ya vistas
+    # Con dedup también se descartan al insertar las reseñas guardadas en ejecuciones anteriores
+    seen_index = open_seen_index(seen_index_path) if since_last_run or dedup else None
+    if since_last_run:
+        print("🔁 Modo desde la última ejecución: se para al llegar a reseñas ya vistas")
+    seen_in_run = set()
     
     # Crear directorio de resultados
     os.makedirs("results", exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    escribir_csv = output_format in ('csv', 'both')
+    escribir_parquet = output_format in ('parquet', 'both')
     
-    # Inicializar driver
-    driver = setup_driver_github_actions(headless=True)
+    # Inicializar fetchers
+    RUN_TIMINGS.reset()
+    if metrics_file or trace_file:
+        METRICS.configure(trace_path=trace_file)
+    make_fetcher, http_fetcher, politeness = create_fetcher_factory(
+        workers, fetch_mode, min_delay, max_delay, lean_browser, profile_root
+    )
+    fetcher = make_fetcher()
     
     try:
         # URL de la categoría
-        category_url = "https://es.trustpilot.com/categories/travel_vacation"
+        category_url = f"{base_url}/categories/travel_vacation"
         
         # Obtener empresas
         print("\n🔍 Obteniendo lista de empresas...")
-        companies = get_companies_from_category(driver, category_url, max_pages=max_company_pages)
+        companies = get_companies_from_category(fetcher, category_url, max_pages=max_company_pages)
         
         # Limitar número de empresas
         companies = companies[:max_companies]
         print(f"\n📋 Procesando {len(companies)} empresas")
         
-        # Procesar empresas
-        all_reviews = []
+        # Procesar empresas con el pool de navegadores; las reseñas se acumulan por columnas
+        # y se ordenan por el índice de su empresa al crear el consolidado
+        all_reviews = ReviewBuffer()
         processed_companies = []
         
-        for i, company in enumerate(tqdm(companies, desc="Empresas")):
-            print(f"\n[{i+1}/{len(companies)}] 🏢 {company['company_name']}")
-            
-            try:
-                reviews = get_reviews_from_company(driver, company, max_review_pages=max_review_pages)
+        with tqdm(total=len(companies), desc="Empresas") as progress:
+            for index, company, reviews, error in scrape_companies_with_pool(
+                companies,
+                max_review_pages=max_review_pages,
+                workers=workers,
+                fetcher_factory=make_fetcher,
+                fetcher=fetcher,
+                seen_index=seen_index if since_last_run else None
+            ):
+                progress.update(1)
+                print(f"\n[{index+1}/{len(companies)}] 🏢 {company['company_name']}")
                 
-                if reviews:
-                    all_reviews.extend(reviews)
-                    
+                if error:
+                    print(f"   ❌ Error: {error}")
+                    continue
+                
+                # Deduplicar al insertar: repetidas en esta ejecución o ya guardadas antes
+                unique_reviews = dedup_reviews(reviews, seen_in_run, seen_index)
+                if len(unique_reviews) < len(reviews):
+                    print(f"   🧹 {len(reviews) - len(unique_reviews)} reseñas duplicadas descartadas")
+                reviews = unique_reviews
+                all_reviews.extend(reviews, orden=index)
+                
+                if reviews and escribir_csv:
                     # Guardar CSV individual
-                    df_company = pd.DataFrame(reviews)
+                    df_company = reviews_to_dataframe(reviews)
                     csv_filename = f"results/reviews_{company['domain']}_{timestamp}.csv"
                     df_company.to_csv(csv_filename, index=False, encoding='utf-8-sig')
                     print(f"   💾 Guardado: {csv_filename}")
@@ -356,28 +1130,33 @@ def run_scraper_github_actions(max_companies=100, max_review_pages=10, max_compa
                     'reviews_count': len(reviews),
                     'processed_at': datetime.now().isoformat()
                 })
-                
-                # Pausa entre empresas (reducida para GitHub Actions)
-                if i < len(companies) - 1:
-                    random_delay(1, 2)
-                    
-            except Exception as e:
-                print(f"   ❌ Error: {e}")
-                continue
         
-        # Crear DataFrame consolidado
+        # Crear DataFrame consolidado (en el orden de las empresas)
         if all_reviews:
-            df_consolidated = pd.DataFrame(all_reviews)
+            df_consolidated = all_reviews.to_dataframe()
             
-            # Guardar archivo consolidado
-            consolidated_filename = f"trustpilot_consolidated_{timestamp}.csv"
-            df_consolidated.to_csv(consolidated_filename, index=False, encoding='utf-8-sig')
+            # Guardar archivo consolidado (el Parquet ya va particionado por dominio)
+            if escribir_csv:
+                consolidated_filename = f"trustpilot_consolidated_{timestamp}.csv"
+                df_consolidated.to_csv(consolidated_filename, index=False, encoding='utf-8-sig')
+            if escribir_parquet:
+                parquet_dir = guardar_parquet(
+                    df_consolidated,
+                    f"trustpilot_consolidated_{timestamp}.parquet",
+                    fecha=datetime.strptime(timestamp, "%Y%m%d_%H%M%S").strftime("%Y-%m-%d")
+                )
+                if not escribir_csv:
+                    consolidated_filename = parquet_dir
             
             # Guardar resumen de empresas procesadas
             df_companies = pd.DataFrame(processed_companies)
             companies_filename = f"companies_processed_{timestamp}.csv"
             df_companies.to_csv(companies_filename, index=False, encoding='utf-8-sig')
             
+            # Marcar como vistas solo cuando ya están guardadas
+            if seen_index is not None:
+                seen_index.add(all_reviews.registros_vistos())
+            
             print(f"\n✅ SCRAPING COMPLETADO!")
             print(f"📊 Total reseñas: {len(all_reviews):,}")
             print(f"🏢 Empresas procesadas: {len(processed_companies)}")
@@ -395,7 +1174,13 @@ def run_scraper_github_actions(max_companies=100, max_review_pages=10, max_compa
                 for score, count in score_dist.items():
                     print(f"     ⭐ {score}: {count} ({count/len(df_consolidated)*100:.1f}%)")
             
+            RUN_TIMINGS.report()
+            print(f"   • Pausa de cortesía final: {politeness.delay:.2f}s ({politeness.throttled} respuestas 429)")
+            
             return df_consolidated
+        elif seen_index is not None and processed_companies:
+            print("✅ Sin reseñas nuevas desde la última ejecución")
+            return pd.DataFrame(columns=['review_id'])
         else:
             print("⚠️ No se extrajeron reseñas")
             return None
@@ -406,25 +1191,66 @@ def run_scraper_github_actions(max_companies=100, max_review_pages=10, max_compa
         return None
         
     finally:
-        try:
-            driver.quit()
-            print("\n🔚 Navegador cerrado")
-        except:
-            pass
+        fetcher.close()
+        if http_fetcher is not None:
+            http_fetcher.close()
+        if seen_index is not None:
+            seen_index.close()
+        METRICS.export(metrics_file)
+        print("\n🔚 Navegador cerrado")
 
 def main():
     parser = argparse.ArgumentParser(description='TrustPilot Scraper para GitHub Actions')
+    subparsers = parser.add_subparsers(dest='command')
+    merge_parser = subparsers.add_parser('merge', help='Fusionar CSV de reseñas en un único dataset sin duplicados')
+    merge_parser.add_argument('inputs', nargs='*', default=DEFAULT_MERGE_INPUTS, help=f'Archivos o patrones glob (default: {" ".join(DEFAULT_MERGE_INPUTS)})')
+    merge_parser.add_argument('--output', help='CSV o directorio .parquet de salida (default: trustpilot_merged_<fecha>.csv)')
+    merge_parser.add_argument('--chunksize', type=int, default=DEFAULT_MERGE_CHUNKSIZE, help=f'Filas por bloque (default: {DEFAULT_MERGE_CHUNKSIZE})')
     parser.add_argument('--max_companies', type=int, default=100, help='Número máximo de empresas')
     parser.add_argument('--max_review_pages', type=int, default=10, help='Páginas de reseñas por empresa')
     parser.add_argument('--max_company_pages', type=int, default=10, help='Páginas de categoría')
+    parser.add_argument('--output_format', choices=FORMATOS_SALIDA, default='csv', help='Formato de salida: csv, parquet o both')
+    parser.add_argument('--workers', type=int, default=1, help='Navegadores headless en paralelo')
+    parser.add_argument('--fetch_mode', choices=FETCH_MODES, default='http', help='http: HTTP con Chrome solo como respaldo; selenium: siempre Chrome')
+    parser.add_argument('--base_url', default=BASE_URL, help='URL base de Trustpilot (p. ej. un servidor local de fixtures)')
+    parser.add_argument('--since_last_run', action='store_true', help='Solo reseñas nuevas: ordenar por recientes y parar al llegar a reseñas ya vistas')
+    parser.add_argument('--min_delay', type=float, default=DEFAULT_MIN_DELAY, help=f'Pausa de cortesía mínima entre peticiones en segundos (default: {DEFAULT_MIN_DELAY})')
+    parser.add_argument('--max_delay', type=float, default=DEFAULT_MAX_DELAY, help=f'Pausa de cortesía máxima en segundos (default: {DEFAULT_MAX_DELAY})')
+    parser.add_argument('--lean_browser', action='store_true', help='Chrome ligero: sin imágenes, fuentes, multimedia ni scripts de terceros, carga eager y perfil reutilizado')
+    parser.add_argument('--profile_root', default=DEFAULT_PROFILE_ROOT, help='Directorio de perfiles de Chrome por worker en modo ligero')
+    parser.add_argument('--dedup', action='store_true', help='Descartar al insertar las reseñas ya guardadas en ejecuciones anteriores (índice de vistas)')
+    parser.add_argument('--seen_index', default=DEFAULT_SEEN_INDEX_PATH, help=f'Índice SQLite de reseñas vistas (default: {DEFAULT_SEEN_INDEX_PATH})')
+    parser.add_argument('--metrics_file', help='Guardar contadores e histogramas en este archivo de texto de Prometheus')
+    parser.add_argument('--trace_file', help='Añadir los spans de la ejecución (descarga, parseo, scroll, empresa) a este JSON-lines')
     
     args = parser.parse_args()
     
+    if args.command == 'merge':
+        try:
+            merged = merge_review_files(args.inputs, args.output, args.chunksize)
+        except Exception as e:
+            print(f"❌ Error fusionando archivos: {e}")
+            sys.exit(1)
+        sys.exit(0 if merged else 1)
+    
     try:
         result = run_scraper_github_actions(
             max_companies=args.max_companies,
             max_review_pages=args.max_review_pages,
-            max_company_pages=args.max_company_pages
+            max_company_pages=args.max_company_pages,
+            output_format=args.output_format,
+            workers=args.workers,
+            base_url=args.base_url,
+            fetch_mode=args.fetch_mode,
+            since_last_run=args.since_last_run,
+            seen_index_path=args.seen_index,
+            min_delay=args.min_delay,
+            max_delay=args.max_delay,
+            lean_browser=args.lean_browser,
+            profile_root=args.profile_root,
+            dedup=args.dedup,
+            metrics_file=args.metrics_file,
+            trace_file=args.trace_file
         )
         
         if result is not None:
@@ -0,0 +1,62 @@
+"""
+Fixtures comunes: servidor de fixtures con el stub del LLM y analizadores sin esperas
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'benchmarks'))
+
+from fixture_server import FRASES, LLM_PATH, NOMBRES, start_fixture_server
+from trustpilot_analysis import TrustPilotAnalyzer
+from trustpilot_llm_client import CircuitBreaker, RetryPolicy
+
+# Texto que el stub del LLM responde con campos de menos
+MARCADOR_ROTA = "RESEÑA_ROTA"
+
+
+@pytest.fixture
+def stub_llm():
+    """(servidor, api_url) del stub del LLM; server.config se puede cambiar durante el test"""
+    server, base_url = start_fixture_server(llm_malformed_marker=MARCADOR_ROTA)
+    yield server, base_url + LLM_PATH
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def crear_analizador(stub_llm):
+    """Fábrica de analizadores contra el stub, sin backoff ni circuit breaker"""
+    _, api_url = stub_llm
+
+    def crear(max_retries: int = 2, **kwargs) -> TrustPilotAnalyzer:
+        kwargs.setdefault('rps', 0)
+        return TrustPilotAnalyzer(
+            'clave-de-prueba',
+            api_url=api_url,
+            retry_policy=RetryPolicy(max_retries, base=0, max_backoff=0),
+            circuit_breaker=CircuitBreaker(threshold=10 ** 6),
+            **kwargs
+        )
+
+    return crear
+
+
+@pytest.fixture
+def csv_reseñas(tmp_path, monkeypatch):
+    """CSV de 12 reseñas con review_id; el test se ejecuta en tmp_path (ahí se guardan las salidas)"""
+    monkeypatch.chdir(tmp_path)
+    filas = [{
+        'review_id': f"rev{i:03d}",
+        'customer_name': NOMBRES[i % len(NOMBRES)],
+        'customer_score': i % 5 + 1,
+        'review_text': f"{FRASES[i % len(FRASES)]} Estancia número {i}.",
+    } for i in range(12)]
+    ruta = tmp_path / "reseñas.csv"
+    pd.DataFrame(filas).to_csv(ruta, index=False, encoding='utf-8-sig')
+    return str(ruta)
@@ -0,0 +1,43 @@
+"""
+Checkpoint JSONL y reanudación con --resume
+"""
+
+from trustpilot_analysis import CheckpointLog
+
+
+def test_resume_solo_envia_las_reseñas_sin_registrar(stub_llm, crear_analizador, csv_reseñas, tmp_path):
+    server, _ = stub_llm
+    checkpoint = CheckpointLog(str(tmp_path / "checkpoint.jsonl"))
+
+    crear_analizador(pack_size=1, checkpoint=checkpoint).analizar(csv_reseñas, max_reviews=5)
+    assert len(checkpoint.load()) == 5
+
+    server.llm_requests = 0
+    df, errores = crear_analizador(pack_size=1, checkpoint=checkpoint).analizar(csv_reseñas, resume=True)
+
+    assert errores == []
+    assert server.llm_requests == 7
+    assert df['analyzed'].all()
+    assert (df['sentiment'] == 'Positivo').all()
+    assert len(checkpoint.load()) == 12
+
+
+def test_sin_resume_el_checkpoint_se_vacia(stub_llm, crear_analizador, csv_reseñas, tmp_path):
+    server, _ = stub_llm
+    checkpoint = CheckpointLog(str(tmp_path / "checkpoint.jsonl"))
+
+    crear_analizador(pack_size=1, checkpoint=checkpoint).analizar(csv_reseñas, max_reviews=5)
+    server.llm_requests = 0
+    crear_analizador(pack_size=1, checkpoint=checkpoint).analizar(csv_reseñas, max_reviews=3)
+
+    assert server.llm_requests == 3
+    assert len(checkpoint.load()) == 3
+
+
+def test_load_ignora_lineas_truncadas(tmp_path):
+    checkpoint = CheckpointLog(str(tmp_path / "checkpoint.jsonl"), flush_every=1)
+    checkpoint.append("rev000", {'sentiment': 'Positivo', 'language': 'es'})
+    with open(checkpoint.path, 'a', encoding='utf-8') as f:
+        f.write('{"key": "rev001", "resu')
+
+    assert checkpoint.load() == {"rev000": {'sentiment': 'Positivo', 'language': 'es'}}
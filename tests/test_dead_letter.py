@@ -0,0 +1,45 @@
+"""
+Registro de fallidas (dead letter) y reprocesado con --retry-failed
+"""
+
+from trustpilot_analysis import DeadLetterQueue
+
+
+def test_retry_failed_reprocesa_solo_las_fallidas(stub_llm, crear_analizador, csv_reseñas, tmp_path):
+    server, _ = stub_llm
+    server.config['llm_error_rate'] = 1.0
+    dead_letter = DeadLetterQueue(str(tmp_path / "fallidas.jsonl"))
+
+    _, errores = crear_analizador(max_retries=0, pack_size=1, dead_letter=dead_letter).analizar(csv_reseñas)
+    assert len(errores) == 12
+    assert len(dead_letter.load()) == 12
+
+    # Si vuelven a fallar quedan registradas una sola vez por reseña
+    _, errores = crear_analizador(max_retries=0, pack_size=1, dead_letter=dead_letter).analizar(
+        csv_reseñas, retry_failed=True)
+    assert len(errores) == 12
+    assert len(dead_letter.load()) == 12
+
+    server.config['llm_error_rate'] = 0.0
+    server.llm_requests = 0
+    df, errores = crear_analizador(max_retries=0, pack_size=1, dead_letter=dead_letter).analizar(
+        csv_reseñas, retry_failed=True)
+
+    assert errores == []
+    assert server.llm_requests == 12
+    assert df['analyzed'].all()
+    assert dead_letter.load() == {}
+
+
+def test_retry_failed_no_envia_las_que_ya_estaban_bien(stub_llm, crear_analizador, csv_reseñas, tmp_path):
+    server, _ = stub_llm
+    dead_letter = DeadLetterQueue(str(tmp_path / "fallidas.jsonl"))
+    crear_analizador(max_retries=0, pack_size=1, dead_letter=dead_letter).analizar(csv_reseñas)
+    assert dead_letter.load() == {}
+
+    server.llm_requests = 0
+    _, errores = crear_analizador(max_retries=0, pack_size=1, dead_letter=dead_letter).analizar(
+        csv_reseñas, retry_failed=True)
+
+    assert errores == []
+    assert server.llm_requests == 0
@@ -0,0 +1,61 @@
+"""
+Deduplicación de reseñas entre empresas y ejecuciones, y fusión de archivos
+"""
+
+import pandas as pd
+
+from scraper_github_actions import SeenReviewIndex, dedup_reviews, merge_review_files
+
+
+def _reseña(review_id, texto="Muy bien", domain="hotel.example"):
+    return {'review_id': review_id, 'review_text': texto, 'domain': domain}
+
+
+def test_dedup_en_la_misma_ejecucion():
+    vistas = set()
+
+    primera = dedup_reviews([_reseña("a"), _reseña("b"), _reseña("a")], vistas)
+    segunda = dedup_reviews([_reseña("b"), _reseña("c")], vistas)
+
+    assert [r['review_id'] for r in primera] == ["a", "b"]
+    assert [r['review_id'] for r in segunda] == ["c"]
+    assert vistas == {"a", "b", "c"}
+
+
+def test_dedup_con_indice_de_ejecuciones_anteriores(tmp_path):
+    ruta = str(tmp_path / "vistas.sqlite")
+    indice = SeenReviewIndex(ruta)
+    indice.add([_reseña("a"), _reseña("b")])
+    indice.close()
+
+    indice = SeenReviewIndex(ruta)
+    try:
+        nuevas = dedup_reviews([_reseña("a"), _reseña("c"), _reseña("d")], set(), indice)
+        assert [r['review_id'] for r in nuevas] == ["c", "d"]
+        assert len(indice) == 2
+    finally:
+        indice.close()
+
+
+def test_merge_gana_la_primera_aparicion(tmp_path):
+    a = tmp_path / "a.csv"
+    b = tmp_path / "b.csv"
+    pd.DataFrame([_reseña("1", "uno"), _reseña("2", "dos"), _reseña("2", "dos repetida")]).to_csv(
+        a, index=False, encoding='utf-8-sig')
+    pd.DataFrame([
+        {'review_id': "2", 'review_text': "dos de b", 'customer_score': "4"},
+        {'review_id': "3", 'review_text': "tres", 'customer_score': "5"},
+        {'review_id': "", 'review_text': "sin id", 'customer_score': "1"},
+    ]).to_csv(b, index=False, encoding='utf-8-sig')
+    salida = tmp_path / "fusion.csv"
+
+    assert merge_review_files([str(a), str(b)], str(salida), chunksize=1) == str(salida)
+
+    df = pd.read_csv(salida, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    assert list(df['review_id']) == ["1", "2", "3"]
+    assert list(df['review_text']) == ["uno", "dos", "tres"]
+    assert list(df.columns) == ['review_id', 'review_text', 'domain', 'customer_score']
+
+
+def test_merge_sin_archivos(tmp_path):
+    assert merge_review_files([str(tmp_path / "nada_*.csv")], str(tmp_path / "fusion.csv")) is None
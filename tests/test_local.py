@@ -0,0 +1,84 @@
+"""
+Clasificador local: qué se resuelve sin LLM, qué se escala y con qué idioma
+"""
+
+import pandas as pd
+import pytest
+
+import fixture_server
+from trustpilot_local import LocalClassifier
+
+RESEÑA_LARGA_EN = ("The staff at the reception were friendly and helpful and the room was clean, "
+                   "but the wifi kept dropping every evening and nobody could fix it.")
+
+
+@pytest.fixture
+def clasificador():
+    return LocalClassifier()
+
+
+def test_reseña_corta_y_extrema_se_resuelve(clasificador):
+    resultado, campos = clasificador.clasificar_campos("Excelente servicio, muy recomendable", 5)
+
+    assert resultado['language'] == 'es'
+    assert resultado['sentiment'] == 'Positivo'
+    assert resultado['main_topic'] == 'unknown'
+    assert campos == {}
+
+
+def test_reseña_larga_se_escala_con_idioma(clasificador):
+    assert clasificador.clasificar_campos(RESEÑA_LARGA_EN, 3) == (None, {'language': 'en'})
+
+
+def test_lexico_contrario_a_la_puntuacion_se_escala(clasificador):
+    resultado, _ = clasificador.clasificar_campos("Servicio horrible, nunca más", 5)
+    assert resultado is None
+
+
+@pytest.mark.parametrize("texto, score", [
+    ("Çok iyi hizmet, teşekkürler herkese", 5),
+    ("Molt bon servei, tot perfecte i ràpid, ho recomano", 5),
+    ("El vol es va cancel·lar i ningú ens va avisar", 1),
+    ("ok", 5),
+])
+def test_idioma_no_soportado_o_dudoso_se_escala_sin_idioma(clasificador, texto, score):
+    assert clasificador.clasificar_campos(texto, score) == (None, {})
+    assert clasificador.resueltas == 0
+
+
+def _csv(tmp_path, filas):
+    ruta = tmp_path / "reseñas.csv"
+    pd.DataFrame(filas).to_csv(ruta, index=False, encoding='utf-8-sig')
+    return str(ruta)
+
+
+def test_analizador_conserva_el_idioma_del_llm(stub_llm, crear_analizador, tmp_path, monkeypatch):
+    server, _ = stub_llm
+    monkeypatch.chdir(tmp_path)
+    csv = _csv(tmp_path, [
+        {'review_id': "r1", 'customer_name': "Ana", 'customer_score': 5, 'review_text': "Excelente servicio, muy recomendable"},
+        {'review_id': "r2", 'customer_name': "John", 'customer_score': 3, 'review_text': RESEÑA_LARGA_EN},
+    ])
+    analyzer = crear_analizador(pack_size=1, local_classifier=LocalClassifier())
+
+    df, errores = analyzer.analizar(csv)
+
+    assert errores == []
+    assert server.llm_requests == 1
+    # El stub responde "es": el idioma local no sustituye una respuesta válida del LLM
+    assert list(df['language']) == ['es', 'es']
+
+
+def test_analizador_usa_el_idioma_local_si_el_llm_no_lo_da(stub_llm, crear_analizador, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(fixture_server, 'LLM_RESPUESTA', "unknown" + fixture_server.LLM_RESPUESTA[2:])
+    csv = _csv(tmp_path, [
+        {'review_id': "r1", 'customer_name': "John", 'customer_score': 3, 'review_text': RESEÑA_LARGA_EN},
+    ])
+    analyzer = crear_analizador(pack_size=1, local_classifier=LocalClassifier())
+
+    df, errores = analyzer.analizar(csv)
+
+    assert errores == []
+    assert df.loc[0, 'language'] == 'en'
+    assert df.loc[0, 'sentiment'] == 'Positivo'
@@ -0,0 +1,58 @@
+"""
+Packs de varias reseñas por petición: división y reintento de las que faltan
+"""
+
+import pandas as pd
+
+from conftest import MARCADOR_ROTA
+
+
+def _reseñas(n, rotas=()):
+    return [(f"R{i}", f"Reseña {i} {MARCADOR_ROTA if i in rotas else ''}", "Ana") for i in range(n)]
+
+
+def test_pack_completo_en_una_peticion(stub_llm, crear_analizador):
+    server, _ = stub_llm
+    analyzer = crear_analizador(pack_size=4)
+
+    resultados = analyzer.analizar_pack_con_division(_reseñas(4))
+
+    assert server.llm_requests == 1
+    assert all(resultado['sentiment'] == 'Positivo' for resultado in resultados.values())
+
+
+def test_pack_incompleto_reintenta_solo_la_reseña_que_falta(stub_llm, crear_analizador):
+    server, _ = stub_llm
+    analyzer = crear_analizador(max_retries=2, pack_size=4)
+
+    resultados = analyzer.analizar_pack_con_division(_reseñas(4, rotas={2}))
+
+    assert resultados['R2'] is None
+    assert all(resultados[f"R{i}"] for i in (0, 1, 3))
+    # Pack + la reseña rota sola con sus 2 reintentos
+    assert server.llm_requests == 1 + 3
+
+
+def test_division_comparte_los_reintentos(stub_llm, crear_analizador):
+    server, _ = stub_llm
+    server.config['llm_error_rate'] = 1.0
+    analyzer = crear_analizador(max_retries=2, pack_size=8)
+
+    resultados = analyzer.analizar_pack_con_division(_reseñas(8))
+
+    assert set(resultados) == {f"R{i}" for i in range(8)}
+    assert not any(resultados.values())
+    # Un primer intento por cada sub-pack (8 + 4 + 2 + 1) y 2 reintentos en total
+    assert server.llm_requests == 15 + 2
+
+
+def test_analizar_con_packs_y_reseña_rota(stub_llm, crear_analizador, csv_reseñas):
+    df = pd.read_csv(csv_reseñas, encoding='utf-8-sig')
+    df.loc[5, 'review_text'] += f" {MARCADOR_ROTA}"
+    df.to_csv(csv_reseñas, index=False, encoding='utf-8-sig')
+    analyzer = crear_analizador(max_retries=0, pack_size=4, dead_letter=None)
+
+    df_resultado, errores = analyzer.analizar(csv_reseñas)
+
+    assert [error['review_id'] for error in errores] == ['rev005']
+    assert df_resultado['analyzed'].sum() == 11
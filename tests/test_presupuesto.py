@@ -0,0 +1,68 @@
+"""
+Presupuesto y plazo: las reseñas que no llegan a enviarse quedan pendientes (NO_ENVIADA), no fallidas
+"""
+
+import time
+
+from trustpilot_analysis import NO_ENVIADA, CheckpointLog, DeadLetterQueue
+from trustpilot_llm_client import UsageTracker
+
+
+def test_solicitar_completion_con_plazo_vencido_no_envia(stub_llm, crear_analizador):
+    server, _ = stub_llm
+    analyzer = crear_analizador(deadline=1e-9)
+    analyzer.iniciar_plazo()
+    time.sleep(0.01)
+
+    assert analyzer._solicitar_completion("Reseña de prueba") is NO_ENVIADA
+    assert server.llm_requests == 0
+
+
+def test_presupuesto_agotado_deja_pendientes(stub_llm, crear_analizador, csv_reseñas, tmp_path):
+    server, _ = stub_llm
+    dead_letter = DeadLetterQueue(str(tmp_path / "fallidas.jsonl"))
+    checkpoint = CheckpointLog(str(tmp_path / "checkpoint.jsonl"))
+    usage = UsageTracker('google/gemini-2.5-flash', budget=1e-9)
+    analyzer = crear_analizador(concurrency=1, pack_size=1, usage=usage,
+                                dead_letter=dead_letter, checkpoint=checkpoint)
+
+    df, errores = analyzer.analizar(csv_reseñas)
+
+    # La primera petición fija el coste medio; con él ya no cabe ninguna más
+    assert server.llm_requests == 1
+    assert df['analyzed'].sum() == 1
+    assert errores == []
+    assert dead_letter.load() == {}
+
+    # Las pendientes se completan con --resume
+    server.llm_requests = 0
+    df, errores = crear_analizador(concurrency=1, pack_size=1, dead_letter=dead_letter,
+                                   checkpoint=checkpoint).analizar(csv_reseñas, resume=True)
+    assert server.llm_requests == 11
+    assert df['analyzed'].all()
+
+
+def test_plazo_agotado_no_cuenta_como_error(stub_llm, crear_analizador, csv_reseñas, tmp_path):
+    server, _ = stub_llm
+    dead_letter = DeadLetterQueue(str(tmp_path / "fallidas.jsonl"))
+    analyzer = crear_analizador(pack_size=4, deadline=1e-9, dead_letter=dead_letter)
+
+    df, errores = analyzer.analizar(csv_reseñas)
+
+    assert server.llm_requests == 0
+    assert errores == []
+    assert not df['analyzed'].any()
+    assert dead_letter.load() == {}
+
+
+def test_peticiones_enviadas_que_fallan_siguen_siendo_errores(stub_llm, crear_analizador, csv_reseñas, tmp_path):
+    server, _ = stub_llm
+    server.config['llm_error_rate'] = 1.0
+    dead_letter = DeadLetterQueue(str(tmp_path / "fallidas.jsonl"))
+    usage = UsageTracker('google/gemini-2.5-flash', budget=1.0)
+    analyzer = crear_analizador(max_retries=0, pack_size=1, usage=usage, dead_letter=dead_letter)
+
+    _, errores = analyzer.analizar(csv_reseñas)
+
+    assert len(errores) == 12
+    assert len(dead_letter.load()) == 12
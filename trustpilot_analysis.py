@@ -6,7 +6,6 @@ Análisis automatizado de reseñas usando LLM de OpenRouter
 
 import pandas as pd
 import numpy as np
-import requests
 import json
 from tqdm import tqdm
 import time
@@ -14,30 +13,359 @@ from datetime import datetime
 import os
 import sys
 import argparse
-from typing import Dict, List, Optional, Tuple
+import hashlib
+import shutil
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from trustpilot_llm_client import (
+    DEFAULT_BREAKER_COOLDOWN, DEFAULT_BREAKER_THRESHOLD, DEFAULT_MAX_BACKOFF, DEFAULT_MAX_RETRIES, DEFAULT_MAX_TOKENS,
+    DEFAULT_POOL_SIZE, CircuitBreaker, LLMClient, RetryBudget, RetryPolicy, UsageTracker, parse_retry_after
+)
+from trustpilot_local import DEFAULT_MAX_WORDS, LocalClassifier
+from trustpilot_metrics import METRICS
+from trustpilot_priority import CRITERIOS_PRIORIDAD, PriorityScheduler
+from trustpilot_similarity import (
+    DEFAULT_MAX_REPRESENTATIVES, DEFAULT_SIMILARITY_THRESHOLD, NearDuplicateIndex, normalizar_texto
+)
+from trustpilot_storage import FORMATOS_SALIDA, cargar_parquet, es_parquet, guardar_parquet, iterar_parquet
 
 # Configuración por defecto
 DEFAULT_MODEL = "google/gemini-2.5-flash"
 DEFAULT_BATCH_SIZE = 10
-OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+DEFAULT_CHUNKSIZE = 5000
+DEFAULT_CONCURRENCY = 1
+DEFAULT_RPS = 2.0
+DEFAULT_PACK_SIZE = 1
+TOKENS_POR_RESEÑA = 120
+DEFAULT_CACHE_PATH = "trustpilot_llm_cache.sqlite"
+DEFAULT_CACHE_MAX_AGE_DAYS = 30
+DEFAULT_CACHE_MAX_ENTRIES = 500000
+DEFAULT_CHECKPOINT_PATH = "trustpilot_analysis_checkpoint.jsonl"
+DEFAULT_CHECKPOINT_FLUSH_EVERY = 50
+DEFAULT_CHECKPOINT_FLUSH_SECONDS = 5.0
+DEFAULT_DEAD_LETTER_PATH = "trustpilot_analysis_failed.jsonl"
+
+# Incrementar cuando cambie el prompt o CAMPOS_ANALISIS para invalidar la caché
+PROMPT_VERSION = "1"
+OPENROUTER_API_URL = os.getenv("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+MENSAJE_SISTEMA = {"role": "system", "content": "Eres un experto en análisis de reseñas de viajes. Respondes SOLO con los valores separados por |."}
+
+
+class _NoEnviada:
+    """Resultado de una reseña que no se llegó a enviar por presupuesto o plazo (falso como None)"""
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return 'NO_ENVIADA'
+
+
+# No es un fallo: la reseña queda pendiente para --resume y no va al registro de fallidas
+NO_ENVIADA = _NoEnviada()
 
 # Definir los campos esperados en la respuesta del modelo (en orden)
 CAMPOS_ANALISIS = [
     "language", "sentiment", "sentiment_score", "emotion", "emotion_intensity", "customer_gender",
     "main_topic", "keywords", "customer_type", "tourist_type", "group_type"
 ]
+# Campos de análisis con pocos valores distintos: se guardan como categóricos
+CAMPOS_CATEGORICOS = {
+    "language", "sentiment", "emotion", "customer_gender", "main_topic", "customer_type", "tourist_type", "group_type"
+}
+
+# Códigos de idioma que el prompt admite en "language"
+IDIOMAS_VALIDOS = {"es", "en", "fr", "de", "it", "pt", "nl", "ru", "tr", "ar", "zh", "ja", "ko", "other"}
+
+# Instrucciones compartidas por el prompt individual y el prompt multi-reseña
+INSTRUCCIONES_ANALISIS = """ANÁLISIS REQUERIDO (responde cada campo separado por "|"):
+
+0. Language: Clasifica como "es", "en", "fr", "de", "it", "pt", "nl", "ru", "tr", "ar", "zh", "ja", "ko", "other"
+1. Sentiment: Clasifica como "Positivo", "Negativo" o "Neutro"
+2. Sentiment_score: Evalúa en escala de -1 a +1 (-1=extremadamente negativo, 0=neutro, +1=extremadamente positivo)
+3. Emotion: Identifica una emoción (joy, surprise, neutral, sadness, disgust, anger, fear)
+4. Emotion_intensity: Intensidad de 1-5 (1=muy leve, 5=muy intensa)
+5. Customer_gender: Basado en el nombre (masculino, femenino, unknown)
+6. Topic: Tema principal (Atención al cliente, Limpieza, Instalaciones, Relación calidad-precio, Servicios, Ubicación, Ética y sostenibilidad, Check-in y Check-out, Comodidad y descanso, Oferta gastronómica, Facilidad de reserva y accesibilidad digital, Animación y actividades, Seguridad)
+7. Keywords: 3-5 términos relevantes separados por comas SIN espacios
+8. Customer_type: Promotor, Leal, Neutral, Crítico, Oportunista
+9. Tourist_type: Turista de ocio, cultural, naturaleza, aventura, compras, espiritual/religioso, gastronómico, deportivo, wellness, solidario/voluntario
+10. Group_type: familiar, amigos, pareja, solitario, grupo organizado"""
+
+EJEMPLO_RESPUESTA = "es|Positivo|0.8|joy|4|femenino|Atención al cliente|excelente,servicio,amable|Promotor|Turista de ocio|pareja"
+
+
+def tipar_campo(serie: pd.Series, campo: str) -> pd.Series:
+    """Convertir una columna de análisis a su tipo: float, entero pequeño o texto"""
+    if campo == 'sentiment_score':
+        return pd.to_numeric(serie, errors='coerce').astype('float64')
+    
+    if campo == 'emotion_intensity':
+        valores = pd.to_numeric(serie, errors='coerce').round()
+        # Fuera del rango 1-5 se considera desconocido
+        return valores.where(valores.between(1, 5)).astype('Int8')
+    
+    return serie.astype(object)
+
+class TokenBucket:
+    """Limitador de peticiones por segundo (token bucket) compartido entre hilos"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Bloquear hasta disponer de `tokens` (rate <= 0 desactiva el límite)"""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+
+                wait_time = (tokens - self.tokens) / self.rate
+
+            time.sleep(wait_time)
+
+
+class ResultCache:
+    """Caché persistente en SQLite de resultados del LLM, direccionada por contenido"""
+
+    def __init__(self, path: str, max_age_days: float = DEFAULT_CACHE_MAX_AGE_DAYS,
+                 max_entries: int = DEFAULT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS resultados ("
+            "clave TEXT PRIMARY KEY, resultado TEXT NOT NULL, creado REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_resultados_creado ON resultados (creado)")
+        self.conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(model: str, review_text: str, customer_name: str) -> str:
+        """Hash de (modelo, versión del prompt, texto, cliente)"""
+        contenido = json.dumps([model, PROMPT_VERSION, str(review_text), str(customer_name)], ensure_ascii=False)
+        return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+    def get(self, clave: str) -> Optional[Dict]:
+        with self.lock:
+            fila = self.conn.execute(
+                "SELECT resultado FROM resultados WHERE clave = ?", (clave,)
+            ).fetchone()
+            if fila is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(fila[0])
+
+    def put(self, clave: str, resultado: Dict) -> None:
+        valores = {campo: resultado[campo] for campo in CAMPOS_ANALISIS if campo in resultado}
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO resultados (clave, resultado, creado) VALUES (?, ?, ?)",
+                (clave, json.dumps(valores, ensure_ascii=False), time.time())
+            )
+            self.conn.commit()
+
+    def evict(self) -> int:
+        """Eliminar entradas más antiguas que max_age_days y recortar a max_entries"""
+        with self.lock:
+            eliminadas = 0
+            if self.max_age_days and self.max_age_days > 0:
+                limite = time.time() - self.max_age_days * 86400
+                eliminadas += self.conn.execute(
+                    "DELETE FROM resultados WHERE creado < ?", (limite,)
+                ).rowcount
+            if self.max_entries and self.max_entries > 0:
+                eliminadas += self.conn.execute(
+                    "DELETE FROM resultados WHERE clave IN ("
+                    "SELECT clave FROM resultados ORDER BY creado DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                ).rowcount
+            self.conn.commit()
+        if eliminadas:
+            print(f"🧹 Caché: {eliminadas} entradas expiradas eliminadas")
+        return eliminadas
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+
+class CheckpointLog:
+    """Registro append-only (JSONL) de reseñas analizadas para poder reanudar"""
+
+    def __init__(self, path: str, flush_every: int = DEFAULT_CHECKPOINT_FLUSH_EVERY,
+                 flush_seconds: float = DEFAULT_CHECKPOINT_FLUSH_SECONDS):
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.flush_seconds = flush_seconds
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict]:
+        """Leer el registro devolviendo {clave: resultado}; ignora líneas truncadas"""
+        registros = {}
+        if not os.path.exists(self.path):
+            return registros
+        
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    registro = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                registros[registro['key']] = registro['result']
+        return registros
+
+    def reset(self) -> None:
+        """Vaciar el registro al empezar un análisis nuevo"""
+        with self.lock:
+            self.buffer = []
+            open(self.path, 'w', encoding='utf-8').close()
+
+    def append(self, clave: str, resultado: Dict) -> None:
+        valores = {campo: resultado[campo] for campo in CAMPOS_ANALISIS if campo in resultado}
+        with self.lock:
+            self.buffer.append(json.dumps({'key': clave, 'result': valores}, ensure_ascii=False))
+            if (len(self.buffer) >= self.flush_every
+                    or time.monotonic() - self.last_flush >= self.flush_seconds):
+                self._flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self.buffer:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(self.buffer) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.buffer = []
+        self.last_flush = time.monotonic()
+
+
+class DeadLetterQueue:
+    """Registro JSONL de reseñas que no se pudieron analizar, para reprocesarlas con --retry-failed"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict]:
+        """Leer el registro devolviendo {clave: entrada}; ignora líneas truncadas"""
+        entradas = {}
+        if not os.path.exists(self.path):
+            return entradas
+        
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entrada = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                entradas[entrada['key']] = entrada
+        return entradas
+
+    def reset(self) -> None:
+        with self.lock:
+            open(self.path, 'w', encoding='utf-8').close()
+
+    def compactar(self, resueltas: set) -> int:
+        """Reescribir el registro sin las claves resueltas, una entrada (la última) por clave
+        
+        Se escribe en un temporal que sustituye al registro con os.replace, de modo que
+        una interrupción nunca deja el registro a medias. Devuelve las entradas restantes.
+        """
+        with self.lock:
+            pendientes = [entrada for clave, entrada in self.load().items() if clave not in resueltas]
+            temporal = f"{self.path}.tmp"
+            with open(temporal, 'w', encoding='utf-8') as f:
+                for entrada in pendientes:
+                    f.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+            os.replace(temporal, self.path)
+        return len(pendientes)
+
+    def append(self, clave: str, review_id, review_text, customer_name, error: str) -> None:
+        entrada = {
+            'key': clave,
+            'review_id': None if review_id is None or pd.isna(review_id) else str(review_id),
+            'review_text': str(review_text),
+            'customer_name': str(customer_name),
+            'error': error,
+            'time': datetime.now().isoformat(timespec='seconds')
+        }
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+
 
 class TrustPilotAnalyzer:
-    def __init__(self, api_key: str, model: str = DEFAULT_MODEL):
+    def __init__(self, api_key: str, model: str = DEFAULT_MODEL,
+                 concurrency: int = DEFAULT_CONCURRENCY, rps: float = DEFAULT_RPS,
+                 api_url: str = OPENROUTER_API_URL, pack_size: int = DEFAULT_PACK_SIZE,
+                 cache: Optional[ResultCache] = None, checkpoint: Optional[CheckpointLog] = None,
+                 near_duplicates: Optional[NearDuplicateIndex] = None,
+                 local_classifier: Optional[LocalClassifier] = None,
+                 pool_size: int = DEFAULT_POOL_SIZE, http2: bool = False, verify=True,
+                 retry_policy: Optional[RetryPolicy] = None, circuit_breaker: Optional[CircuitBreaker] = None,
+                 dead_letter: Optional[DeadLetterQueue] = None, usage: Optional[UsageTracker] = None,
+                 priority: Optional[PriorityScheduler] = None, deadline: Optional[float] = None):
         """Inicializar el analizador con configuración de API"""
         self.api_key = api_key
         self.model = model
+        self.api_url = api_url
+        self.concurrency = max(1, concurrency)
+        self.pack_size = max(1, pack_size)
+        self.cache = cache
+        self.checkpoint = checkpoint
+        self.near_duplicates = near_duplicates
+        self.local_classifier = local_classifier
+        self.rate_limiter = TokenBucket(rps)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.dead_letter = dead_letter
+        # Tokens, coste y presupuesto de las respuestas del LLM
+        self.usage = usage or UsageTracker(model)
+        # Orden de las reseñas pendientes (None = orden del archivo) y tiempo máximo en segundos
+        self.priority = priority
+        self.deadline = deadline
+        self.fin_plazo = None
+        self.plazo_agotado = False
+        # Claves de checkpoint a reprocesar con --retry-failed (None = todas las pendientes) y las ya recuperadas
+        self.solo_claves = None
+        self.recuperadas = set()
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
             "HTTP-Referer": "https://github.com/actions",
             "X-Title": "TrustPilot Analysis"
         }
+        # Una sola sesión (pool keep-alive) compartida por todos los hilos
+        self.client = LLMClient(self.headers, pool_size=max(pool_size, self.concurrency), http2=http2, verify=verify)
         self.review_text_col = None
         self.customer_name_col = None
         
@@ -67,15 +395,18 @@ class TrustPilotAnalyzer:
             print(f"Columnas disponibles: {list(df.columns)}")
             return False
 
-    def cargar_datos(self, csv_path: str) -> pd.DataFrame:
-        """Cargar y limpiar los datos del CSV"""
+    def cargar_datos(self, csv_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Cargar y limpiar los datos del CSV (o dataset Parquet)"""
         print(f"📂 Cargando datos desde: {csv_path}")
         
         if not os.path.exists(csv_path):
             raise FileNotFoundError(f"El archivo {csv_path} no existe")
         
-        # Cargar CSV
-        df = pd.read_csv(csv_path, encoding='utf-8-sig')
+        # Cargar CSV o Parquet leyendo solo las columnas pedidas
+        if es_parquet(csv_path):
+            df = cargar_parquet(csv_path, columns)
+        else:
+            df = pd.read_csv(csv_path, encoding='utf-8-sig', usecols=columns)
         df.columns = df.columns.str.strip()
         
         print(f"📊 Total de reseñas cargadas: {len(df)}")
@@ -86,20 +417,32 @@ class TrustPilotAnalyzer:
         
         # Limpiar datos
         df_original_len = len(df)
-        df = df.dropna(subset=[self.review_text_col])
-        df = df[df[self.review_text_col].astype(str).str.strip() != '']
+        df = self.limpiar_datos(df)
         
         print(f"📋 Limpieza de datos:")
         print(f"   - Reseñas originales: {df_original_len}")
         print(f"   - Reseñas después de limpieza: {len(df)}")
         print(f"   - Reseñas eliminadas: {df_original_len - len(df)}")
+            
+        pendientes = (df['analyzed'] == False).sum()
+        print(f"   - Reseñas pendientes de analizar: {pendientes}")
+        
+        return df
+
+    def limpiar_datos(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Eliminar reseñas sin texto e inicializar las columnas de análisis y 'analyzed'"""
+        df = df.dropna(subset=[self.review_text_col])
+        df = df[df[self.review_text_col].astype(str).str.strip() != '']
+        
+        # El scraper ya no escribe las columnas de análisis vacías: se añaden aquí, antes
+        # de 'analyzed', para conservar el orden de columnas de la salida
+        for campo in CAMPOS_ANALISIS:
+            if campo not in df.columns:
+                df[campo] = None
         
         # Inicializar columna 'analyzed' si no existe
         if 'analyzed' not in df.columns:
             df['analyzed'] = False
-            
-        pendientes = (df['analyzed'] == False).sum()
-        print(f"   - Reseñas pendientes de analizar: {pendientes}")
         
         return df
 
@@ -112,138 +455,615 @@ RESEÑA A ANALIZAR:
 Texto: {review_text}
 Cliente: {customer_name}
 
-ANÁLISIS REQUERIDO (responde cada campo separado por "|"):
-
-0. Language: Clasifica como "es", "en", "fr", "de", "it", "pt", "nl", "ru", "tr", "ar", "zh", "ja", "ko", "other"
-1. Sentiment: Clasifica como "Positivo", "Negativo" o "Neutro"
-2. Sentiment_score: Evalúa en escala de -1 a +1 (-1=extremadamente negativo, 0=neutro, +1=extremadamente positivo)
-3. Emotion: Identifica una emoción (joy, surprise, neutral, sadness, disgust, anger, fear)
-4. Emotion_intensity: Intensidad de 1-5 (1=muy leve, 5=muy intensa)
-5. Customer_gender: Basado en el nombre (masculino, femenino, unknown)
-6. Topic: Tema principal (Atención al cliente, Limpieza, Instalaciones, Relación calidad-precio, Servicios, Ubicación, Ética y sostenibilidad, Check-in y Check-out, Comodidad y descanso, Oferta gastronómica, Facilidad de reserva y accesibilidad digital, Animación y actividades, Seguridad)
-7. Keywords: 3-5 términos relevantes separados por comas SIN espacios
-8. Customer_type: Promotor, Leal, Neutral, Crítico, Oportunista
-9. Tourist_type: Turista de ocio, cultural, naturaleza, aventura, compras, espiritual/religioso, gastronómico, deportivo, wellness, solidario/voluntario
-10. Group_type: familiar, amigos, pareja, solitario, grupo organizado
+{INSTRUCCIONES_ANALISIS}
 
 FORMATO DE RESPUESTA:
 Responde ÚNICAMENTE con los valores separados por "|" en el orden exacto listado arriba.
 Si no puedes determinar algún campo, usa "unknown".
 NO incluyas espacios antes o después de los pipes.
 
-Ejemplo: es|Positivo|0.8|joy|4|femenino|Atención al cliente|excelente,servicio,amable|Promotor|Turista de ocio|pareja
+Ejemplo: {EJEMPLO_RESPUESTA}
 """
 
-    def analizar_con_llm(self, review_text: str, customer_name: str, max_retries: int = 3) -> Optional[Dict]:
-        """Analizar una reseña usando el LLM"""
-        prompt = self.crear_prompt_analisis(review_text, customer_name)
+    def crear_prompt_multiple(self, reseñas: List[Tuple[str, str, str]]) -> str:
+        """Crear un único prompt para analizar varias reseñas (id, texto, cliente)"""
+        bloques = "\n\n".join(
+            f"[{review_id}]\nTexto: {review_text}\nCliente: {customer_name}"
+            for review_id, review_text, customer_name in reseñas
+        )
+        primer_id = reseñas[0][0]
+        return f"""
+Eres un analizador especializado en evaluación de reseñas turísticas y análisis de sentimientos. Recibirás {len(reseñas)} reseñas, cada una precedida por su identificador entre corchetes. Para cada reseña deberás analizar y proporcionar la siguiente información separada por el delimitador "|":
+
+RESEÑAS A ANALIZAR:
+{bloques}
+
+{INSTRUCCIONES_ANALISIS}
+
+FORMATO DE RESPUESTA:
+Responde ÚNICAMENTE con {len(reseñas)} líneas, una por reseña y en el mismo orden.
+Cada línea empieza con el identificador (sin corchetes) seguido de los valores separados por "|" en el orden exacto listado arriba.
+Si no puedes determinar algún campo, usa "unknown".
+NO incluyas espacios antes o después de los pipes.
+
+Ejemplo: {primer_id}|{EJEMPLO_RESPUESTA}
+"""
+
+    def _solicitar_completion(self, prompt: str, max_tokens: Optional[int] = None, max_retries: Optional[int] = None,
+                              reseñas: int = 1, parsear: Optional[Callable[[str], Any]] = None,
+                              reintentos: Optional[RetryBudget] = None):
+        """Enviar un prompt al LLM y devolver el texto de la respuesta (o parsear(texto))
         
-        payload = {
-            "model": self.model,
-            "messages": [
-                {"role": "system", "content": "Eres un experto en análisis de reseñas de viajes. Respondes SOLO con los valores separados por |."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.1,
-            "max_tokens": 500
-        }
+        Reintenta 429, 5xx, timeouts, errores de conexión y respuestas vacías o mal
+        formadas con backoff exponencial y jitter; los demás errores 4xx no se reintentan.
+        Si parsear devuelve None la respuesta cuenta como mal formada y se reintenta con
+        el mismo presupuesto. max_retries son los reintentos tras el primer intento (por
+        defecto los de retry_policy); con reintentos, además, cada uno se descuenta de ese
+        presupuesto compartido con otras peticiones. Sin max_tokens se ajusta a las completions observadas
+        para `reseñas` reseñas. Devuelve NO_ENVIADA si la petición no llega a enviarse por
+        presupuesto o plazo; si se corta en un reintento, None (la petición ya falló).
+        """
+        intentos = self.retry_policy.intentos if max_retries is None else max(0, max_retries) + 1
         
-        for intento in range(max_retries):
+        for intento in range(intentos):
+            retry_after = None
+            motivo = 'exception'
+            if self.plazo_vencido() or not self.usage.permitir():
+                return NO_ENVIADA if intento == 0 else None
+            
+            payload = {
+                "model": self.model,
+                "messages": [MENSAJE_SISTEMA, {"role": "user", "content": prompt}],
+                "temperature": 0.1,
+                "max_tokens": max_tokens or self.usage.max_tokens(reseñas, max(DEFAULT_MAX_TOKENS, TOKENS_POR_RESEÑA * reseñas))
+            }
+            if 'openrouter.ai' in self.api_url:
+                # OpenRouter informa del coste real de cada petición en usage.cost
+                payload["usage"] = {"include": True}
+            
             try:
-                response = requests.post(
-                    OPENROUTER_API_URL,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=30
-                )
+                self.circuit_breaker.esperar()
+                self.rate_limiter.acquire()
+                with METRICS.span('llm_request', attempt=intento + 1):
+                    response = self.client.post(self.api_url, payload)
+                METRICS.incr('llm_requests', status=response.status_code)
                 
                 if response.status_code == 200:
-                    result = response.json()
-                    content = result['choices'][0]['message']['content']
-                    
-                    if not content.strip():
-                        print(f"⚠️ Respuesta vacía de la API para reseña")
-                        return None
-                    
-                    # Limpiar posibles markdown o espacios extra
-                    if "```" in content:
-                        lines = content.split('\n')
-                        for line in lines:
-                            if '|' in line and not line.strip().startswith('```'):
-                                content = line.strip()
-                                break
-                    
-                    content = content.strip()
-                    valores = [v.strip() for v in content.split("|")]
+                    self.circuit_breaker.registrar_exito()
+                    try:
+                        datos = response.json()
+                    except ValueError:
+                        datos = None
+                    content = self._registrar_uso(datos, reseñas)
                     
-                    # Verificar que tenemos el número correcto de campos
-                    if len(valores) != len(CAMPOS_ANALISIS):
-                        print(f"⚠️ Respuesta incorrecta: {len(valores)} campos vs {len(CAMPOS_ANALISIS)} esperados")
-                        return None
-                    
-                    # Crear diccionario con los resultados
-                    resultado = dict(zip(CAMPOS_ANALISIS, valores))
-                    return resultado
+                    if content and content.strip():
+                        if parsear is None:
+                            return content
+                        with METRICS.span('llm_parse', reviews=reseñas):
+                            resultado = parsear(content)
+                        if resultado is not None:
+                            return resultado
+                        motivo = 'parse'
+                    else:
+                        motivo = 'malformed'
+                        print(f"⚠️ Respuesta vacía o mal formada de la API (intento {intento + 1}/{intentos})")
                 
-                elif response.status_code == 429:  # Rate limit
-                    wait_time = 2 ** intento
-                    print(f"⏳ Rate limit alcanzado, esperando {wait_time}s...")
-                    time.sleep(wait_time)
-                    continue
+                elif self.retry_policy.reintentable(response.status_code):
+                    motivo = str(response.status_code)
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    self.circuit_breaker.registrar_fallo(retry_after)
+                    print(f"⏳ Error transitorio {response.status_code} (intento {intento + 1}/{intentos})")
                 
                 else:
                     print(f"❌ Error API: {response.status_code} - {response.text}")
                     return None
                     
             except Exception as e:
-                print(f"❌ Error en petición: {e}")
-                if intento < max_retries - 1:
-                    time.sleep(1)
+                METRICS.incr('llm_requests', status='error')
+                self.circuit_breaker.registrar_fallo()
+                print(f"❌ Error en petición (intento {intento + 1}/{intentos}): {e}")
+            finally:
+                self.usage.liberar()
+            
+            if intento < intentos - 1 and (reintentos is None or reintentos.consumir()):
+                METRICS.incr('llm_retries', reason=motivo)
+                pausa = self.retry_policy.backoff(intento, retry_after)
+                METRICS.observe('llm_backoff_seconds', pausa)
+                time.sleep(pausa)
+            else:
+                break
         
         return None
 
+    def _registrar_uso(self, datos, reseñas: int) -> Optional[str]:
+        """Contabilizar el bloque usage de una respuesta 200 y devolver su texto (None si está mal formada)"""
+        if not isinstance(datos, dict):
+            return None
+        
+        try:
+            eleccion = datos['choices'][0]
+            content = eleccion['message']['content']
+        except (KeyError, IndexError, TypeError):
+            eleccion, content = {}, None
+        
+        usage = datos.get('usage') if isinstance(datos.get('usage'), dict) else None
+        truncada = isinstance(eleccion, dict) and eleccion.get('finish_reason') == 'length'
+        coste = self.usage.registrar(usage, reseñas, truncada)
+        if usage:
+            METRICS.incr('llm_tokens', usage.get('prompt_tokens') or 0, kind='prompt')
+            METRICS.incr('llm_tokens', usage.get('completion_tokens') or 0, kind='completion')
+        METRICS.incr('llm_cost_usd', coste)
+        if truncada:
+            METRICS.incr('llm_truncated')
+        return content
+
+    def analizar_con_llm(self, review_text: str, customer_name: str, max_retries: Optional[int] = None) -> Optional[Dict]:
+        """Analizar una reseña usando el LLM (consultando antes la caché)"""
+        if self.cache is None:
+            with METRICS.span('llm_analyze', reviews=1):
+                return self._analizar_una(review_text, customer_name, max_retries)
+        
+        clave = ResultCache.make_key(self.model, review_text, customer_name)
+        resultado = self.cache.get(clave)
+        if resultado is not None:
+            METRICS.incr('llm_cache', result='hit')
+            return resultado
+        METRICS.incr('llm_cache', result='miss')
+        
+        with METRICS.span('llm_analyze', reviews=1):
+            resultado = self._analizar_una(review_text, customer_name, max_retries)
+        if resultado:
+            self.cache.put(clave, resultado)
+        return resultado
+
+    @staticmethod
+    def _parsear_respuesta(content: str) -> Optional[Dict]:
+        """Convertir la línea de respuesta en {campo: valor}; None si no tiene todos los campos"""
+        # Limpiar posibles markdown o espacios extra
+        if "```" in content:
+            lines = content.split('\n')
+            for line in lines:
+                if '|' in line and not line.strip().startswith('```'):
+                    content = line.strip()
+                    break
+        
+        content = content.strip()
+        valores = [v.strip() for v in content.split("|")]
+        
+        # Verificar que tenemos el número correcto de campos
+        if len(valores) != len(CAMPOS_ANALISIS):
+            print(f"⚠️ Respuesta incorrecta: {len(valores)} campos vs {len(CAMPOS_ANALISIS)} esperados")
+            return None
+        
+        # Crear diccionario con los resultados
+        return dict(zip(CAMPOS_ANALISIS, valores))
+
+    def _analizar_una(self, review_text: str, customer_name: str, max_retries: Optional[int] = None,
+                      reintentos: Optional[RetryBudget] = None) -> Optional[Dict]:
+        """Analizar una reseña con una petición individual al LLM, repitiéndola si la respuesta no se puede parsear"""
+        prompt = self.crear_prompt_analisis(review_text, customer_name)
+        return self._solicitar_completion(prompt, max_retries=max_retries, parsear=self._parsear_respuesta,
+                                          reintentos=reintentos)
+
+    def analizar_pack(self, reseñas: List[Tuple[str, str, str]], max_retries: Optional[int] = None,
+                      reintentos: Optional[RetryBudget] = None) -> Dict[str, Dict]:
+        """Analizar varias reseñas (id, texto, cliente) en una sola petición
+        
+        Devuelve solo las reseñas cuya línea llegó con el número correcto de campos, o
+        todas como NO_ENVIADA si la petición no se llegó a enviar.
+        """
+        prompt = self.crear_prompt_multiple(reseñas)
+        content = self._solicitar_completion(prompt, max_retries=max_retries, reseñas=len(reseñas), reintentos=reintentos)
+        
+        if content is NO_ENVIADA:
+            return {review_id: NO_ENVIADA for review_id, _, _ in reseñas}
+        if content is None:
+            return {}
+        
+        with METRICS.span('llm_parse', reviews=len(reseñas)):
+            return self._parsear_pack(content, {review_id for review_id, _, _ in reseñas})
+
+    @staticmethod
+    def _parsear_pack(content: str, ids_esperados: set) -> Dict[str, Dict]:
+        """Convertir las líneas del pack en {id: {campo: valor}}, solo ids esperados con todos los campos"""
+        resultados = {}
+        for line in content.split('\n'):
+            line = line.strip().strip('`')
+            if '|' not in line:
+                continue
+            
+            valores = [v.strip() for v in line.split("|")]
+            review_id = valores[0].strip('[]')
+            
+            if review_id not in ids_esperados or review_id in resultados:
+                continue
+            
+            if len(valores) - 1 != len(CAMPOS_ANALISIS):
+                print(f"⚠️ Respuesta incorrecta para {review_id}: {len(valores) - 1} campos vs {len(CAMPOS_ANALISIS)} esperados")
+                continue
+            
+            resultados[review_id] = dict(zip(CAMPOS_ANALISIS, valores[1:]))
+        
+        return resultados
+
+    def analizar_pack_con_division(self, reseñas: List[Tuple[str, str, str]],
+                                   reintentos: Optional[RetryBudget] = None) -> Dict[str, Optional[Dict]]:
+        """Analizar un pack y reintentar por mitades las reseñas con respuesta incompleta
+        
+        Todas las divisiones de un pack comparten los reintentos de retry_policy, de modo
+        que una reseña problemática no multiplica las peticiones por cada nivel de división.
+        """
+        if reintentos is None:
+            reintentos = RetryBudget(self.retry_policy.max_retries)
+        
+        if len(reseñas) == 1:
+            review_id, review_text, customer_name = reseñas[0]
+            return {review_id: self._analizar_una(review_text, customer_name, reintentos=reintentos)}
+        
+        resultados = self.analizar_pack(reseñas, reintentos=reintentos)
+        faltantes = [reseña for reseña in reseñas if reseña[0] not in resultados]
+        
+        if faltantes:
+            if len(faltantes) < len(reseñas):
+                print(f"⚠️ Pack incompleto: {len(reseñas) - len(faltantes)}/{len(reseñas)} líneas válidas, reintentando el resto")
+            
+            # Si el pack falló entero se divide en mitades; si falló en parte
+            # se reintentan solo las reseñas faltantes
+            mitad = (len(faltantes) + 1) // 2 if len(faltantes) == len(reseñas) else len(faltantes)
+            for i in range(0, len(faltantes), mitad):
+                # Ya se enviaron en este pack: si la división no llega a enviarse, cuentan como fallidas
+                parciales = self.analizar_pack_con_division(faltantes[i:i + mitad], reintentos)
+                resultados.update({review_id: resultado or None for review_id, resultado in parciales.items()})
+        
+        return resultados
+
+    def _analizar_grupo(self, grupo: List[Tuple]) -> Dict:
+        """Analizar un grupo de filas (idx, row) y devolver {idx: resultado}"""
+        if len(grupo) == 1:
+            idx, row = grupo[0]
+            return {idx: self.analizar_con_llm(row[self.review_text_col], row[self.customer_name_col])}
+        
+        # Identificadores cortos y estables derivados del índice del DataFrame
+        ids = {f"R{idx}": idx for idx, _ in grupo}
+        resultados = {}
+        claves = {}
+        reseñas = []
+        for idx, row in grupo:
+            review_id = f"R{idx}"
+            review_text, customer_name = row[self.review_text_col], row[self.customer_name_col]
+            
+            if self.cache is not None:
+                claves[review_id] = ResultCache.make_key(self.model, review_text, customer_name)
+                cacheado = self.cache.get(claves[review_id])
+                METRICS.incr('llm_cache', result='miss' if cacheado is None else 'hit')
+                if cacheado is not None:
+                    resultados[review_id] = cacheado
+                    continue
+            
+            reseñas.append((review_id, review_text, customer_name))
+        
+        if reseñas:
+            with METRICS.span('llm_analyze', reviews=len(reseñas)):
+                nuevos = self.analizar_pack_con_division(reseñas)
+            if self.cache is not None:
+                for review_id, resultado in nuevos.items():
+                    if resultado:
+                        self.cache.put(claves[review_id], resultado)
+            resultados.update(nuevos)
+        
+        return {ids[review_id]: resultados.get(review_id) for review_id in ids}
+
+    @staticmethod
+    def _iterar_grupos(df: pd.DataFrame, tamaño: int):
+        """Recorrer las filas del DataFrame en grupos de `tamaño` pares (idx, row)"""
+        grupo = []
+        for idx, row in df.iterrows():
+            grupo.append((idx, row))
+            if len(grupo) == tamaño:
+                yield grupo
+                grupo = []
+        if grupo:
+            yield grupo
+
+    @staticmethod
+    def _clave_checkpoint(idx, review_id) -> str:
+        """Clave de checkpoint: el review_id si existe, si no el índice de la fila"""
+        if review_id is None or review_id == 'N/A' or pd.isna(review_id):
+            return f"index:{idx}"
+        return str(review_id)
+
+    def cargar_checkpoint(self) -> Dict[str, Dict]:
+        """Leer el registro de checkpoint para reanudar"""
+        registros = self.checkpoint.load()
+        print(f"♻️ Reanudando desde {self.checkpoint.path}: {len(registros)} reseñas registradas")
+        return registros
+
+    def iniciar_dead_letter(self, resume: bool = False, retry_failed: bool = False) -> None:
+        """Preparar el registro de fallidas: vaciarlo en un análisis nuevo o cargarlo para --retry-failed
+        
+        Al reprocesar el registro se conserva hasta terminar (cerrar_dead_letter), de modo
+        que una ejecución interrumpida no pierde las fallidas que aún no se reintentaron.
+        """
+        self.recuperadas = set()
+        if retry_failed:
+            if self.dead_letter is None:
+                raise ValueError("--retry-failed requiere el registro de reseñas fallidas")
+            self.solo_claves = set(self.dead_letter.load())
+            print(f"🔁 Reprocesando {len(self.solo_claves)} reseñas fallidas de {self.dead_letter.path}")
+        elif self.dead_letter is not None and not resume:
+            self.dead_letter.reset()
+
+    def cerrar_dead_letter(self) -> None:
+        """Tras --retry-failed, dejar en el registro solo las reseñas que siguen fallando o pendientes"""
+        if self.solo_claves is None or self.dead_letter is None:
+            return
+        restantes = self.dead_letter.compactar(self.recuperadas)
+        print(f"🔁 Fallidas recuperadas: {len(self.recuperadas)}, quedan {restantes} en {self.dead_letter.path}")
+
+    def aplicar_checkpoint(self, df: pd.DataFrame, registros: Optional[Dict[str, Dict]] = None) -> pd.DataFrame:
+        """Marcar como analizadas las reseñas ya registradas en el checkpoint"""
+        if registros is None:
+            registros = self.cargar_checkpoint()
+        
+        if not registros:
+            return df
+        
+        previos = []
+        for idx, row in df[df['analyzed'] == False].iterrows():
+            registro = registros.get(self._clave_checkpoint(idx, row.get('review_id', 'N/A')))
+            if registro is not None:
+                resultado = dict(registro)
+                resultado['index'] = idx
+                previos.append(resultado)
+        
+        print(f"   - Reseñas recuperadas del checkpoint: {len(previos)}")
+        return self.actualizar_dataframe(df, previos)
+
+    def clasificar_localmente(self, df_pendientes: pd.DataFrame) -> Tuple[pd.DataFrame, List[Tuple], Dict]:
+        """Resolver en local las reseñas triviales
+
+        Devuelve (reseñas a escalar al LLM, [(idx, review_id, resultado)],
+        {idx escalado: campos fiables del nivel local, p. ej. el idioma}).
+        """
+        n = len(df_pendientes)
+        scores = df_pendientes['customer_score'] if 'customer_score' in df_pendientes.columns else [None] * n
+        review_ids = df_pendientes['review_id'] if 'review_id' in df_pendientes.columns else ['N/A'] * n
+        
+        escalar = []
+        resueltas = []
+        campos_locales = {}
+        for idx, texto, score, review_id in zip(df_pendientes.index, df_pendientes[self.review_text_col], scores, review_ids):
+            resultado, campos = self.local_classifier.clasificar_campos(texto, score)
+            if resultado is None:
+                escalar.append(idx)
+                if campos:
+                    campos_locales[idx] = campos
+            else:
+                resueltas.append((idx, review_id, resultado))
+        
+        return df_pendientes.loc[escalar], resueltas, campos_locales
+
+    def agrupar_casi_duplicados(self, df_pendientes: pd.DataFrame) -> Tuple[pd.DataFrame, Dict, List[Tuple]]:
+        """Separar las reseñas que hay que enviar al LLM de sus casi duplicados
+
+        Devuelve (reseñas a enviar, {idx representante: [(idx, review_id, nombre)]},
+        [(idx, review_id, nombre, (resultado, nombre representante))] cuyo representante ya se
+        analizó en un bloque anterior). El resultado se copia al asignar porque el índice puede
+        olvidar el representante antes de terminar el bloque.
+        """
+        indice = self.near_duplicates
+        enviar = []
+        seguidores = {}
+        previos = []
+        for idx, texto, nombre, review_id in zip(
+                df_pendientes.index, df_pendientes[self.review_text_col], df_pendientes[self.customer_name_col],
+                df_pendientes['review_id'] if 'review_id' in df_pendientes.columns else ['N/A'] * len(df_pendientes)):
+            representante = indice.asignar(idx, texto)
+            if representante is None:
+                enviar.append(idx)
+            elif representante in seguidores or representante in df_pendientes.index:
+                seguidores.setdefault(representante, []).append((idx, review_id, nombre))
+            elif representante in indice.resultados:
+                previos.append((idx, review_id, nombre, indice.resultados[representante]))
+            else:
+                # El representante falló o se recuperó del checkpoint: analizar esta reseña
+                enviar.append(idx)
+        
+        return df_pendientes.loc[enviar], seguidores, previos
+
+    @staticmethod
+    def propagar_resultado(resultado: Dict, nombre_representante, nombre) -> Dict:
+        """Copiar el análisis del representante; el género solo vale si el nombre coincide"""
+        copia = dict(resultado)
+        if normalizar_texto(nombre) != normalizar_texto(nombre_representante):
+            copia['customer_gender'] = 'unknown'
+        return copia
+
     def procesar_reseñas_batch(self, df: pd.DataFrame, batch_size: int = 10, start_index: int = 0) -> Tuple[List[Dict], List[Dict]]:
         """Procesar las reseñas en lotes"""
         # Filtrar solo reseñas no analizadas
         df_pendientes = df[df['analyzed'] == False].iloc[start_index:]
         
+        # Con --retry-failed solo se reprocesan las reseñas del registro de fallidas
+        if self.solo_claves is not None:
+            review_ids = df_pendientes['review_id'] if 'review_id' in df_pendientes.columns else ['N/A'] * len(df_pendientes)
+            df_pendientes = df_pendientes[[
+                self._clave_checkpoint(idx, review_id) in self.solo_claves
+                for idx, review_id in zip(df_pendientes.index, review_ids)
+            ]]
+        
+        if self.detenido:
+            return [], []
+        
+        # Las más prioritarias primero: si se acaba el plazo o el presupuesto, son las que quedan analizadas
+        if self.priority is not None:
+            df_pendientes = self.priority.ordenar(df_pendientes)
+        
         print(f"🤖 Iniciando análisis de {len(df_pendientes)} reseñas...")
         print(f"   - Modelo: {self.model}")
         print(f"   - Tamaño de lote: {batch_size}")
+        print(f"   - Reseñas por petición: {self.pack_size}")
+        print(f"   - Peticiones simultáneas: {self.concurrency}")
+        print(f"   - Límite de peticiones/s: {self.rate_limiter.rate if self.rate_limiter.rate > 0 else 'sin límite'}")
+        if self.priority is not None:
+            print(f"   - Prioridad: {self.priority.descripcion}")
         
-        resultados = []
-        errores = []
+        # Resultados indexados por el índice del DataFrame para devolverlos en orden
+        resultados_por_indice = {}
+        errores_por_indice = {}
+        
+        def registrar(idx, review_id, resultado: Optional[Dict]) -> None:
+            if resultado is NO_ENVIADA:
+                # Sin presupuesto o sin tiempo la reseña queda pendiente (no es un fallo): se reanuda con --resume
+                return
+            METRICS.incr('analyzer_reviews', result='ok' if resultado else 'failed')
+            if resultado:
+                resultado['index'] = idx
+                resultados_por_indice[idx] = resultado
+                if self.checkpoint is not None:
+                    self.checkpoint.append(self._clave_checkpoint(idx, review_id), resultado)
+                if self.solo_claves is not None:
+                    self.recuperadas.add(self._clave_checkpoint(idx, review_id))
+            else:
+                errores_por_indice[idx] = {
+                    'index': idx,
+                    'review_id': review_id,
+                    'error': 'No se pudo analizar'
+                }
+                if self.dead_letter is not None:
+                    self.dead_letter.append(
+                        self._clave_checkpoint(idx, review_id), review_id,
+                        df_pendientes.at[idx, self.review_text_col], df_pendientes.at[idx, self.customer_name_col],
+                        'No se pudo analizar'
+                    )
         
-        # Procesar en lotes con barra de progreso
-        for i in tqdm(range(0, len(df_pendientes), batch_size), desc="Procesando lotes"):
-            batch = df_pendientes.iloc[i:i+batch_size]
+        df_enviar = df_pendientes
+        if self.local_classifier is not None:
+            df_enviar, resueltas, campos_locales = self.clasificar_localmente(df_pendientes)
+            for idx, review_id, resultado in resueltas:
+                registrar(idx, review_id, resultado)
+            METRICS.incr('analyzer_routed', len(resueltas), route='local')
             
-            for idx, row in batch.iterrows():
-                resultado = self.analizar_con_llm(
-                    row[self.review_text_col], 
-                    row[self.customer_name_col]
-                )
+            print(f"🏠 Clasificador local: {len(resueltas)} de {len(df_pendientes)} reseñas resueltas sin LLM "
+                  f"({len(df_enviar) / len(df_pendientes) * 100 if len(df_pendientes) else 0:.1f}% escaladas, "
+                  f"idioma local en {len(campos_locales)})")
+            
+            if campos_locales:
+                registrar_escalada = registrar
                 
+                def registrar(idx, review_id, resultado: Optional[Dict]) -> None:
+                    # El idioma local solo sustituye a un "unknown" o a un código no válido del LLM
+                    if resultado and idx in campos_locales and resultado.get('language') not in IDIOMAS_VALIDOS:
+                        resultado.update(campos_locales[idx])
+                    registrar_escalada(idx, review_id, resultado)
+        
+        if self.near_duplicates is not None:
+            df_enviar, seguidores, previos = self.agrupar_casi_duplicados(df_enviar)
+            registrar_reseña = registrar
+            
+            def registrar(idx, review_id, resultado: Optional[Dict]) -> None:
+                # Registrar el representante y repartir su análisis entre sus casi duplicados
+                registrar_reseña(idx, review_id, resultado)
+                nombre_representante = df_pendientes.at[idx, self.customer_name_col]
                 if resultado:
-                    resultado['index'] = idx
-                    resultados.append(resultado)
-                else:
-                    errores.append({
-                        'index': idx,
-                        'review_id': row.get('review_id', 'N/A'),
-                        'error': 'No se pudo analizar'
-                    })
-                
-                # Pausa entre peticiones
-                time.sleep(0.5)
+                    resultado = {k: v for k, v in resultado.items() if k != 'index'}
+                    self.near_duplicates.guardar_resultado(idx, (resultado, nombre_representante))
+                for idx_seguidor, review_id_seguidor, nombre in seguidores.pop(idx, ()):
+                    # Los seguidores de un representante no enviado también quedan pendientes
+                    copia = self.propagar_resultado(resultado, nombre_representante, nombre) if resultado else resultado
+                    registrar_reseña(idx_seguidor, review_id_seguidor, copia)
+            
+            for idx, review_id, nombre, (resultado, nombre_representante) in previos:
+                registrar_reseña(idx, review_id, self.propagar_resultado(resultado, nombre_representante, nombre))
             
-            # Pausa entre lotes
-            if i + batch_size < len(df_pendientes):
-                print(f"✅ Lote completado. Esperando antes del siguiente...")
-                time.sleep(2)
+            evitadas = len(previos) + sum(len(grupo) for grupo in seguidores.values())
+            candidatas = len(df_enviar) + evitadas
+            METRICS.incr('analyzer_routed', evitadas, route='near_duplicate')
+            print(f"🧬 Casi duplicados (umbral {self.near_duplicates.threshold}): {evitadas} de {candidatas} "
+                  f"reseñas reutilizan el análisis de su representante "
+                  f"({evitadas / candidatas * 100 if candidatas else 0:.1f}% menos llamadas al LLM)")
+        
+        METRICS.incr('analyzer_routed', len(df_enviar), route='llm')
+        try:
+            if self.concurrency == 1:
+                # Procesar en lotes con barra de progreso
+                for i in tqdm(range(0, len(df_enviar), batch_size), desc="Procesando lotes"):
+                    if self.detenido:
+                        break
+                    batch = df_enviar.iloc[i:i+batch_size]
+                    
+                    for grupo in self._iterar_grupos(batch, self.pack_size):
+                        if self.detenido:
+                            break
+                        resultados_grupo = self._analizar_grupo(grupo)
+                        for idx, row in grupo:
+                            registrar(idx, row.get('review_id', 'N/A'), resultados_grupo.get(idx))
+            else:
+                self._procesar_concurrente(df_enviar, registrar)
+        finally:
+            if self.checkpoint is not None:
+                self.checkpoint.flush()
+        
+        resultados = [resultados_por_indice[idx] for idx in df_pendientes.index if idx in resultados_por_indice]
+        errores = [errores_por_indice[idx] for idx in df_pendientes.index if idx in errores_por_indice]
         
         return resultados, errores
 
+    def iniciar_plazo(self) -> None:
+        """Empezar a contar el tiempo máximo de la ejecución (deadline)"""
+        self.plazo_agotado = False
+        self.fin_plazo = time.monotonic() + self.deadline if self.deadline else None
+        if self.fin_plazo is not None:
+            print(f"⏰ Tiempo máximo de análisis: {self.deadline:g}s")
+
+    def plazo_vencido(self) -> bool:
+        if self.fin_plazo is None or time.monotonic() < self.fin_plazo:
+            return False
+        if not self.plazo_agotado:
+            self.plazo_agotado = True
+            print(f"⏰ Plazo de {self.deadline:g}s agotado: no se envían más peticiones")
+        return True
+
+    @property
+    def detenido(self) -> bool:
+        """Presupuesto o plazo agotado: no se analizan más reseñas en esta ejecución"""
+        return self.usage.agotado or self.plazo_vencido()
+
+    def _procesar_concurrente(self, df_pendientes: pd.DataFrame, registrar) -> None:
+        """Analizar reseñas en paralelo con un máximo de `concurrency` peticiones en vuelo"""
+        grupos = self._iterar_grupos(df_pendientes, self.pack_size)
+        en_vuelo = {}
+        agotado = False
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor, \
+                tqdm(total=len(df_pendientes), desc="Analizando reseñas") as barra:
+            while True:
+                # Rellenar la ventana de peticiones sin encolar todo el DataFrame
+                while not agotado and not self.detenido and len(en_vuelo) < self.concurrency:
+                    try:
+                        grupo = next(grupos)
+                    except StopIteration:
+                        agotado = True
+                        break
+                    
+                    futuro = executor.submit(self._analizar_grupo, grupo)
+                    en_vuelo[futuro] = grupo
+                
+                if not en_vuelo:
+                    break
+                
+                terminados, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    grupo = en_vuelo.pop(futuro)
+                    try:
+                        resultados_grupo = futuro.result()
+                    except Exception as e:
+                        print(f"❌ Error analizando lote de {len(grupo)} reseñas: {e}")
+                        resultados_grupo = {}
+                    for idx, row in grupo:
+                        registrar(idx, row.get('review_id', 'N/A'), resultados_grupo.get(idx))
+                    barra.update(len(grupo))
+
     def actualizar_dataframe(self, df: pd.DataFrame, resultados: List[Dict]) -> pd.DataFrame:
         """Actualizar el DataFrame con los resultados del análisis"""
         # Inicializar las columnas si no existen
@@ -255,101 +1075,419 @@ Ejemplo: es|Positivo|0.8|joy|4|femenino|Atención al cliente|excelente,servicio,
         if 'analyzed' not in df.columns:
             df['analyzed'] = False
         
-        # Actualizar con los resultados
-        for resultado in resultados:
-            idx = resultado['index']
+        # Materializar los resultados en un DataFrame columnar indexado por fila
+        df_resultados = None
+        if resultados:
+            df_resultados = pd.DataFrame.from_records(resultados, index='index')
+            df_resultados = df_resultados[~df_resultados.index.duplicated(keep='last')]
+        
+        # Actualizar cada campo con una única asignación vectorizada
+        for campo in CAMPOS_ANALISIS:
+            columna = tipar_campo(df[campo], campo)
             
-            # Actualizar cada campo
-            for campo in CAMPOS_ANALISIS:
-                if campo in resultado:
-                    df.loc[idx, campo] = resultado[campo]
+            if df_resultados is not None and campo in df_resultados.columns:
+                columna.loc[df_resultados.index] = tipar_campo(df_resultados[campo], campo)
             
-            # Marcar como analizado
-            df.loc[idx, 'analyzed'] = True
+            if campo in CAMPOS_CATEGORICOS:
+                columna = columna.astype('category')
+            df[campo] = columna
+        
+        # Marcar como analizado
+        if df_resultados is not None:
+            df.loc[df_resultados.index, 'analyzed'] = True
         
         return df
 
-    def guardar_resultados(self, df: pd.DataFrame, filename_base: str = 'trustpilot_analyzed') -> str:
+    def guardar_resultados(self, df: pd.DataFrame, filename_base: str = 'trustpilot_analyzed',
+                           output_format: str = 'csv') -> str:
         """Guardar los resultados del análisis"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{filename_base}_{timestamp}.csv"
+        filename = None
         
-        df.to_csv(filename, index=False, encoding='utf-8-sig')
-        print(f"💾 Resultados guardados en: {filename}")
+        if output_format in ('csv', 'both'):
+            filename = f"{filename_base}_{timestamp}.csv"
+            df.to_csv(filename, index=False, encoding='utf-8-sig')
+            print(f"💾 Resultados guardados en: {filename}")
+            
+            # También guardar un backup del último estado
+            latest_filename = f"{filename_base}_latest.csv"
+            shutil.copyfile(filename, latest_filename)
+            print(f"💾 Backup guardado en: {latest_filename}")
         
-        # También guardar un backup del último estado
-        latest_filename = f"{filename_base}_latest.csv"
-        df.to_csv(latest_filename, index=False, encoding='utf-8-sig')
-        print(f"💾 Backup guardado en: {latest_filename}")
+        if output_format in ('parquet', 'both'):
+            directorio = guardar_parquet(df, f"{filename_base}_{timestamp}.parquet")
+            print(f"💾 Dataset Parquet guardado en: {directorio}")
+            filename = filename or directorio
         
         return filename
 
-    def generar_estadisticas(self, df: pd.DataFrame) -> None:
+    def contar_estadisticas(self, df: pd.DataFrame) -> Dict:
+        """Calcular los conteos usados por generar_estadisticas"""
+        analizadas = df[df['analyzed'] == True]
+        conteos = {'total': len(analizadas)}
+        
+        for campo in ('sentiment', 'main_topic', 'tourist_type', 'emotion'):
+            if campo in df.columns:
+                valores = analizadas[campo]
+                if isinstance(valores.dtype, pd.CategoricalDtype):
+                    valores = valores.astype(object)
+                conteos[campo] = valores.value_counts()
+        
+        return conteos
+
+    @staticmethod
+    def acumular_estadisticas(acumulado: Dict, conteos: Dict) -> Dict:
+        """Sumar los conteos de un bloque a los acumulados"""
+        for campo, valor in conteos.items():
+            if campo not in acumulado:
+                acumulado[campo] = valor
+            elif campo == 'total':
+                acumulado[campo] += valor
+            else:
+                acumulado[campo] = acumulado[campo].add(valor, fill_value=0).astype(int)
+        return acumulado
+
+    def generar_estadisticas(self, df: Optional[pd.DataFrame], conteos: Optional[Dict] = None) -> None:
         """Generar y mostrar estadísticas del análisis"""
+        if conteos is None:
+            conteos = self.contar_estadisticas(df)
+        
         print("\n📈 Estadísticas del análisis:")
         
-        total_analizadas = df['analyzed'].sum()
+        total_analizadas = conteos['total']
         print(f"   - Total de reseñas analizadas: {total_analizadas}")
         
         if total_analizadas > 0:
-            if 'sentiment' in df.columns:
-                sentiments = df[df['analyzed'] == True]['sentiment'].value_counts().to_dict()
+            if 'sentiment' in conteos:
+                sentiments = conteos['sentiment'].sort_values(ascending=False, kind='stable').to_dict()
                 print(f"   - Sentimientos: {sentiments}")
             
-            if 'main_topic' in df.columns:
-                topics = df[df['analyzed'] == True]['main_topic'].value_counts().head(5).to_dict()
+            if 'main_topic' in conteos:
+                topics = conteos['main_topic'].sort_values(ascending=False, kind='stable').head(5).to_dict()
                 print(f"   - Top 5 temas: {topics}")
             
-            if 'tourist_type' in df.columns:
-                tourist_types = df[df['analyzed'] == True]['tourist_type'].value_counts().head(3).to_dict()
+            if 'tourist_type' in conteos:
+                tourist_types = conteos['tourist_type'].sort_values(ascending=False, kind='stable').head(3).to_dict()
                 print(f"   - Tipos de turista: {tourist_types}")
             
-            if 'emotion' in df.columns:
-                emotions = df[df['analyzed'] == True]['emotion'].value_counts().to_dict()
+            if 'emotion' in conteos:
+                emotions = conteos['emotion'].sort_values(ascending=False, kind='stable').to_dict()
                 print(f"   - Emociones: {emotions}")
+        
+        if self.usage.peticiones:
+            print("\n💰 Consumo del LLM:")
+            self.usage.report()
+            if self.usage.agotado:
+                print("   - Presupuesto agotado: las reseñas sin analizar quedan pendientes (reanudar con --resume)")
+        
+        if self.plazo_agotado:
+            print(f"\n⏰ Plazo de {self.deadline:g}s agotado: las reseñas sin analizar quedan pendientes (reanudar con --resume)")
 
-    def analizar(self, csv_path: str, batch_size: int = DEFAULT_BATCH_SIZE, max_reviews: Optional[int] = None) -> Tuple[pd.DataFrame, List[Dict]]:
+    def _imprimir_resumen(self, errores: List[Dict]) -> None:
+        """Mostrar los errores y el resumen de caché, niveles, conexiones y reintentos de la ejecución"""
+        if errores:
+            print("❌ Errores encontrados:")
+            for error in errores[:5]:  # Mostrar solo los primeros 5 errores
+                print(f"   - {error}")
+        
+        if self.cache is not None:
+            total_consultas = self.cache.hits + self.cache.misses
+            tasa = self.cache.hits / total_consultas * 100 if total_consultas else 0
+            print(f"   - Caché: {self.cache.hits} aciertos, {self.cache.misses} fallos ({tasa:.1f}% aciertos)")
+        if self.local_classifier is not None:
+            print(f"   - Clasificador local: {self.local_classifier.resueltas} de {self.local_classifier.textos} reseñas resueltas "
+                  f"({self.local_classifier.tasa_escalado * 100:.1f}% escaladas al LLM)")
+        if self.near_duplicates is not None:
+            print(f"   - Casi duplicados: {self.near_duplicates.agrupados} de {self.near_duplicates.textos} reseñas "
+                  f"({self.near_duplicates.tasa_agrupados * 100:.1f}% de llamadas al LLM evitadas)")
+        self.client.report()
+        if self.circuit_breaker.aperturas:
+            print(f"   - Circuit breaker: {self.circuit_breaker.aperturas} aperturas, "
+                  f"{self.circuit_breaker.tiempo_pausado:.0f}s de pausa (suma de workers)")
+        if self.dead_letter is not None and errores:
+            print(f"   - Reseñas fallidas en {self.dead_letter.path}: reprocesar con --retry-failed")
+
+    def analizar(self, csv_path: str, batch_size: int = DEFAULT_BATCH_SIZE, max_reviews: Optional[int] = None,
+                 start_index: int = 0, resume: bool = False, output_format: str = 'csv',
+                 columns: Optional[List[str]] = None, retry_failed: bool = False) -> Tuple[pd.DataFrame, List[Dict]]:
         """Función principal para analizar las reseñas"""
         # Cargar datos
-        df = self.cargar_datos(csv_path)
+        df = self.cargar_datos(csv_path, columns)
         
         # Limitar número de reseñas si se especifica
         if max_reviews:
             df = df.head(max_reviews)
             print(f"📊 Limitando análisis a {max_reviews} reseñas")
         
+        # Reanudar desde el checkpoint o empezar uno nuevo (al reprocesar fallidas se sigue añadiendo)
+        self.iniciar_dead_letter(resume, retry_failed)
+        self.iniciar_plazo()
+        if self.checkpoint is not None:
+            if resume:
+                df = self.aplicar_checkpoint(df)
+            elif not retry_failed:
+                self.checkpoint.reset()
+        
         # Procesar reseñas
-        resultados, errores = self.procesar_reseñas_batch(df, batch_size)
+        resultados, errores = self.procesar_reseñas_batch(df, batch_size, start_index)
+        self.cerrar_dead_letter()
         
         # Actualizar DataFrame
         print(f"\n✅ Análisis completado:")
         print(f"   - Reseñas analizadas exitosamente: {len(resultados)}")
         print(f"   - Errores: {len(errores)}")
         
-        if errores:
-            print("❌ Errores encontrados:")
-            for error in errores[:5]:  # Mostrar solo los primeros 5 errores
-                print(f"   - {error}")
+        self._imprimir_resumen(errores)
         
         df_actualizado = self.actualizar_dataframe(df, resultados)
         
         # Guardar resultados
-        filename = self.guardar_resultados(df_actualizado)
+        self.guardar_resultados(df_actualizado, output_format=output_format)
         
         # Mostrar estadísticas
         self.generar_estadisticas(df_actualizado)
         
         return df_actualizado, errores
 
+    def analizar_streaming(self, csv_path: str, batch_size: int = DEFAULT_BATCH_SIZE, max_reviews: Optional[int] = None,
+                           start_index: int = 0, resume: bool = False, chunksize: int = DEFAULT_CHUNKSIZE,
+                           filename_base: str = 'trustpilot_analyzed', output_format: str = 'csv',
+                           columns: Optional[List[str]] = None, retry_failed: bool = False) -> Tuple[Optional[str], List[Dict]]:
+        """Analizar el CSV por bloques sin cargarlo entero en memoria
+        
+        Cada bloque se limpia, se analiza y se añade al CSV de salida antes de
+        leer el siguiente, de modo que la memoria no depende del tamaño del archivo.
+        """
+        print(f"📂 Leyendo datos por bloques de {chunksize} filas desde: {csv_path}")
+        
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"El archivo {csv_path} no existe")
+        
+        if es_parquet(csv_path):
+            bloques = iterar_parquet(csv_path, columns, chunksize)
+        else:
+            bloques = pd.read_csv(csv_path, encoding='utf-8-sig', chunksize=chunksize, usecols=columns)
+        
+        return self.analizar_bloques(
+            bloques,
+            batch_size=batch_size,
+            max_reviews=max_reviews,
+            start_index=start_index,
+            resume=resume,
+            filename_base=filename_base,
+            output_format=output_format,
+            retry_failed=retry_failed
+        )
+    
+    def analizar_bloques(self, bloques: Iterable[pd.DataFrame], batch_size: int = DEFAULT_BATCH_SIZE,
+                         max_reviews: Optional[int] = None, start_index: int = 0, resume: bool = False,
+                         filename_base: str = 'trustpilot_analyzed', output_format: str = 'csv',
+                         al_escribir: Optional[Callable[[pd.DataFrame], None]] = None,
+                         retry_failed: bool = False) -> Tuple[Optional[str], List[Dict]]:
+        """Analizar una secuencia de bloques de reseñas escribiendo cada uno al terminarlo
+        
+        Los bloques pueden venir de un CSV leído por partes o de otra etapa (p. ej. el
+        scraper en el pipeline); sus índices deben ser continuos entre bloques.
+        al_escribir se llama con cada bloque ya guardado.
+        """
+        # Reanudar desde el checkpoint o empezar uno nuevo (al reprocesar fallidas se sigue añadiendo)
+        self.iniciar_dead_letter(resume, retry_failed)
+        self.iniciar_plazo()
+        registros = None
+        if self.checkpoint is not None:
+            if resume:
+                registros = self.cargar_checkpoint()
+            elif not retry_failed:
+                self.checkpoint.reset()
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{filename_base}_{timestamp}.csv"
+        directorio_parquet = f"{filename_base}_{timestamp}.parquet"
+        escribir_csv = output_format in ('csv', 'both')
+        escribir_parquet = output_format in ('parquet', 'both')
+        
+        total_leidas = 0
+        total_limpias = 0
+        total_resultados = 0
+        saltos_pendientes = start_index
+        errores = []
+        conteos = {}
+        escrito = False
+        
+        for n_bloque, chunk in enumerate(bloques):
+            chunk.columns = chunk.columns.str.strip()
+            
+            if self.review_text_col is None and not self.detectar_columnas(chunk):
+                raise ValueError("No se pudieron detectar las columnas necesarias")
+            
+            total_leidas += len(chunk)
+            chunk = self.limpiar_datos(chunk)
+            
+            # Limitar número de reseñas si se especifica
+            if max_reviews:
+                chunk = chunk.head(max_reviews - total_limpias)
+            total_limpias += len(chunk)
+            
+            if registros:
+                chunk = self.aplicar_checkpoint(chunk, registros)
+            
+            # Aplicar start_index sobre las reseñas pendientes de todo el archivo
+            pendientes = int((chunk['analyzed'] == False).sum())
+            salto = min(saltos_pendientes, pendientes)
+            saltos_pendientes -= salto
+            
+            resultados, errores_chunk = self.procesar_reseñas_batch(chunk, batch_size, salto)
+            chunk = self.actualizar_dataframe(chunk, resultados)
+            total_resultados += len(resultados)
+            errores.extend(errores_chunk)
+            
+            # Escribir el bloque (la cabecera y el BOM solo en el primero)
+            if escribir_csv:
+                chunk.to_csv(
+                    filename,
+                    mode='a' if escrito else 'w',
+                    header=not escrito,
+                    index=False,
+                    encoding='utf-8' if escrito else 'utf-8-sig'
+                )
+            if escribir_parquet:
+                guardar_parquet(chunk, directorio_parquet, basename=f"part-{n_bloque:05d}", sobrescribir=False)
+            escrito = True
+            if al_escribir is not None:
+                al_escribir(chunk)
+            
+            self.acumular_estadisticas(conteos, self.contar_estadisticas(chunk))
+            
+            if max_reviews and total_limpias >= max_reviews:
+                print(f"📊 Limitando análisis a {max_reviews} reseñas")
+                break
+        
+        self.cerrar_dead_letter()
+        
+        print("\n✅ Análisis completado:")
+        print(f"   - Reseñas leídas: {total_leidas}")
+        print(f"   - Reseñas después de limpieza: {total_limpias}")
+        print(f"   - Reseñas analizadas exitosamente: {total_resultados}")
+        print(f"   - Errores: {len(errores)}")
+        
+        self._imprimir_resumen(errores)
+        
+        if not escrito:
+            print("⚠️ El archivo no contiene reseñas")
+            return None, errores
+        
+        if escribir_csv:
+            print(f"💾 Resultados guardados en: {filename}")
+            latest_filename = f"{filename_base}_latest.csv"
+            shutil.copyfile(filename, latest_filename)
+            print(f"💾 Backup guardado en: {latest_filename}")
+        
+        if escribir_parquet:
+            print(f"💾 Dataset Parquet guardado en: {directorio_parquet}")
+            if not escribir_csv:
+                filename = directorio_parquet
+        
+        # Mostrar estadísticas
+        self.generar_estadisticas(None, conteos)
+        
+        return filename, errores
+
 
-def main():
-    """Función principal del script"""
-    parser = argparse.ArgumentParser(description='Análisis automatizado de reseñas TrustPilot')
-    parser.add_argument('csv_file', help='Archivo CSV con las reseñas a analizar')
+def crear_usage_tracker(args) -> UsageTracker:
+    """UsageTracker con el presupuesto y los precios de la línea de comandos"""
+    precios = None
+    if args.price_prompt is not None or args.price_completion is not None:
+        precios = (args.price_prompt or 0.0, args.price_completion or 0.0)
+    usage = UsageTracker(args.model, budget=args.budget, precios=precios)
+    if args.budget is not None:
+        print(f"💰 Presupuesto: ${args.budget:.4f}")
+        if usage.precios is None:
+            print(f"⚠️ Precio de {args.model} desconocido: el presupuesto solo cuenta el coste que informe la API "
+                  f"(usa --price-prompt/--price-completion)")
+    return usage
+
+
+def add_analyzer_arguments(parser: argparse.ArgumentParser) -> None:
+    """Opciones del analizador compartidas por trustpilot_analysis.py y trustpilot_pipeline.py"""
     parser.add_argument('--api-key', help='API Key de OpenRouter (o usar variable OPENROUTER_API_KEY)')
     parser.add_argument('--model', default=DEFAULT_MODEL, help=f'Modelo a usar (default: {DEFAULT_MODEL})')
     parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help=f'Tamaño del lote (default: {DEFAULT_BATCH_SIZE})')
     parser.add_argument('--max-reviews', type=int, help='Máximo número de reseñas a analizar (opcional)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help=f'Máximo de peticiones simultáneas al LLM (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--rps', type=float, default=DEFAULT_RPS, help=f'Máximo de peticiones por segundo, 0 = sin límite (default: {DEFAULT_RPS})')
+    parser.add_argument('--pack-size', type=int, default=DEFAULT_PACK_SIZE, help=f'Reseñas analizadas por petición al LLM (default: {DEFAULT_PACK_SIZE})')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f'Archivo SQLite de caché de resultados (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-cache', action='store_true', help='Desactivar la caché de resultados')
+    parser.add_argument('--cache-max-age-days', type=float, default=DEFAULT_CACHE_MAX_AGE_DAYS, help=f'Antigüedad máxima de las entradas de caché en días (default: {DEFAULT_CACHE_MAX_AGE_DAYS})')
+    parser.add_argument('--cache-max-entries', type=int, default=DEFAULT_CACHE_MAX_ENTRIES, help=f'Máximo de entradas en la caché (default: {DEFAULT_CACHE_MAX_ENTRIES})')
+    parser.add_argument('--near-dup-threshold', type=float, default=0, help=f'Similitud (0-1) para agrupar reseñas casi duplicadas y analizar solo una por grupo, 0 = desactivado (recomendado: {DEFAULT_SIMILARITY_THRESHOLD})')
+    parser.add_argument('--near-dup-max-entries', type=int, default=DEFAULT_MAX_REPRESENTATIVES, help=f'Máximo de representantes de casi duplicados en memoria; se olvidan los menos usados (default: {DEFAULT_MAX_REPRESENTATIVES})')
+    parser.add_argument('--local-tier', action='store_true', help='Resolver en local (sin LLM) las reseñas cortas de 1 o 5 estrellas con idioma claro')
+    parser.add_argument('--local-max-words', type=int, default=DEFAULT_MAX_WORDS, help=f'Máximo de palabras de una reseña resuelta en local (default: {DEFAULT_MAX_WORDS})')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT_PATH, help=f'Registro JSONL de reseñas analizadas (default: {DEFAULT_CHECKPOINT_PATH})')
+    parser.add_argument('--no-checkpoint', action='store_true', help='No escribir registro de checkpoint')
+    parser.add_argument('--dead-letter', default=DEFAULT_DEAD_LETTER_PATH, help=f'Registro JSONL de reseñas fallidas, reprocesables con trustpilot_analysis.py --retry-failed (default: {DEFAULT_DEAD_LETTER_PATH})')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES, help=f'Reintentos por petición ante 429, 5xx, timeouts o respuestas mal formadas (default: {DEFAULT_MAX_RETRIES})')
+    parser.add_argument('--max-backoff', type=float, default=DEFAULT_MAX_BACKOFF, help=f'Pausa máxima entre reintentos en segundos (default: {DEFAULT_MAX_BACKOFF})')
+    parser.add_argument('--breaker-threshold', type=int, default=DEFAULT_BREAKER_THRESHOLD, help=f'Fallos seguidos que pausan todas las peticiones (default: {DEFAULT_BREAKER_THRESHOLD})')
+    parser.add_argument('--breaker-cooldown', type=float, default=DEFAULT_BREAKER_COOLDOWN, help=f'Segundos de pausa al abrirse el circuit breaker (default: {DEFAULT_BREAKER_COOLDOWN})')
+    parser.add_argument('--output-format', choices=FORMATOS_SALIDA, default='csv', help='Formato de salida: csv, parquet (particionado por dominio y fecha) o both (default: csv)')
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE, help=f'Conexiones keep-alive en el pool HTTP, como mínimo --concurrency (default: {DEFAULT_POOL_SIZE})')
+    parser.add_argument('--http2', action='store_true', help='Usar HTTP/2 multiplexado (requiere httpx[http2])')
+    parser.add_argument('--api-url', default=OPENROUTER_API_URL, help='Endpoint de chat completions (útil para probar contra un servidor local)')
+    parser.add_argument('--budget', type=float, help='Coste máximo en USD: al alcanzarlo no se envían más peticiones y las reseñas restantes quedan pendientes')
+    parser.add_argument('--priority', help=f'Analizar primero por estos criterios, separados por comas: {", ".join(CRITERIOS_PRIORIDAD)} o una columna (-columna = de mayor a menor)')
+    parser.add_argument('--deadline', type=float, help='Tiempo máximo en segundos: al vencer se guardan los resultados y el resto queda pendiente')
+    parser.add_argument('--price-prompt', type=float, help='Precio en USD por millón de tokens de prompt (por defecto el del modelo, si se conoce)')
+    parser.add_argument('--price-completion', type=float, help='Precio en USD por millón de tokens de completion (por defecto el del modelo, si se conoce)')
+    parser.add_argument('--metrics-file', help='Guardar contadores e histogramas en este archivo de texto de Prometheus')
+    parser.add_argument('--trace-file', help='Añadir los spans de cada petición al LLM (petición, parseo, reintentos) a este JSON-lines')
+
+
+def build_analyzer(args) -> TrustPilotAnalyzer:
+    """Crear el analizador, su caché y sus registros a partir de las opciones de add_analyzer_arguments"""
+    # Abrir caché de resultados
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.cache, max_age_days=args.cache_max_age_days, max_entries=args.cache_max_entries)
+        print(f"💾 Caché de resultados: {args.cache}")
+    
+    checkpoint = None if args.no_checkpoint else CheckpointLog(args.checkpoint)
+    
+    return TrustPilotAnalyzer(
+        args.api_key or os.getenv('OPENROUTER_API_KEY'),
+        args.model,
+        concurrency=args.concurrency,
+        rps=args.rps,
+        api_url=args.api_url,
+        pack_size=args.pack_size,
+        cache=cache,
+        checkpoint=checkpoint,
+        near_duplicates=(NearDuplicateIndex(args.near_dup_threshold, max_representantes=args.near_dup_max_entries)
+                         if args.near_dup_threshold > 0 else None),
+        local_classifier=LocalClassifier(args.local_max_words) if args.local_tier else None,
+        pool_size=args.pool_size,
+        http2=args.http2,
+        retry_policy=RetryPolicy(args.max_retries, max_backoff=args.max_backoff),
+        circuit_breaker=CircuitBreaker(args.breaker_threshold, args.breaker_cooldown),
+        dead_letter=DeadLetterQueue(args.dead_letter),
+        usage=crear_usage_tracker(args),
+        priority=PriorityScheduler(args.priority) if args.priority else None,
+        deadline=args.deadline
+    )
+
+
+def main():
+    """Función principal del script"""
+    parser = argparse.ArgumentParser(description='Análisis automatizado de reseñas TrustPilot')
+    parser.add_argument('csv_file', help='Archivo CSV (o archivo/directorio Parquet) con las reseñas a analizar')
+    add_analyzer_arguments(parser)
+    parser.add_argument('--resume', action='store_true', help='Reanudar omitiendo las reseñas presentes en el checkpoint')
+    parser.add_argument('--retry-failed', action='store_true', help='Reprocesar solo las reseñas del registro de fallidas')
+    parser.add_argument('--start-index', type=int, default=0, help='Posición entre las reseñas pendientes desde la que empezar (default: 0)')
+    parser.add_argument('--stream', action='store_true', help='Leer y escribir el CSV por bloques para mantener la memoria acotada')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help=f'Filas por bloque en modo --stream (default: {DEFAULT_CHUNKSIZE})')
+    parser.add_argument('--columns', help='Columnas a leer, separadas por comas (proyección; por defecto todas)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Modo verbose')
     
     args = parser.parse_args()
@@ -369,20 +1507,47 @@ def main():
     print("🚀 Iniciando análisis de reseñas TrustPilot")
     print(f"📄 Archivo: {args.csv_file}")
     print(f"🤖 Modelo: {args.model}")
+    print(f"⚡ Concurrencia: {args.concurrency} | Peticiones/s: {args.rps}")
+    
+    if args.metrics_file or args.trace_file:
+        METRICS.configure(trace_path=args.trace_file)
     
     try:
         # Crear analizador
-        analyzer = TrustPilotAnalyzer(api_key, args.model)
+        analyzer = build_analyzer(args)
         
-        # Ejecutar análisis
-        df_resultado, errores = analyzer.analizar(
-            csv_path=args.csv_file,
-            batch_size=args.batch_size,
-            max_reviews=args.max_reviews
-        )
+        columnas = [c.strip() for c in args.columns.split(',')] if args.columns else None
         
-        print(f"\n🎉 Análisis completado exitosamente!")
-        print(f"📊 Total de reseñas procesadas: {df_resultado['analyzed'].sum()}")
+        # Ejecutar análisis
+        if args.stream:
+            filename, errores = analyzer.analizar_streaming(
+                csv_path=args.csv_file,
+                batch_size=args.batch_size,
+                max_reviews=args.max_reviews,
+                start_index=args.start_index,
+                resume=args.resume,
+                chunksize=args.chunksize,
+                output_format=args.output_format,
+                columns=columnas,
+                retry_failed=args.retry_failed
+            )
+            
+            print("\n🎉 Análisis completado exitosamente!")
+            print(f"📁 Archivo de resultados: {filename}")
+        else:
+            df_resultado, errores = analyzer.analizar(
+                csv_path=args.csv_file,
+                batch_size=args.batch_size,
+                max_reviews=args.max_reviews,
+                start_index=args.start_index,
+                resume=args.resume,
+                output_format=args.output_format,
+                columns=columnas,
+                retry_failed=args.retry_failed
+            )
+            
+            print(f"\n🎉 Análisis completado exitosamente!")
+            print(f"📊 Total de reseñas procesadas: {df_resultado['analyzed'].sum()}")
         
         if errores:
             print(f"⚠️ Se encontraron {len(errores)} errores durante el proceso")
@@ -390,6 +1555,8 @@ def main():
     except Exception as e:
         print(f"❌ Error durante el análisis: {e}")
         sys.exit(1)
+    finally:
+        METRICS.export(args.metrics_file)
 
 
 if __name__ == "__main__":
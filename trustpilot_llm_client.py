@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+TrustPilot LLM Client
+Cliente HTTP compartido por los workers del analizador: pool de conexiones keep-alive,
+HTTP/2 opcional (httpx), histogramas de latencia de conexión, primer byte y total y
+contabilidad de tokens y coste
+"""
+
+import bisect
+import math
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BASE_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 60.0
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 30.0
+
+DEFAULT_MAX_TOKENS = 500
+DEFAULT_MIN_TOKENS = 64
+# Observaciones necesarias antes de ajustar max_tokens y margen sobre la mayor observada
+MIN_OBSERVACIONES_TOKENS = 20
+MARGEN_TOKENS = 1.5
+
+# Precio en USD por millón de tokens (prompt, completion) en OpenRouter; con
+# --price-prompt/--price-completion se usan otros precios
+PRECIOS_MODELOS = {
+    "google/gemini-2.5-flash": (0.30, 2.50),
+    "google/gemini-2.5-flash-lite": (0.10, 0.40),
+    "google/gemini-2.0-flash-001": (0.10, 0.40),
+    "openai/gpt-4o-mini": (0.15, 0.60),
+    "openai/gpt-4.1-mini": (0.40, 1.60),
+    "anthropic/claude-3.5-haiku": (0.80, 4.00),
+    "meta-llama/llama-3.1-8b-instruct": (0.02, 0.03),
+}
+
+# Códigos HTTP que indican un fallo transitorio del proveedor
+ESTADOS_REINTENTABLES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# Límites superiores (segundos) de los buckets de los histogramas de latencia
+LIMITES_LATENCIA = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+
+def _importar_httpx():
+    """Importar httpx solo cuando se pide HTTP/2 (dependencia opcional)"""
+    try:
+        import httpx
+        import h2  # noqa: F401
+    except ImportError:
+        raise ImportError("HTTP/2 requiere httpx con soporte h2: pip install 'httpx[http2]'")
+    return httpx
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Segundos indicados en una cabecera Retry-After (número o fecha HTTP)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Reintentos con backoff exponencial y jitter completo, respetando Retry-After"""
+
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES, base: float = DEFAULT_BASE_BACKOFF,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF):
+        self.max_retries = max(0, max_retries)
+        self.base = base
+        self.max_backoff = max_backoff
+
+    @property
+    def intentos(self) -> int:
+        return self.max_retries + 1
+
+    @staticmethod
+    def reintentable(status: int) -> bool:
+        return status in ESTADOS_REINTENTABLES
+
+    def backoff(self, intento: int, retry_after: Optional[float] = None) -> float:
+        """Pausa antes del reintento número intento (0 = primer reintento)"""
+        pausa = random.uniform(0, min(self.max_backoff, self.base * 2 ** intento))
+        if retry_after is not None:
+            pausa = max(pausa, min(retry_after, self.max_backoff))
+        return pausa
+
+
+class RetryBudget:
+    """Reintentos compartidos por varias peticiones, p. ej. las mitades de un pack dividido"""
+
+    def __init__(self, reintentos: int):
+        self.restantes = max(0, reintentos)
+
+    def consumir(self) -> bool:
+        """Gastar un reintento; False si ya no quedan"""
+        if self.restantes <= 0:
+            return False
+        self.restantes -= 1
+        return True
+
+
+class CircuitBreaker:
+    """Pausa compartida por todos los workers cuando el proveedor está degradado
+
+    Tras threshold fallos consecutivos (429, 5xx, timeouts) el circuito se abre durante
+    cooldown segundos y nadie envía peticiones; un Retry-After también lo abre durante
+    el tiempo indicado. Al cerrarse, el siguiente fallo lo vuelve a abrir hasta que una
+    petición tenga éxito.
+    """
+
+    def __init__(self, threshold: int = DEFAULT_BREAKER_THRESHOLD, cooldown: float = DEFAULT_BREAKER_COOLDOWN):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.fallos = 0
+        self.abierto_hasta = 0.0
+        self.aperturas = 0
+        self.tiempo_pausado = 0.0
+        self.lock = threading.Lock()
+
+    def esperar(self) -> None:
+        """Bloquear mientras el circuito esté abierto"""
+        while True:
+            with self.lock:
+                restante = self.abierto_hasta - time.monotonic()
+            if restante <= 0:
+                return
+            time.sleep(restante)
+            with self.lock:
+                self.tiempo_pausado += restante
+
+    def registrar_exito(self) -> None:
+        with self.lock:
+            self.fallos = 0
+
+    def registrar_fallo(self, retry_after: Optional[float] = None) -> None:
+        with self.lock:
+            self.fallos += 1
+            pausa = retry_after or 0.0
+            if self.fallos >= self.threshold:
+                pausa = max(pausa, self.cooldown)
+            if not pausa:
+                return
+
+            ahora = time.monotonic()
+            if ahora + pausa <= self.abierto_hasta:
+                return
+            if self.abierto_hasta <= ahora:
+                self.aperturas += 1
+                print(f"🔌 Proveedor degradado ({self.fallos} fallos seguidos): pausando todas las peticiones {pausa:.0f}s")
+            self.abierto_hasta = ahora + pausa
+
+
+class UsageTracker:
+    """Tokens y coste acumulados de las respuestas del LLM, presupuesto y max_tokens adaptativo
+
+    Cada respuesta aporta su bloque usage (prompt, completion y total; cost si el
+    proveedor lo informa, si no se estima con el precio del modelo). Con budget (USD)
+    permitir() deja de autorizar peticiones cuando lo gastado más lo que pueden costar
+    las peticiones en vuelo alcanzaría el presupuesto. max_tokens() se ajusta a la
+    mayor completion por reseña observada recientemente, con margen, y vuelve al
+    valor por defecto si una respuesta se corta por longitud.
+    """
+
+    def __init__(self, model: str, budget: Optional[float] = None,
+                 precios: Optional[Tuple[float, float]] = None, ventana: int = 500):
+        self.model = model
+        self.budget = budget
+        self.precios = precios or PRECIOS_MODELOS.get(model)
+        self.lock = threading.Lock()
+        self.peticiones = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_tokens = 0
+        self.coste = 0.0
+        self.en_vuelo = 0
+        self.truncadas = 0
+        self.agotado = False
+        self.por_reseña = deque(maxlen=ventana)
+
+    def coste_estimado(self, prompt_tokens: int, completion_tokens: int) -> float:
+        if self.precios is None:
+            return 0.0
+        precio_prompt, precio_completion = self.precios
+        return (prompt_tokens * precio_prompt + completion_tokens * precio_completion) / 1_000_000
+
+    @property
+    def coste_medio(self) -> float:
+        return self.coste / self.peticiones if self.peticiones else 0.0
+
+    def max_tokens(self, reseñas: int = 1, por_defecto: int = DEFAULT_MAX_TOKENS) -> int:
+        """max_tokens para una petición de `reseñas` reseñas, nunca mayor que por_defecto"""
+        with self.lock:
+            if len(self.por_reseña) < MIN_OBSERVACIONES_TOKENS:
+                return por_defecto
+            maximo = max(self.por_reseña)
+        ajustado = math.ceil(maximo * MARGEN_TOKENS) * reseñas
+        return max(DEFAULT_MIN_TOKENS, min(por_defecto, ajustado))
+
+    def permitir(self) -> bool:
+        """Reservar una petición si cabe en el presupuesto; liberar() la devuelve"""
+        with self.lock:
+            if self.budget is not None:
+                reservado = (self.en_vuelo + 1) * self.coste_medio
+                if self.coste + reservado > self.budget:
+                    if not self.agotado:
+                        self.agotado = True
+                        print(f"💸 Presupuesto de ${self.budget:.4f} alcanzado (${self.coste:.4f} gastados): "
+                              f"no se envían más peticiones")
+                    return False
+            self.en_vuelo += 1
+            return True
+
+    def liberar(self) -> None:
+        with self.lock:
+            self.en_vuelo = max(0, self.en_vuelo - 1)
+
+    def registrar(self, usage: Optional[Dict], reseñas: int = 1, truncada: bool = False) -> float:
+        """Sumar el bloque usage de una respuesta; devuelve su coste"""
+        usage = usage or {}
+        prompt = int(usage.get('prompt_tokens') or 0)
+        completion = int(usage.get('completion_tokens') or 0)
+        total = int(usage.get('total_tokens') or prompt + completion)
+        coste = usage.get('cost')
+        coste = float(coste) if coste is not None else self.coste_estimado(prompt, completion)
+
+        with self.lock:
+            self.peticiones += 1
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+            self.total_tokens += total
+            self.coste += coste
+            if truncada:
+                # La muestra ya no representa la longitud real: volver al valor por defecto
+                self.truncadas += 1
+                self.por_reseña.clear()
+            elif completion:
+                self.por_reseña.append(math.ceil(completion / max(1, reseñas)))
+        return coste
+
+    def report(self) -> None:
+        if not self.peticiones:
+            return
+        print(f"   - Tokens: {self.total_tokens:,} ({self.prompt_tokens:,} prompt + {self.completion_tokens:,} completion) "
+              f"en {self.peticiones} peticiones, {self.total_tokens / self.peticiones:.0f} por petición")
+        precio = "" if self.precios is not None else " (modelo sin precio conocido: solo el coste informado por la API)"
+        presupuesto = f" de ${self.budget:.4f}" if self.budget is not None else ""
+        print(f"   - Coste estimado ({self.model}): ${self.coste:.4f}{presupuesto}, "
+              f"${self.coste_medio * 1000:.4f} por 1000 peticiones{precio}")
+        if self.por_reseña:
+            print(f"   - Completion por reseña: máx {max(self.por_reseña)} tokens en las últimas {len(self.por_reseña)} "
+                  f"({self.truncadas} respuestas cortadas por max_tokens)")
+
+
+class LatencyHistogram:
+    """Histograma de latencias por buckets fijos, seguro entre hilos"""
+
+    def __init__(self, limites: List[float] = LIMITES_LATENCIA):
+        self.limites = limites
+        self.cuentas = [0] * (len(limites) + 1)
+        self.total = 0.0
+        self.n = 0
+        self.maximo = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, segundos: float) -> None:
+        with self.lock:
+            self.cuentas[bisect.bisect_left(self.limites, segundos)] += 1
+            self.total += segundos
+            self.n += 1
+            self.maximo = max(self.maximo, segundos)
+
+    def percentil(self, p: float) -> float:
+        """Límite superior del bucket que contiene el percentil p (0-100)"""
+        with self.lock:
+            if not self.n:
+                return 0.0
+            objetivo = p / 100 * self.n
+            acumulado = 0
+            for limite, cuenta in zip(self.limites + [self.maximo], self.cuentas):
+                acumulado += cuenta
+                if acumulado >= objetivo:
+                    return min(limite, self.maximo)
+            return self.maximo
+
+    def resumen(self) -> str:
+        if not self.n:
+            return "sin datos"
+        return (f"n={self.n} media={self.total / self.n * 1000:.0f}ms p50={self.percentil(50) * 1000:.0f}ms "
+                f"p95={self.percentil(95) * 1000:.0f}ms max={self.maximo * 1000:.0f}ms")
+
+
+class _ConexionMedida:
+    """Mixin de conexión urllib3 que informa de cada conexión nueva y su tiempo de establecimiento"""
+
+    cliente = None
+
+    def connect(self):
+        inicio = time.perf_counter()
+        super().connect()
+        self.cliente.registrar_conexion(time.perf_counter() - inicio)
+
+
+class _AdaptadorMedido(HTTPAdapter):
+    """HTTPAdapter cuyos pools crean conexiones medidas"""
+
+    def __init__(self, cliente: 'LLMClient', *args, **kwargs):
+        conexiones = {
+            'http': type('ConexionHTTPMedida', (_ConexionMedida, HTTPConnection), {'cliente': cliente}),
+            'https': type('ConexionHTTPSMedida', (_ConexionMedida, HTTPSConnection), {'cliente': cliente}),
+        }
+        self.pools_medidos = {
+            'http': type('PoolHTTPMedido', (HTTPConnectionPool,), {'ConnectionCls': conexiones['http']}),
+            'https': type('PoolHTTPSMedido', (HTTPSConnectionPool,), {'ConnectionCls': conexiones['https']}),
+        }
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = dict(self.pools_medidos)
+
+
+class LLMClient:
+    """Sesión HTTP del analizador, compartida por todos sus hilos
+
+    Con requests se reutilizan las conexiones keep-alive de un pool de pool_size
+    conexiones; con http2=True se usa un cliente httpx que multiplexa las peticiones
+    sobre una sola conexión HTTP/2 por host.
+    """
+
+    def __init__(self, headers: Dict[str, str], pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT, http2: bool = False, verify=True):
+        self.timeout = timeout
+        self.http2 = http2
+        self.lock = threading.Lock()
+        self.peticiones = 0
+        self.conexiones_nuevas = 0
+        self.latencias = {etapa: LatencyHistogram() for etapa in ('conexion', 'primer_byte', 'total')}
+
+        if http2:
+            httpx = _importar_httpx()
+            self.session = httpx.Client(
+                http2=True,
+                headers=headers,
+                timeout=timeout,
+                verify=verify,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            )
+        else:
+            self.session = requests.Session()
+            adapter = _AdaptadorMedido(self, pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+            self.session.headers.update(headers)
+        self.verify = verify
+
+    def registrar_conexion(self, segundos: float) -> None:
+        with self.lock:
+            self.conexiones_nuevas += 1
+        self.latencias['conexion'].observe(segundos)
+
+    def post(self, url: str, payload: Dict):
+        """Enviar payload como JSON; devuelve la respuesta (requests o httpx)"""
+        with self.lock:
+            self.peticiones += 1
+        inicio = time.perf_counter()
+
+        if self.http2:
+            eventos = {}
+
+            def traza(evento, info):
+                eventos[evento] = time.perf_counter()
+
+            response = self.session.post(url, json=payload, extensions={'trace': traza})
+            conectado = eventos.get('connection.start_tls.complete') or eventos.get('connection.connect_tcp.complete')
+            if conectado is not None:
+                self.registrar_conexion(conectado - inicio)
+            cabeceras = (eventos.get('http2.receive_response_headers.complete')
+                         or eventos.get('http11.receive_response_headers.complete'))
+            if cabeceras is not None:
+                self.latencias['primer_byte'].observe(cabeceras - inicio)
+        else:
+            response = self.session.post(url, json=payload, timeout=self.timeout, verify=self.verify)
+            # elapsed: desde el envío hasta recibir las cabeceras
+            self.latencias['primer_byte'].observe(response.elapsed.total_seconds())
+
+        self.latencias['total'].observe(time.perf_counter() - inicio)
+        return response
+
+    @property
+    def tasa_reutilizacion(self) -> float:
+        """Fracción de peticiones servidas por una conexión ya abierta"""
+        if not self.peticiones:
+            return 0.0
+        return max(0.0, 1 - self.conexiones_nuevas / self.peticiones)
+
+    def report(self) -> None:
+        print(f"   - Conexiones: {self.conexiones_nuevas} nuevas para {self.peticiones} peticiones "
+              f"({self.tasa_reutilizacion * 100:.1f}% reutilizadas{', HTTP/2' if self.http2 else ''})")
+        for etapa, histograma in self.latencias.items():
+            print(f"   - Latencia {etapa.replace('_', ' ')}: {histograma.resumen()}")
+
+    def close(self) -> None:
+        self.session.close()
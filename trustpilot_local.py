@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+TrustPilot Local
+Clasificador local (CPU, sin red) que resuelve las reseñas triviales antes del LLM:
+idioma por n-gramas de caracteres y sentimiento por léxico + puntuación del cliente
+"""
+
+import math
+import re
+import string
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from trustpilot_similarity import normalizar_texto
+
+DEFAULT_MAX_WORDS = 12
+DEFAULT_MIN_LANGUAGE_MARGIN = 0.10
+DEFAULT_MIN_LANGUAGE_CHARS = 12
+# El idioma se detecta con el principio de la reseña: más texto no cambia el resultado
+MAX_LANGUAGE_CHARS = 300
+
+_NGRAMA = 3
+_NO_LETRA = re.compile(r"[^\w']+|[\d_]+")
+
+# Letras de los idiomas soportados: cualquier otra (ş, ł, ș, cirílico...) delata un idioma desconocido
+LETRAS_SOPORTADAS = frozenset(string.ascii_lowercase + "àáâãäçèéêëìíîïñòóôõöùúûüßœæ")
+
+# Corpus semilla por idioma para construir los perfiles de trigramas
+CORPUS_IDIOMAS = {
+    "es": "El hotel estaba muy limpio y el personal fue muy amable con nosotros. La habitación era "
+          "pequeña pero cómoda, el desayuno bueno y la ubicación perfecta. No volveremos porque el "
+          "servicio de atención al cliente nunca respondió a mi reclamación. Todo perfecto, muy "
+          "recomendable, gracias por todo. Excelente experiencia, lo recomiendo. Una estafa, no "
+          "reserven con esta empresa. Me devolvieron el dinero después de varias semanas. "
+          "Hicimos la reserva por internet y nos la confirmaron enseguida. El precio era razonable para lo "
+          "que ofrecen, aunque la próxima vez elegiremos otra zona de la ciudad. En la recepción nos atendieron "
+          "sin esperas y el equipaje llegó a tiempo. Tuvimos que llamar varias veces porque no encontraban nuestra reserva.",
+    "en": "The hotel was very clean and the staff were really friendly with us. The room was small "
+          "but comfortable, the breakfast was good and the location was perfect. We will never come "
+          "back because customer service did not answer my complaint. Great service, thank you for "
+          "everything. Highly recommended, would book again. Terrible experience, they still have "
+          "not refunded my money. Easy booking and quick response from the team. "
+          "We made the booking online and got the confirmation straight away. The price was fair for what "
+          "they offer, although next time we would choose another part of the city. At the front desk we were "
+          "served without waiting and our luggage arrived on time. We had to call several times because they could not find our booking.",
+    "fr": "L'hôtel était très propre et le personnel très aimable avec nous. La chambre était petite "
+          "mais confortable, le petit déjeuner bon et l'emplacement parfait. Nous ne reviendrons pas "
+          "car le service client n'a jamais répondu à ma réclamation. Tout était parfait, je recommande "
+          "vivement, merci pour tout. Une arnaque, ne réservez pas avec cette agence. Très bon séjour. "
+          "Nous avons fait la réservation en ligne et elle a été confirmée aussitôt. Le prix était raisonnable pour "
+          "ce qui est proposé, mais la prochaine fois nous choisirons un autre quartier de la ville. À l'accueil on "
+          "nous a servis sans attendre et nos bagages sont arrivés à temps. Nous avons dû appeler plusieurs fois car ils ne trouvaient pas notre réservation.",
+    "de": "Das Hotel war sehr sauber und das Personal war sehr freundlich zu uns. Das Zimmer war klein "
+          "aber bequem, das Frühstück gut und die Lage perfekt. Wir kommen nicht wieder, weil der "
+          "Kundenservice nie auf meine Beschwerde geantwortet hat. Alles super, sehr empfehlenswert, "
+          "vielen Dank für alles. Schlechter Service, ich habe mein Geld immer noch nicht zurück. "
+          "Wir haben online gebucht und sofort eine Bestätigung bekommen. Der Preis war für das Angebot "
+          "angemessen, aber beim nächsten Mal wählen wir einen anderen Stadtteil. An der Rezeption wurden wir "
+          "ohne Wartezeit bedient und unser Gepäck kam pünktlich an. Wir mussten mehrmals anrufen, weil sie unsere Buchung nicht finden konnten.",
+    "it": "L'albergo era molto pulito e il personale è stato molto gentile con noi. La camera era "
+          "piccola ma comoda, la colazione buona e la posizione perfetta. Non torneremo perché il "
+          "servizio clienti non ha mai risposto al mio reclamo. Tutto perfetto, consigliatissimo, "
+          "grazie di tutto. Una truffa, non prenotate con questa agenzia. Ottima esperienza. "
+          "Abbiamo fatto la prenotazione online e ce l'hanno confermata subito. Il prezzo era ragionevole per "
+          "quello che offrono, anche se la prossima volta sceglieremo un'altra zona della città. Alla reception ci "
+          "hanno serviti senza attese e i bagagli sono arrivati in tempo. Abbiamo dovuto chiamare più volte perché non trovavano la nostra prenotazione.",
+    "pt": "O hotel estava muito limpo e os funcionários foram muito simpáticos connosco. O quarto era "
+          "pequeno mas confortável, o pequeno almoço bom e a localização perfeita. Não voltaremos "
+          "porque o atendimento ao cliente nunca respondeu à minha reclamação. Tudo perfeito, muito "
+          "recomendável, obrigado por tudo. Não recebi o reembolso até hoje. Ótima experiência. "
+          "Fizemos a reserva pela internet e confirmaram logo a seguir. O preço era razoável para o que "
+          "oferecem, mas da próxima vez vamos escolher outra zona da cidade. Na receção fomos atendidos sem "
+          "esperar e a bagagem chegou a horas. Tivemos de ligar várias vezes porque não encontravam a nossa reserva.",
+    "nl": "Het hotel was erg schoon en het personeel was heel vriendelijk tegen ons. De kamer was klein "
+          "maar comfortabel, het ontbijt goed en de ligging perfect. Wij komen niet terug omdat de "
+          "klantenservice nooit op mijn klacht heeft gereageerd. Alles was perfect, een aanrader, "
+          "bedankt voor alles. Slechte service, ik heb mijn geld nog steeds niet terug gekregen. "
+          "We hebben online geboekt en kregen meteen een bevestiging. De prijs was redelijk voor wat ze "
+          "bieden, maar de volgende keer kiezen we een andere wijk van de stad. Bij de receptie werden we zonder "
+          "wachten geholpen en onze bagage kwam op tijd aan. We moesten meerdere keren bellen omdat ze onze boeking niet konden vinden.",
+}
+
+# Léxico de polaridad (palabras normalizadas, varios idiomas)
+PALABRAS_POSITIVAS = frozenset("""
+    bien bueno buena buenos buenas excelente excelentes perfecto perfecta genial estupendo fantastico
+    fantastica maravilloso maravillosa recomendable recomiendo recomendado encantado encanto gracias
+    amable rapido rapida facil mejor top ok
+    good great excellent perfect amazing awesome fantastic wonderful recommend recommended love loved
+    thanks thank easy fast quick best smooth helpful friendly nice superb brilliant
+    bon bonne parfait parfaite excellent excellente super genial recommande merci rapide facile
+    gut sehr super toll perfekt empfehlenswert danke schnell freundlich einfach
+    buono buona ottimo ottima perfetto perfetta consigliato consiglio grazie veloce facile
+    bom boa otimo otima perfeito perfeita recomendo obrigado obrigada rapido
+    goed prima perfect aanrader bedankt snel vriendelijk makkelijk
+""".split())
+
+PALABRAS_NEGATIVAS = frozenset("""
+    no nunca nada mal malo mala malos malas pesimo pesima horrible terrible estafa fraude sucio sucia
+    peor decepcion decepcionado decepcionante problema problemas queja reclamacion devolucion cancelado
+    not never bad worst awful terrible horrible scam fraud dirty disappointed disappointing problem
+    problems complaint refund cancelled canceled rude poor avoid waste
+    ne pas jamais mauvais mauvaise arnaque nul nulle sale decu probleme remboursement annule
+    nicht nie kein keine schlecht schlechter betrug dreckig enttauscht problem beschwerde
+    non mai cattivo pessimo truffa sporco deluso problema rimborso
+    nao nunca mau pessimo pessima golpe sujo decepcionado reembolso
+    niet nooit slecht slechte oplichting vies teleurgesteld probleem klacht
+""".split())
+
+# Campos que el clasificador local puede rellenar en una reseña trivial, por puntuación
+RESULTADOS_TRIVIALES = {
+    5: {"sentiment": "Positivo", "sentiment_score": "0.9", "emotion": "joy",
+        "emotion_intensity": "4", "customer_type": "Promotor"},
+    1: {"sentiment": "Negativo", "sentiment_score": "-0.9", "emotion": "anger",
+        "emotion_intensity": "4", "customer_type": "Crítico"},
+}
+
+
+def _texto_idioma(texto: str) -> str:
+    """Minúsculas sin dígitos ni puntuación, conservando los acentos (útiles para el idioma)"""
+    return ' ' + _NO_LETRA.sub(' ', str(texto).lower()).strip() + ' '
+
+
+def _perfil(texto: str) -> Tuple[Counter, float]:
+    """Frecuencias de trigramas de caracteres y su norma"""
+    trigramas = Counter(texto[i:i + _NGRAMA] for i in range(len(texto) - _NGRAMA + 1))
+    return trigramas, math.sqrt(sum(v * v for v in trigramas.values()))
+
+
+class LocalClassifier:
+    """Primer nivel de análisis: resuelve localmente las reseñas triviales y escala el resto al LLM
+
+    Una reseña se resuelve sin LLM solo si el idioma se identifica con margen suficiente,
+    es corta (<= max_words palabras), la puntuación es 1 o 5 estrellas y el léxico no
+    contradice la puntuación. Los campos que no se pueden inferir quedan como "unknown".
+    En las reseñas escaladas se conserva el idioma si se identificó con margen.
+    """
+
+    def __init__(self, max_words: int = DEFAULT_MAX_WORDS, min_margin: float = DEFAULT_MIN_LANGUAGE_MARGIN,
+                 min_chars: int = DEFAULT_MIN_LANGUAGE_CHARS):
+        self.max_words = max_words
+        self.min_margin = min_margin
+        self.min_chars = min_chars
+        self.idiomas = list(CORPUS_IDIOMAS)
+        # Trigrama -> [(posición del idioma, peso normalizado)] para puntuar todos los idiomas en una pasada
+        self.pesos: Dict[str, List[Tuple[int, float]]] = {}
+        for i, idioma in enumerate(self.idiomas):
+            perfil, norma = _perfil(_texto_idioma(CORPUS_IDIOMAS[idioma]))
+            for trigrama, n in perfil.items():
+                self.pesos.setdefault(trigrama, []).append((i, n / norma))
+        self.textos = 0
+        self.resueltas = 0
+
+    def detectar_idioma(self, texto: str) -> Tuple[Optional[str], float]:
+        """Devolver (idioma, margen de similitud coseno sobre el segundo); None si no hay confianza
+
+        Sin confianza si el texto es corto, tiene letras ajenas a los idiomas soportados o
+        el mejor idioma no supera al segundo por min_margin.
+        """
+        texto = _texto_idioma(str(texto)[:MAX_LANGUAGE_CHARS])
+        if len(texto.strip()) < self.min_chars:
+            return None, 0.0
+        if any(c.isalpha() and c not in LETRAS_SOPORTADAS for c in texto):
+            return None, 0.0
+
+        trigramas, norma = _perfil(texto)
+        if not norma:
+            return None, 0.0
+
+        productos = [0.0] * len(self.idiomas)
+        for trigrama, n in trigramas.items():
+            for i, peso in self.pesos.get(trigrama, ()):
+                productos[i] += n * peso
+        puntuaciones = sorted(((producto / norma, idioma) for producto, idioma in zip(productos, self.idiomas)),
+                              reverse=True)
+
+        margen = puntuaciones[0][0] - puntuaciones[1][0]
+        if margen < self.min_margin:
+            return None, margen
+        return puntuaciones[0][1], margen
+
+    def sentimiento_trivial(self, texto: str, customer_score) -> Optional[Dict]:
+        """Campos de sentimiento si la reseña es corta, extrema y el léxico no la contradice"""
+        try:
+            score = int(customer_score)
+        except (TypeError, ValueError):
+            return None
+        if score not in RESULTADOS_TRIVIALES:
+            return None
+
+        palabras = normalizar_texto(texto).split()
+        if not palabras or len(palabras) > self.max_words:
+            return None
+
+        positivas = sum(p in PALABRAS_POSITIVAS for p in palabras)
+        negativas = sum(p in PALABRAS_NEGATIVAS for p in palabras)
+        if score == 5 and (negativas or not positivas):
+            return None
+        if score == 1 and positivas > negativas:
+            return None
+        return RESULTADOS_TRIVIALES[score]
+
+    def clasificar(self, texto: str, customer_score) -> Optional[Dict]:
+        """Resultado completo (CAMPOS_ANALISIS) si la reseña es trivial; None para escalar al LLM"""
+        return self.clasificar_campos(texto, customer_score)[0]
+
+    def clasificar_campos(self, texto: str, customer_score) -> Tuple[Optional[Dict], Dict]:
+        """(resultado completo o None, campos fiables de una reseña escalada)
+
+        Aunque la reseña se escale al LLM, el idioma detectado con margen suficiente se
+        devuelve para completar la respuesta del LLM campo a campo.
+        """
+        self.textos += 1
+        idioma, _ = self.detectar_idioma(texto)
+        if idioma is None:
+            return None, {}
+
+        sentimiento = self.sentimiento_trivial(texto, customer_score)
+        if sentimiento is None:
+            return None, {"language": idioma}
+
+        self.resueltas += 1
+        resultado = {
+            "language": idioma,
+            "customer_gender": "unknown",
+            "main_topic": "unknown",
+            "keywords": "unknown",
+            "tourist_type": "unknown",
+            "group_type": "unknown",
+        }
+        resultado.update(sentimiento)
+        return resultado, {}
+
+    @property
+    def tasa_escalado(self) -> float:
+        return (self.textos - self.resueltas) / self.textos if self.textos else 0.0
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+TrustPilot Metrics
+Contadores, histogramas y spans compartidos por el scraper y el analizador, exportables
+como archivo de texto de Prometheus y como trazas JSON-lines
+"""
+
+import bisect
+import contextlib
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+# Límites superiores (segundos) de los buckets de los histogramas
+BUCKETS_SEGUNDOS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+_SPAN_NULO = contextlib.nullcontext()
+
+
+def _clave(nombre: str, etiquetas: Dict) -> Tuple:
+    return (nombre, tuple(sorted(etiquetas.items())))
+
+
+def _formatear_etiquetas(etiquetas: Tuple, extra: Optional[Tuple] = None) -> str:
+    pares = list(etiquetas) + ([extra] if extra else [])
+    if not pares:
+        return ""
+    valores = []
+    for k, v in pares:
+        texto = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        valores.append(f'{k}="{texto}"')
+    return "{" + ",".join(valores) + "}"
+
+
+class _Histograma:
+    def __init__(self):
+        self.cuentas = [0] * (len(BUCKETS_SEGUNDOS) + 1)
+        self.suma = 0.0
+        self.n = 0
+
+
+class _Span:
+    """Span de traza: mide su duración, la observa en un histograma y la escribe al cerrarse"""
+
+    __slots__ = ('metrics', 'nombre', 'atributos', 'span_id', 'padre', 'inicio', 'inicio_wall')
+
+    def __init__(self, metrics: 'Metrics', nombre: str, atributos: Dict):
+        self.metrics = metrics
+        self.nombre = nombre
+        self.atributos = atributos
+
+    def set(self, **atributos) -> None:
+        """Añadir atributos al span (p. ej. el resultado) antes de cerrarlo"""
+        self.atributos.update(atributos)
+
+    def __enter__(self):
+        pila = self.metrics._pila()
+        self.padre = pila[-1].span_id if pila else None
+        self.span_id = next(self.metrics._ids)
+        pila.append(self)
+        self.inicio_wall = time.time()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        duracion = time.perf_counter() - self.inicio
+        self.metrics._pila().pop()
+        if tipo is not None:
+            self.atributos['error'] = tipo.__name__
+        self.metrics.observe(f"{self.nombre}_seconds", duracion)
+        self.metrics._escribir_span(self, duracion)
+        return False
+
+
+class Metrics:
+    """Registro de métricas del proceso; desactivado no hace nada (coste de una comprobación)
+
+    incr() suma a un contador, observe() añade una muestra a un histograma y span()
+    mide un bloque: observa <nombre>_seconds y, si hay archivo de trazas, escribe una
+    línea JSON con el id de la ejecución, su id, el de su span padre (por hilo), inicio,
+    duración y atributos.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.contadores: Dict[Tuple, float] = {}
+        self.histogramas: Dict[Tuple, _Histograma] = {}
+        self.trazas = None
+        self.trace_id = None
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+
+    def configure(self, trace_path: Optional[str] = None, enabled: bool = True) -> None:
+        """Activar las métricas y, con trace_path, la escritura de spans en JSON-lines"""
+        self.enabled = enabled
+        self.trace_id = uuid.uuid4().hex
+        if self.trazas is not None:
+            self.trazas.close()
+            self.trazas = None
+        if enabled and trace_path:
+            self.trazas = open(trace_path, 'a', encoding='utf-8', buffering=1 << 16)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.contadores = {}
+            self.histogramas = {}
+
+    def _pila(self) -> list:
+        pila = getattr(self._local, 'pila', None)
+        if pila is None:
+            pila = self._local.pila = []
+        return pila
+
+    def incr(self, nombre: str, valor: float = 1, **etiquetas) -> None:
+        if not self.enabled:
+            return
+        clave = _clave(nombre, etiquetas)
+        with self.lock:
+            self.contadores[clave] = self.contadores.get(clave, 0) + valor
+
+    def observe(self, nombre: str, valor: float, **etiquetas) -> None:
+        if not self.enabled:
+            return
+        clave = _clave(nombre, etiquetas)
+        with self.lock:
+            histograma = self.histogramas.get(clave)
+            if histograma is None:
+                histograma = self.histogramas[clave] = _Histograma()
+            histograma.cuentas[bisect.bisect_left(BUCKETS_SEGUNDOS, valor)] += 1
+            histograma.suma += valor
+            histograma.n += 1
+
+    def span(self, nombre: str, **atributos):
+        """Context manager que mide un bloque; sin métricas activas devuelve uno nulo"""
+        if not self.enabled:
+            return _SPAN_NULO
+        return _Span(self, nombre, atributos)
+
+    def _escribir_span(self, span: _Span, duracion: float) -> None:
+        if self.trazas is None:
+            return
+        linea = json.dumps({
+            'trace_id': self.trace_id,
+            'span_id': span.span_id,
+            'parent_id': span.padre,
+            'name': span.nombre,
+            'thread': threading.current_thread().name,
+            'start': round(span.inicio_wall, 6),
+            'duration_ms': round(duracion * 1000, 3),
+            'attrs': span.atributos,
+        }, ensure_ascii=False, default=str)
+        with self.lock:
+            self.trazas.write(linea + '\n')
+
+    def prometheus_text(self) -> str:
+        """Contadores e histogramas en el formato de texto de Prometheus"""
+        with self.lock:
+            contadores = dict(self.contadores)
+            histogramas = {clave: (list(h.cuentas), h.suma, h.n) for clave, h in self.histogramas.items()}
+
+        lineas = []
+        for nombre in sorted({nombre for nombre, _ in contadores}):
+            lineas.append(f"# TYPE trustpilot_{nombre}_total counter")
+            for (n, etiquetas), valor in sorted(contadores.items()):
+                if n == nombre:
+                    lineas.append(f"trustpilot_{nombre}_total{_formatear_etiquetas(etiquetas)} {valor:g}")
+
+        for nombre in sorted({nombre for nombre, _ in histogramas}):
+            lineas.append(f"# TYPE trustpilot_{nombre} histogram")
+            for (n, etiquetas), (cuentas, suma, total) in sorted(histogramas.items()):
+                if n != nombre:
+                    continue
+                acumulado = 0
+                for limite, cuenta in zip(BUCKETS_SEGUNDOS + ['+Inf'], cuentas):
+                    acumulado += cuenta
+                    lineas.append(f"trustpilot_{nombre}_bucket{_formatear_etiquetas(etiquetas, ('le', limite))} {acumulado}")
+                lineas.append(f"trustpilot_{nombre}_sum{_formatear_etiquetas(etiquetas)} {suma:.6f}")
+                lineas.append(f"trustpilot_{nombre}_count{_formatear_etiquetas(etiquetas)} {total}")
+        return "\n".join(lineas) + "\n"
+
+    def export(self, prometheus_path: Optional[str] = None) -> None:
+        """Escribir el archivo de Prometheus (atómico) y vaciar el buffer de trazas"""
+        if not self.enabled:
+            return
+        if prometheus_path:
+            temporal = f"{prometheus_path}.tmp"
+            with open(temporal, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus_text())
+            os.replace(temporal, prometheus_path)
+            print(f"📈 Métricas Prometheus guardadas en: {prometheus_path}")
+        if self.trazas is not None:
+            with self.lock:
+                self.trazas.flush()
+            print(f"🧵 Trazas guardadas en: {self.trazas.name}")
+
+
+METRICS = Metrics()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+TrustPilot Pipeline
+Scraping y análisis en streaming: scraper → cola acotada → LLM → CSV/Parquet
+"""
+
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from scraper_github_actions import (
+    BASE_URL, DEFAULT_MAX_DELAY, DEFAULT_MIN_DELAY, DEFAULT_PROFILE_ROOT, DEFAULT_SEEN_INDEX_PATH, FETCH_MODES,
+    RUN_TIMINGS, create_fetcher_factory, dedup_reviews, get_companies_from_category, open_seen_index,
+    scrape_companies_with_pool
+)
+from trustpilot_analysis import DEFAULT_BATCH_SIZE, TrustPilotAnalyzer, add_analyzer_arguments, build_analyzer
+from trustpilot_metrics import METRICS
+from trustpilot_records import reviews_to_dataframe
+
+# Bloques de reseñas en la cola entre el scraper y el LLM
+DEFAULT_QUEUE_SIZE = 4
+# Reseñas por bloque (una empresa puede generar varios bloques)
+DEFAULT_PIPELINE_CHUNKSIZE = 200
+
+# Marca de fin de la cola
+FIN_DE_COLA = object()
+
+
+class EtapaScraper(threading.Thread):
+    """Productor: extrae las empresas con el pool y publica sus reseñas por bloques en la cola
+
+    La cola está acotada: si el LLM va más lento, put() se bloquea, el pool deja de
+    recibir resultados y sus workers se detienen hasta que haya hueco (backpressure).
+    """
+
+    def __init__(self, cola: queue.Queue, companies: List[Dict], make_fetcher, fetcher, workers: int,
+                 max_review_pages: int, seen_index=None, chunksize: int = DEFAULT_PIPELINE_CHUNKSIZE,
+                 since_last_run: bool = False):
+        super().__init__(name="etapa-scraper", daemon=True)
+        self.cola = cola
+        self.companies = companies
+        self.make_fetcher = make_fetcher
+        self.fetcher = fetcher
+        self.workers = workers
+        self.max_review_pages = max_review_pages
+        self.seen_index = seen_index
+        self.since_last_run = since_last_run
+        self.chunksize = max(1, chunksize)
+        self.detener = threading.Event()
+        self.error = None
+        self.empresas = 0
+        self.reseñas = 0
+        self.tiempo_bloqueado = 0.0
+        self.vistas = set()
+
+    def _publicar(self, item) -> bool:
+        """Encolar esperando hueco; False si se pidió detener la etapa"""
+        inicio = time.perf_counter()
+        try:
+            while not self.detener.is_set():
+                try:
+                    self.cola.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.tiempo_bloqueado += time.perf_counter() - inicio
+
+    def run(self):
+        siguiente_indice = 0
+        empresas = scrape_companies_with_pool(
+            self.companies,
+            max_review_pages=self.max_review_pages,
+            workers=self.workers,
+            fetcher_factory=self.make_fetcher,
+            fetcher=self.fetcher,
+            seen_index=self.seen_index if self.since_last_run else None,
+            max_pending=self.workers
+        )
+        try:
+            for index, company, reviews, error in empresas:
+                if error:
+                    print(f"   ❌ {company['company_name']}: {error}")
+                    continue
+                self.empresas += 1
+                # Deduplicar al insertar: repetidas en esta ejecución o ya guardadas antes
+                reviews = dedup_reviews(reviews, self.vistas, self.seen_index)
+
+                for inicio in range(0, len(reviews), self.chunksize):
+                    bloque = reviews_to_dataframe(reviews[inicio:inicio + self.chunksize])
+                    # Índice continuo entre bloques, como al leer un CSV por partes
+                    bloque.index = pd.RangeIndex(siguiente_indice, siguiente_indice + len(bloque))
+                    siguiente_indice += len(bloque)
+                    if not self._publicar(bloque):
+                        return
+                    self.reseñas += len(bloque)
+        except Exception as e:
+            self.error = e
+        finally:
+            # Parar el pool y esperar a que sus workers cierren los navegadores
+            empresas.close()
+            self._publicar(FIN_DE_COLA)
+
+
+class ConsumoCola:
+    """Iterador de bloques para el analizador que mide cuánto espera al scraper
+
+    Con detener (p. ej. el plazo del analizador vencido) deja de leer la cola; al
+    salir del pipeline se para también el scraper.
+    """
+
+    def __init__(self, cola: queue.Queue, etapa: EtapaScraper, detener: Optional[Callable[[], bool]] = None):
+        self.cola = cola
+        self.etapa = etapa
+        self.detener = detener
+        self.tiempo_esperando = 0.0
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        while True:
+            if self.detener is not None and self.detener():
+                print("⏹️ Pipeline detenido: no se leen más bloques del scraper")
+                return
+            inicio = time.perf_counter()
+            try:
+                bloque = self.cola.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            finally:
+                self.tiempo_esperando += time.perf_counter() - inicio
+            if bloque is FIN_DE_COLA:
+                break
+            yield bloque
+
+        if self.etapa.error is not None:
+            raise self.etapa.error
+
+
+def ejecutar_pipeline(analyzer: TrustPilotAnalyzer, max_companies: int = 100, max_review_pages: int = 10,
+                      max_company_pages: int = 10, workers: int = 1, fetch_mode: str = 'http',
+                      base_url: str = BASE_URL, since_last_run: bool = False, dedup: bool = False,
+                      seen_index_path: str = DEFAULT_SEEN_INDEX_PATH, min_delay: float = DEFAULT_MIN_DELAY,
+                      max_delay: float = DEFAULT_MAX_DELAY, lean_browser: bool = False,
+                      profile_root: str = DEFAULT_PROFILE_ROOT, queue_size: int = DEFAULT_QUEUE_SIZE,
+                      chunksize: int = DEFAULT_PIPELINE_CHUNKSIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                      max_reviews: Optional[int] = None, filename_base: str = 'trustpilot_analyzed',
+                      output_format: str = 'csv') -> Tuple[Optional[str], List[Dict]]:
+    """Extraer y analizar a la vez: cada empresa se analiza y se guarda en cuanto termina su scraping"""
+    inicio = time.perf_counter()
+    print("🔗 Iniciando pipeline scraper → LLM")
+    print(f"📊 Parámetros: {max_companies} empresas, {max_review_pages} páginas/empresa, {workers} workers, cola de {queue_size} bloques")
+
+    RUN_TIMINGS.reset()
+    seen_index = open_seen_index(seen_index_path) if since_last_run or dedup else None
+    make_fetcher, http_fetcher, _ = create_fetcher_factory(
+        workers, fetch_mode, min_delay, max_delay, lean_browser, profile_root
+    )
+    fetcher = make_fetcher()
+    etapa = None
+
+    try:
+        category_url = f"{base_url}/categories/travel_vacation"
+        companies = get_companies_from_category(fetcher, category_url, max_pages=max_company_pages)[:max_companies]
+        if not companies:
+            print("⚠️ No se encontraron empresas")
+            return None, []
+
+        cola = queue.Queue(maxsize=max(1, queue_size))
+        etapa = EtapaScraper(
+            cola, companies, make_fetcher, fetcher, workers, max_review_pages, seen_index, chunksize, since_last_run
+        )
+        consumo = ConsumoCola(cola, etapa, detener=analyzer.plazo_vencido)
+        etapa.start()
+
+        primeros = []
+
+        def al_escribir(bloque: pd.DataFrame):
+            if not primeros:
+                primeros.append(time.perf_counter() - inicio)
+                print(f"⏱️ Primeros resultados guardados a los {primeros[0]:.1f}s")
+            # Marcar como vistas solo las reseñas ya guardadas
+            if seen_index is not None:
+                seen_index.add(bloque[['review_id', 'domain']].to_dict('records'))
+
+        filename, errores = analyzer.analizar_bloques(
+            consumo,
+            batch_size=batch_size,
+            max_reviews=max_reviews,
+            filename_base=filename_base,
+            output_format=output_format,
+            al_escribir=al_escribir
+        )
+
+        total = time.perf_counter() - inicio
+        print(f"\n🔗 Pipeline completado en {total:.1f}s")
+        print(f"   • Empresas: {etapa.empresas} | Reseñas extraídas: {etapa.reseñas:,}")
+        print(f"   • Scraper bloqueado por la cola llena (LLM más lento): {etapa.tiempo_bloqueado:.1f}s")
+        print(f"   • LLM esperando al scraper (cola vacía): {consumo.tiempo_esperando:.1f}s")
+        RUN_TIMINGS.report()
+        return filename, errores
+
+    finally:
+        if etapa is not None:
+            # Los workers del scraper usan seen_index y el fetcher hasta terminar su empresa en curso
+            etapa.detener.set()
+            if etapa.is_alive():
+                etapa.join()
+        fetcher.close()
+        if http_fetcher is not None:
+            http_fetcher.close()
+        if seen_index is not None:
+            seen_index.close()
+
+
+def main():
+    """Función principal del script"""
+    parser = argparse.ArgumentParser(description='Pipeline de scraping y análisis de reseñas TrustPilot en streaming')
+    add_analyzer_arguments(parser)
+    parser.add_argument('--max-companies', type=int, default=100, help='Número máximo de empresas (default: 100)')
+    parser.add_argument('--max-review-pages', type=int, default=10, help='Páginas de reseñas por empresa (default: 10)')
+    parser.add_argument('--max-company-pages', type=int, default=10, help='Páginas de categoría (default: 10)')
+    parser.add_argument('--workers', type=int, default=1, help='Workers de scraping en paralelo (default: 1)')
+    parser.add_argument('--fetch-mode', choices=FETCH_MODES, default='http', help='http: HTTP con Chrome solo como respaldo; selenium: siempre Chrome')
+    parser.add_argument('--base-url', default=BASE_URL, help='URL base de Trustpilot (p. ej. un servidor local de fixtures)')
+    parser.add_argument('--since-last-run', action='store_true', help='Solo reseñas nuevas desde la última ejecución')
+    parser.add_argument('--dedup', action='store_true', help='Descartar las reseñas ya guardadas en ejecuciones anteriores (índice de vistas)')
+    parser.add_argument('--seen-index', default=DEFAULT_SEEN_INDEX_PATH, help=f'Índice SQLite de reseñas vistas (default: {DEFAULT_SEEN_INDEX_PATH})')
+    parser.add_argument('--min-delay', type=float, default=DEFAULT_MIN_DELAY, help=f'Pausa de cortesía mínima en segundos (default: {DEFAULT_MIN_DELAY})')
+    parser.add_argument('--max-delay', type=float, default=DEFAULT_MAX_DELAY, help=f'Pausa de cortesía máxima en segundos (default: {DEFAULT_MAX_DELAY})')
+    parser.add_argument('--lean-browser', action='store_true', help='Chrome ligero: sin imágenes, fuentes, multimedia ni scripts de terceros')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE, help=f'Bloques en la cola entre scraper y LLM (default: {DEFAULT_QUEUE_SIZE})')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_PIPELINE_CHUNKSIZE, help=f'Reseñas por bloque (default: {DEFAULT_PIPELINE_CHUNKSIZE})')
+
+    args = parser.parse_args()
+
+    api_key = args.api_key or os.getenv('OPENROUTER_API_KEY')
+    if not api_key:
+        print("❌ Error: API Key de OpenRouter no encontrada")
+        print("Usa --api-key o configura la variable de entorno OPENROUTER_API_KEY")
+        sys.exit(1)
+
+    if args.metrics_file or args.trace_file:
+        METRICS.configure(trace_path=args.trace_file)
+
+    try:
+        analyzer = build_analyzer(args)
+
+        filename, errores = ejecutar_pipeline(
+            analyzer,
+            max_companies=args.max_companies,
+            max_review_pages=args.max_review_pages,
+            max_company_pages=args.max_company_pages,
+            workers=args.workers,
+            fetch_mode=args.fetch_mode,
+            base_url=args.base_url,
+            since_last_run=args.since_last_run,
+            dedup=args.dedup,
+            seen_index_path=args.seen_index,
+            min_delay=args.min_delay,
+            max_delay=args.max_delay,
+            lean_browser=args.lean_browser,
+            queue_size=args.queue_size,
+            chunksize=args.chunksize,
+            batch_size=args.batch_size,
+            max_reviews=args.max_reviews,
+            output_format=args.output_format
+        )
+
+        if filename is None:
+            print("❌ No se obtuvieron resultados")
+            sys.exit(1)
+
+        print("\n🎉 Pipeline completado exitosamente!")
+        print(f"📁 Archivo de resultados: {filename}")
+        if errores:
+            print(f"⚠️ Se encontraron {len(errores)} errores durante el proceso")
+
+    except Exception as e:
+        print(f"❌ Error durante el pipeline: {e}")
+        sys.exit(1)
+    finally:
+        METRICS.export(args.metrics_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+TrustPilot Priority
+Orden de análisis de las reseñas pendientes por prioridad (recientes, peor puntuación,
+empresas con más reseñas o cualquier columna) para que una ejecución parcial analice
+primero las más valiosas
+"""
+
+import heapq
+import math
+from typing import Callable, Iterator, List, Union
+
+import pandas as pd
+
+# Criterio -> descripción (para la ayuda de la línea de comandos)
+CRITERIOS_PRIORIDAD = {
+    'recency': 'más recientes primero (review_date)',
+    'low_score': 'peor puntuación primero (customer_score)',
+    'company_size': 'empresas con más reseñas primero',
+}
+
+
+def _numerica(serie: pd.Series) -> pd.Series:
+    """Serie como números; si la columna no es numérica, rango de sus valores como texto"""
+    numeros = pd.to_numeric(serie, errors='coerce')
+    if numeros.notna().any() or serie.isna().all():
+        return numeros.astype(float)
+    texto = serie.dropna().astype(str)
+    posiciones = {valor: i for i, valor in enumerate(sorted(texto.unique()))}
+    return texto.map(posiciones).reindex(serie.index).astype(float)
+
+
+def clave_criterio(df: pd.DataFrame, criterio: str) -> pd.Series:
+    """Clave numérica de un criterio (menor = antes); los valores ausentes van al final
+
+    Además de los criterios de CRITERIOS_PRIORIDAD acepta el nombre de una columna, ascendente,
+    o precedido de '-' para ordenarla de mayor a menor.
+    """
+    if criterio == 'recency':
+        fechas = pd.to_datetime(df['review_date'], errors='coerce', utc=True) if 'review_date' in df.columns else None
+        clave = -(fechas - pd.Timestamp(0, tz='UTC')).dt.total_seconds() if fechas is not None else None
+    elif criterio == 'low_score':
+        clave = _numerica(df['customer_score']) if 'customer_score' in df.columns else None
+    elif criterio == 'company_size':
+        columna = next((c for c in ('domain', 'company_name') if c in df.columns), None)
+        clave = -df.groupby(columna)[columna].transform('size').astype(float) if columna else None
+    else:
+        descendente = criterio.startswith('-')
+        columna = criterio.lstrip('-+')
+        if columna not in df.columns:
+            raise ValueError(f"Criterio de prioridad desconocido: {criterio} (usa {', '.join(CRITERIOS_PRIORIDAD)} o una columna)")
+        clave = _numerica(df[columna])
+        if descendente:
+            clave = -clave
+
+    if clave is None:
+        print(f"⚠️ Prioridad '{criterio}': faltan columnas, se ignora")
+        return pd.Series(0.0, index=df.index)
+    return clave.fillna(math.inf)
+
+
+class PriorityScheduler:
+    """Cola de prioridad (heap) sobre las filas pendientes de un DataFrame
+
+    criterios es una lista de criterios (ver clave_criterio) aplicados en orden como
+    desempate, o una función fila -> clave ordenable. A igual clave se conserva el
+    orden del archivo.
+    """
+
+    def __init__(self, criterios: Union[str, List[str], Callable[[pd.Series], object]]):
+        if isinstance(criterios, str):
+            criterios = [c.strip() for c in criterios.split(',') if c.strip()]
+        self.criterios = criterios
+
+    @property
+    def descripcion(self) -> str:
+        if callable(self.criterios):
+            return getattr(self.criterios, '__name__', 'clave personalizada')
+        return ', '.join(self.criterios)
+
+    def iterar(self, df: pd.DataFrame) -> Iterator:
+        """Índices de df de mayor a menor prioridad, extraídos del heap bajo demanda"""
+        if callable(self.criterios):
+            claves = [(self.criterios(row),) for _, row in df.iterrows()]
+        else:
+            columnas = [clave_criterio(df, criterio).tolist() for criterio in self.criterios]
+            claves = list(zip(*columnas)) if columnas else [()] * len(df)
+
+        heap = [(clave, posicion, idx) for posicion, (clave, idx) in enumerate(zip(claves, df.index))]
+        heapq.heapify(heap)
+        while heap:
+            yield heapq.heappop(heap)[2]
+
+    def ordenar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """df reordenado de mayor a menor prioridad"""
+        return df.loc[list(self.iterar(df))]
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+TrustPilot Records
+Representación compacta de las reseñas extraídas: registros con __slots__ que comparten
+los campos de su empresa y un buffer por columnas que genera el DataFrame con las
+columnas de empresa como categóricas
+"""
+
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+# Campos comunes a todas las reseñas de una empresa
+COLUMNAS_EMPRESA = ('domain', 'company_name', 'categories', 'subcategories', 'company_rating')
+# Campos propios de cada reseña
+COLUMNAS_RESEÑA = ('review_id', 'review_date', 'customer_name', 'customer_score', 'review_text')
+# Orden de las columnas en los CSV del scraper (las de análisis las añade el analizador)
+COLUMNAS_SALIDA = ('review_id',) + COLUMNAS_EMPRESA + COLUMNAS_RESEÑA[1:]
+
+
+def _internar(valor) -> str:
+    return sys.intern(str(valor)) if valor is not None else ''
+
+
+class CompanyFields:
+    """Campos de una empresa compartidos (no copiados) por todas sus reseñas"""
+
+    __slots__ = COLUMNAS_EMPRESA
+
+    def __init__(self, company_info: Dict, subcategories: str = ''):
+        self.domain = _internar(company_info['domain'])
+        self.company_name = _internar(company_info['company_name'])
+        self.categories = _internar(company_info['categories'])
+        self.subcategories = _internar(subcategories)
+        self.company_rating = _internar(company_info['rating'])
+
+    def clave(self) -> tuple:
+        return tuple(getattr(self, campo) for campo in COLUMNAS_EMPRESA)
+
+
+class ReviewRecord:
+    """Reseña extraída: solo sus propios campos y una referencia a los de su empresa
+
+    Admite el acceso de los antiguos dicts (record['review_id'], record.get('domain'))
+    para el índice de vistas y la deduplicación.
+    """
+
+    __slots__ = ('company',) + COLUMNAS_RESEÑA
+
+    def __init__(self, company: CompanyFields, review_id: str, review_date, customer_name: str,
+                 customer_score: int, review_text: str):
+        self.company = company
+        self.review_id = review_id
+        self.review_date = review_date
+        self.customer_name = customer_name
+        self.customer_score = customer_score
+        self.review_text = review_text
+
+    def __getitem__(self, campo: str):
+        if campo in COLUMNAS_EMPRESA:
+            return getattr(self.company, campo)
+        try:
+            return getattr(self, campo)
+        except AttributeError:
+            raise KeyError(campo)
+
+    def get(self, campo: str, default=None):
+        try:
+            return self[campo]
+        except KeyError:
+            return default
+
+    def as_dict(self) -> Dict:
+        return {campo: self[campo] for campo in COLUMNAS_SALIDA}
+
+
+class ReviewBuffer:
+    """Reseñas guardadas por columnas en lugar de un dict por reseña
+
+    Los campos de empresa se guardan una vez por empresa y cada reseña solo lleva el
+    código de su empresa; customer_score va en un array de bytes. orden permite añadir
+    las empresas según terminan y generar el DataFrame en el orden original.
+    """
+
+    def __init__(self, records: Iterable[ReviewRecord] = ()):
+        self.columnas: Dict[str, List] = {campo: [] for campo in COLUMNAS_RESEÑA if campo != 'customer_score'}
+        self.scores = array('b')
+        self.codigos = array('i')
+        self.ordenes = array('i')
+        self.empresas: List[CompanyFields] = []
+        self._codigo_empresa: Dict[tuple, int] = {}
+        self.extend(records)
+
+    def __len__(self) -> int:
+        return len(self.codigos)
+
+    def _codigo(self, company: CompanyFields) -> int:
+        clave = company.clave()
+        codigo = self._codigo_empresa.get(clave)
+        if codigo is None:
+            codigo = self._codigo_empresa[clave] = len(self.empresas)
+            self.empresas.append(company)
+        return codigo
+
+    def extend(self, records: Iterable[ReviewRecord], orden: int = 0) -> None:
+        for record in records:
+            self.codigos.append(self._codigo(record.company))
+            self.ordenes.append(orden)
+            self.scores.append(max(-128, min(127, int(record.customer_score or 0))))
+            for campo, valores in self.columnas.items():
+                valores.append(getattr(record, campo))
+
+    def registros_vistos(self) -> Iterator[Dict]:
+        """(review_id, domain) de cada reseña, para SeenReviewIndex.add, sin crear registros"""
+        for review_id, codigo in zip(self.columnas['review_id'], self.codigos):
+            yield {'review_id': review_id, 'domain': self.empresas[codigo].domain}
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """DataFrame con las columnas de empresa categóricas, ordenado por orden (estable)"""
+        codigos = np.frombuffer(self.codigos, dtype=np.int32) if len(self) else np.zeros(0, dtype=np.int32)
+        posiciones = None
+        if len(self) and len(set(self.ordenes)) > 1:
+            posiciones = np.argsort(np.frombuffer(self.ordenes, dtype=np.int32), kind='stable')
+            codigos = codigos[posiciones]
+
+        datos = {}
+        for campo in COLUMNAS_SALIDA:
+            if campo in COLUMNAS_EMPRESA:
+                # Códigos por empresa -> códigos de la categoría de esta columna
+                por_empresa, categorias = pd.factorize(np.array([getattr(empresa, campo) for empresa in self.empresas], dtype=object))
+                datos[campo] = pd.Categorical.from_codes(por_empresa[codigos] if len(codigos) else codigos, categorias)
+            elif campo == 'customer_score':
+                scores = np.frombuffer(self.scores, dtype=np.int8) if len(self) else np.zeros(0, dtype=np.int8)
+                datos[campo] = scores[posiciones] if posiciones is not None else scores.copy()
+            else:
+                valores = self.columnas[campo]
+                datos[campo] = [valores[i] for i in posiciones] if posiciones is not None else valores
+        return pd.DataFrame(datos, columns=list(COLUMNAS_SALIDA))
+
+
+def reviews_to_dataframe(records: Iterable[ReviewRecord]) -> pd.DataFrame:
+    """DataFrame compacto de una lista de registros (p. ej. las reseñas de una empresa)"""
+    return ReviewBuffer(records).to_dataframe()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+TrustPilot Similarity
+Detección de reseñas casi duplicadas con MinHash/LSH sobre el texto normalizado
+"""
+
+import re
+import zlib
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 4
+# Representantes que se conservan (unos 3 KB cada uno); al superarlo se olvida el menos usado
+DEFAULT_MAX_REPRESENTATIVES = 20000
+
+# Primo mayor que 2^32 para el hashing universal (a·x + b) mod p
+_PRIMO = 4294967311
+_NO_ALFANUMERICO = re.compile(r'[^\w]+')
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas, sin acentos ni puntuación y con los espacios colapsados"""
+    texto = unicodedata.normalize('NFKD', str(texto).lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return _NO_ALFANUMERICO.sub(' ', texto).strip()
+
+
+def parametros_lsh(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Elegir (bandas, filas por banda) con el umbral de la curva S justo por debajo de threshold
+
+    El umbral aproximado de LSH es (1/b)^(1/r); quedarse por debajo favorece no perder
+    candidatos, que después se verifican con la similitud estimada.
+    """
+    mejor = (num_perm, 1)
+    for filas in range(1, num_perm + 1):
+        if num_perm % filas:
+            continue
+        bandas = num_perm // filas
+        if (1 / bandas) ** (1 / filas) <= threshold:
+            mejor = (bandas, filas)
+    return mejor
+
+
+class NearDuplicateIndex:
+    """Índice MinHash/LSH que asigna cada texto a un representante casi idéntico
+
+    Solo los representantes se insertan en las tablas LSH, así que los grupos no se
+    encadenan: un texto se une a un grupo si su similitud de Jaccard estimada con el
+    representante es >= threshold.
+
+    Como mucho guarda max_representantes firmas (y sus resultados): al superarlo olvida el
+    representante usado hace más tiempo (LRU), de modo que la memoria no crece con el
+    tamaño de la entrada en --stream o en el pipeline. Un texto cuyo representante se
+    olvidó pasa a ser representante de nuevo.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_SIMILARITY_THRESHOLD, num_perm: int = DEFAULT_NUM_PERM,
+                 shingle_size: int = DEFAULT_SHINGLE_SIZE, seed: int = 1,
+                 max_representantes: int = DEFAULT_MAX_REPRESENTATIVES):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.max_representantes = max(1, max_representantes)
+        self.bandas, self.filas = parametros_lsh(num_perm, threshold)
+
+        rng = np.random.default_rng(seed)
+        # a < 2^31 y x < 2^32: a·x + b cabe en uint64 sin desbordar
+        self.a = rng.integers(1, 1 << 31, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+
+        self.tablas: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(self.bandas)]
+        # Firmas de los representantes, de menos a más recientemente usado
+        self.firmas: 'OrderedDict[Hashable, np.ndarray]' = OrderedDict()
+        self.resultados: Dict[Hashable, Dict] = {}
+        self.textos = 0
+        self.agrupados = 0
+        self.olvidados = 0
+
+    def shingles(self, texto: str) -> set:
+        """n-gramas de caracteres del texto normalizado"""
+        k = self.shingle_size
+        if len(texto) <= k:
+            return {texto}
+        return {texto[i:i + k] for i in range(len(texto) - k + 1)}
+
+    def firma(self, texto: str) -> Optional[np.ndarray]:
+        """Firma MinHash del texto; None si queda vacío al normalizar"""
+        normalizado = normalizar_texto(texto)
+        if not normalizado:
+            return None
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode('utf-8')) for s in self.shingles(normalizado)),
+            dtype=np.uint64
+        )
+        return ((np.outer(self.a, hashes) + self.b[:, None]) % _PRIMO).min(axis=1)
+
+    def _claves_bandas(self, firma: np.ndarray) -> List[bytes]:
+        return [firma[i * self.filas:(i + 1) * self.filas].tobytes() for i in range(self.bandas)]
+
+    def asignar(self, clave: Hashable, texto: str) -> Optional[Hashable]:
+        """Devolver la clave del representante casi duplicado, o None si el texto pasa a ser representante"""
+        self.textos += 1
+        firma = self.firma(texto)
+        if firma is None:
+            return None
+
+        claves_bandas = self._claves_bandas(firma)
+        candidatos = []
+        for tabla, clave_banda in zip(self.tablas, claves_bandas):
+            for candidato in tabla.get(clave_banda, ()):
+                if candidato not in candidatos:
+                    candidatos.append(candidato)
+
+        mejor, mejor_similitud = None, 0.0
+        for candidato in candidatos:
+            similitud = float(np.mean(self.firmas[candidato] == firma))
+            if similitud > mejor_similitud:
+                mejor, mejor_similitud = candidato, similitud
+
+        if mejor is not None and mejor_similitud >= self.threshold:
+            self.agrupados += 1
+            self.firmas.move_to_end(mejor)
+            return mejor
+
+        self.firmas[clave] = firma
+        for tabla, clave_banda in zip(self.tablas, claves_bandas):
+            tabla.setdefault(clave_banda, []).append(clave)
+        while len(self.firmas) > self.max_representantes:
+            self._olvidar(next(iter(self.firmas)))
+        return None
+
+    def _olvidar(self, clave: Hashable) -> None:
+        """Quitar un representante de las tablas LSH junto con su resultado"""
+        firma = self.firmas.pop(clave)
+        for tabla, clave_banda in zip(self.tablas, self._claves_bandas(firma)):
+            claves = tabla[clave_banda]
+            claves.remove(clave)
+            if not claves:
+                del tabla[clave_banda]
+        self.resultados.pop(clave, None)
+        self.olvidados += 1
+
+    def guardar_resultado(self, clave: Hashable, resultado) -> None:
+        """Guardar el resultado de un representante para sus casi duplicados de bloques posteriores"""
+        if clave in self.firmas:
+            self.resultados[clave] = resultado
+
+    @property
+    def tasa_agrupados(self) -> float:
+        return self.agrupados / self.textos if self.textos else 0.0
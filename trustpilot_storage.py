@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+TrustPilot Storage
+Almacenamiento columnar (Parquet) compartido por el scraper y el analizador
+"""
+
+import os
+from datetime import datetime
+from typing import List, Optional
+
+import pandas as pd
+
+# Columnas de partición del dataset Parquet
+COLUMNAS_PARTICION = ["domain", "scrape_date"]
+
+# Columnas de baja cardinalidad que se guardan como categóricas
+COLUMNAS_CATEGORICAS = ["sentiment", "emotion", "main_topic"]
+
+FORMATOS_SALIDA = ["csv", "parquet", "both"]
+
+
+def _importar_pyarrow():
+    """Importar pyarrow solo cuando se usa Parquet (dependencia opcional)"""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+    except ImportError:
+        raise ImportError("El formato Parquet requiere pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def es_parquet(path: str) -> bool:
+    """Indicar si la ruta es un archivo .parquet o un directorio de dataset"""
+    return path.endswith('.parquet') or os.path.isdir(path)
+
+
+def compactar_tipos(df: pd.DataFrame) -> pd.DataFrame:
+    """Convertir las columnas conocidas a tipos compactos para Parquet"""
+    df = df.copy()
+
+    if 'customer_score' in df.columns:
+        df['customer_score'] = pd.to_numeric(df['customer_score'], errors='coerce').astype('Int8')
+
+    if 'analyzed' in df.columns and df['analyzed'].dtype != bool:
+        df['analyzed'] = df['analyzed'].isin([True, 'True', 'true', 1, '1'])
+
+    if 'sentiment_score' in df.columns:
+        df['sentiment_score'] = pd.to_numeric(df['sentiment_score'], errors='coerce').astype('float32')
+
+    if 'emotion_intensity' in df.columns and str(df['emotion_intensity'].dtype) != 'Int8':
+        valores = pd.to_numeric(df['emotion_intensity'], errors='coerce').round()
+        df['emotion_intensity'] = valores.where(valores.between(1, 5)).astype('Int8')
+
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in df.columns:
+            # Los valores vacíos (p. ej. de CSV antiguos del scraper) se guardan como nulos
+            df[columna] = df[columna].astype(object).replace('', pd.NA).astype('category')
+
+    return df
+
+
+def guardar_parquet(df: pd.DataFrame, directorio: str, fecha: Optional[str] = None,
+                    basename: str = "part", sobrescribir: bool = True) -> str:
+    """Guardar un DataFrame como dataset Parquet particionado por dominio y fecha de scraping
+
+    Con sobrescribir=True se reemplazan las particiones que se escriben; con False
+    se añaden archivos nuevos (basename debe ser único por escritura).
+    """
+    pa = _importar_pyarrow()
+
+    df = compactar_tipos(df)
+    if 'scrape_date' not in df.columns:
+        df['scrape_date'] = fecha or datetime.now().strftime("%Y-%m-%d")
+
+    particiones = [columna for columna in COLUMNAS_PARTICION if columna in df.columns]
+    for columna in particiones:
+        df[columna] = df[columna].astype(str)
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    pa.dataset.write_dataset(
+        tabla,
+        directorio,
+        format="parquet",
+        partitioning=particiones,
+        partitioning_flavor="hive",
+        basename_template=f"{basename}-{{i}}.parquet",
+        existing_data_behavior="delete_matching" if sobrescribir else "overwrite_or_ignore"
+    )
+    return directorio
+
+
+def cargar_parquet(path: str, columnas: Optional[List[str]] = None) -> pd.DataFrame:
+    """Cargar un archivo o dataset Parquet leyendo solo las columnas indicadas"""
+    _importar_pyarrow()
+    return pd.read_parquet(path, columns=columnas, engine="pyarrow")
+
+
+def iterar_parquet(path: str, columnas: Optional[List[str]] = None, chunksize: int = 5000):
+    """Recorrer un dataset Parquet por bloques con un índice continuo entre bloques"""
+    pa = _importar_pyarrow()
+
+    dataset = pa.dataset.dataset(path, format="parquet", partitioning="hive")
+    inicio = 0
+    for batch in dataset.to_batches(columns=columnas, batch_size=chunksize):
+        if batch.num_rows == 0:
+            continue
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(inicio, inicio + len(chunk))
+        inicio += len(chunk)
+        yield chunk